@@ -0,0 +1,159 @@
+import glob
+import multiprocessing
+import os
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from accountpy import report
+
+# Batch report generation for many ledgers (e.g. one per subsidiary) on a process pool.
+# Each ledger is reported in its own worker process, and a failing ledger is recorded
+# without stopping the rest of the batch. A worker process that dies outright (out of
+# memory, segfault) breaks the whole pool; the ledgers it had not finished are then rerun on
+# a fresh pool, those that were already running one at a time, so the crash is charged only
+# to the ledger that causes it.
+# Ledgers sharing a file name (subs/*/gl.csv) get folders named after their path below the
+# ledgers' common folder (a_gl, b_gl), so no two ledgers write to the same folder.
+
+_started = None  # worker side: queue receiving each ledger path as its report starts
+
+def expand_ledgers(sources) -> list:
+    """
+    Expands directories and glob patterns into a sorted list of ledger CSV paths.
+    Args:
+        sources: Iterable of file paths, directories (all *.csv inside) or glob patterns.
+    Returns:
+        list of str: Unique ledger paths.
+    """
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            paths.update(glob.glob(os.path.join(source, '*.csv')))
+        elif os.path.isfile(source):
+            paths.add(source)
+        else:
+            paths.update(glob.glob(source, recursive=True))
+    return sorted(paths)
+
+def entity_name(ledger_path) -> str:
+    """
+    Name used for an entity's output folder: the ledger file name without extension.
+    """
+    return os.path.splitext(os.path.basename(ledger_path))[0]
+
+def entity_names(ledger_paths) -> dict:
+    """
+    Output folder names for a set of ledgers: entity_name, except that ledgers sharing a file
+    name are named after their path below the ledgers' common folder, with '_' for separators
+    (subs/a/gl.csv and subs/b/gl.csv give 'a_gl' and 'b_gl').
+    Returns:
+        dict: ledger path -> name.
+    Raises:
+        ValueError: If two ledgers would still get the same name.
+    """
+    paths = [os.path.abspath(path) for path in ledger_paths]
+    counts = Counter(entity_name(path) for path in paths)
+    root = os.path.commonpath([os.path.dirname(path) for path in paths]) if paths else ''
+    names = {}
+    for ledger_path, path in zip(ledger_paths, paths):
+        name = entity_name(path)
+        if counts[name] > 1:
+            name = os.path.splitext(os.path.relpath(path, root))[0].replace(os.sep, '_')
+        names[ledger_path] = name
+    owners = {}
+    for ledger_path, name in names.items():
+        if name in owners:
+            raise ValueError(f"Ledgers {owners[name]} and {ledger_path} would both be reported as '{name}'")
+        owners[name] = ledger_path
+    return names
+
+def report_entity(ledger_path, formats, out_dir, mode, name: str = None) -> dict:
+    """
+    Writes one ledger's reports to out_dir/<name>/ (entity_name by default). Runs inside a worker process.
+    Returns:
+        dict with 'ledger', 'ok', 'seconds', 'paths' and 'error' keys. Errors are captured, not raised.
+    """
+    start = time.perf_counter()
+    try:
+        paths = report(ledger_path, formats, os.path.join(out_dir, name or entity_name(ledger_path)), mode)
+        return {'ledger': ledger_path, 'ok': True, 'seconds': time.perf_counter() - start, 'paths': paths, 'error': None}
+    except Exception as e:
+        return {'ledger': ledger_path, 'ok': False, 'seconds': time.perf_counter() - start, 'paths': [],
+                'error': f"{type(e).__name__}: {e}", 'traceback': traceback.format_exc()}
+
+def _init_worker(started):
+    global _started
+    _started = started
+
+def _report_started(ledger_path, formats, out_dir, mode, name) -> dict:
+    _started.put(ledger_path)  # SimpleQueue.put writes to the pipe before returning, so it survives a crash
+    return report_entity(ledger_path, formats, out_dir, mode, name)
+
+def run_batch(ledgers, formats=('html',), out_dir='.', workers: int = None, mode: str = 'cached', on_result=None) -> list:
+    """
+    Reports every ledger in parallel.
+    Args:
+        ledgers: List of ledger CSV paths (see expand_ledgers).
+        formats: Any of 'html' and 'pdf'.
+        out_dir: Output directory; each ledger gets a sub-folder named by entity_names.
+        workers: Number of worker processes. Defaults to the number of CPUs.
+        mode: Load mode passed to accountpy.load_statements.
+        on_result: Optional callable invoked with each result dict as it completes.
+    Returns:
+        list of result dicts (see report_entity), in the order of ledgers.
+    Raises:
+        ValueError: Before any report starts, if two ledgers would share an output folder.
+    """
+    names = entity_names(ledgers)
+    workers = min(workers or os.cpu_count() or 1, max(len(ledgers), 1))
+    results = {}
+    started = multiprocessing.SimpleQueue()
+    pending, suspects = list(ledgers), []
+
+    def finish(result):
+        results[result['ledger']] = result
+        if on_result:
+            on_result(result)
+
+    while pending or suspects:
+        # After a crash, ledgers that were running are retried alone to find the one that crashed
+        batch = [suspects.pop(0)] if suspects else pending
+        if batch is pending:
+            pending = []
+        broken = _run_pool(batch, names, formats, out_dir, mode, 1 if len(batch) == 1 else workers, started, finish)
+        if not broken:
+            continue
+        if len(batch) == 1:
+            finish({'ledger': batch[0], 'ok': False, 'seconds': None, 'paths': [],
+                    'error': "BrokenProcessPool: the worker process died while reporting this ledger"})
+            continue
+        running = set()
+        while not started.empty():
+            running.add(started.get())
+        crashed = [path for path in broken if path in running] or broken
+        suspects += crashed
+        pending += [path for path in broken if path not in crashed]
+    return [results[path] for path in ledgers]
+
+def _run_pool(ledgers, names, formats, out_dir, mode, workers, started, finish) -> list:
+    """
+    Runs one pool over ledgers, passing each result to finish.
+    Returns:
+        list of the ledgers left unfinished because a worker process died.
+    """
+    while not started.empty():  # only starts on this pool matter
+        started.get()
+    broken = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(started,)) as pool:
+        futures = {pool.submit(_report_started, path, tuple(formats), out_dir, mode, names[path]): path for path in ledgers}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                finish(future.result())
+            except BrokenProcessPool:
+                broken.append(path)
+            except Exception as e:
+                finish({'ledger': path, 'ok': False, 'seconds': None, 'paths': [], 'error': f"{type(e).__name__}: {e}"})
+    return broken
@@ -0,0 +1,521 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from DataScrub import adj_credits_debit, gaap_adjust, clean_df, clean_df_chunked
+from Ledger import Ledger
+from Validate import validate_ledger
+from LedgerCache import load_ledger
+from Consolidate import consolidate
+from OutputPDF import write_pdf
+from ForecastCalendar import forecast_calendar
+from CashForecast import FREQUENCIES, expand_schedules, projected_balance
+from SyntheticLedger import synthetic_ledger
+
+# Micro-benchmarks for the DataScrub pipeline, plus a regression suite on synthetic ledgers.
+# Run with: python Benchmark.py [rows]
+#           python Benchmark.py suite [--save BASELINE.json] [--baseline BASELINE.json] [--runs 5]
+# The suite times ingestion, clean_df, HTML export and PDF export at each scale and, given a
+# baseline saved earlier on the same machine, prints the change of every timing.
+
+SAMPLE_LEDGER = 'Sample ledger.csv'
+
+def sample_ledger(rows: int) -> pd.DataFrame:
+    """
+    Builds a ledger of the requested size by repeating the rows of the sample ledger.
+    Args:
+        rows: Number of rows in the returned DataFrame.
+    Returns:
+        DataFrame in the sample ledger's column format.
+    """
+    sample = pd.read_csv(SAMPLE_LEDGER)
+    repeats = -(-rows // len(sample))  # ceiling division
+    return pd.concat([sample] * repeats, ignore_index=True).iloc[:rows]
+
+def timed(func, *args, **kwargs):
+    """
+    Calls func once and returns (result, elapsed seconds).
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def bench_gaap(rows: int = 200_000):
+    """
+    Compares the row-wise adj_credits_debit apply against the vectorized gaap_adjust.
+    Prints rows/sec for each and checks that both give the same amounts.
+    """
+    df = sample_ledger(rows)
+    rowwise, rowwise_secs = timed(df.apply, adj_credits_debit, axis=1)
+    vectorized, vectorized_secs = timed(gaap_adjust, df.copy())
+
+    pd.testing.assert_series_equal(rowwise, vectorized, check_names=False)
+    print(f"GAAP adjustment on {rows:,} rows")
+    print(f"  row-wise apply: {rows / rowwise_secs:>14,.0f} rows/sec ({rowwise_secs:.3f}s)")
+    print(f"  vectorized:     {rows / vectorized_secs:>14,.0f} rows/sec ({vectorized_secs:.3f}s)")
+    print(f"  speedup:        {rowwise_secs / vectorized_secs:>14,.1f}x")
+
+def peak_memory(func, *args, **kwargs):
+    """
+    Calls func once and returns (result, elapsed seconds, peak traced memory in bytes).
+    """
+    tracemalloc.start()
+    try:
+        result, secs = timed(func, *args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, secs, peak
+
+def bench_clean_df(sizes=(10_000, 1_000_000, 10_000_000)):
+    """
+    Times clean_df end to end on ledgers of several sizes.
+    """
+    print("clean_df")
+    for rows in sizes:
+        df = sample_ledger(rows)
+        _, secs = timed(clean_df, df)
+        print(f"  {rows:>12,} rows: {secs:7.3f}s ({rows / secs:,.0f} rows/sec)")
+        del df
+
+def bench_ledger_model(rows: int = 1_000_000):
+    """
+    Compares the footprint of a read_csv DataFrame against the compact Ledger model,
+    and clean_df on each.
+    """
+    df = sample_ledger(rows)
+    frame_bytes = df.memory_usage(deep=True).sum()
+    ledger, build_secs = timed(Ledger.from_frame, df)
+    print(f"Ledger model, {rows:,} rows")
+    print(f"  DataFrame: {frame_bytes / rows:7.1f} bytes/transaction")
+    print(f"  Ledger:    {ledger.nbytes / rows:7.1f} bytes/transaction (built in {build_secs:.3f}s)")
+    _, frame_secs = timed(clean_df, df.copy())
+    _, ledger_secs = timed(clean_df, ledger)
+    print(f"  clean_df(DataFrame): {frame_secs:.3f}s, clean_df(Ledger): {ledger_secs:.3f}s")
+
+def bench_validate(rows: int = 1_000_000, runs: int = 5):
+    """
+    Cost of the validation pass relative to reading and cleaning the same ledger (median of runs).
+    Transaction IDs are assigned in debit/credit pairs so the per-transaction check runs.
+    """
+    df = sample_ledger(rows)
+    df['Transaction ID'] = range(rows)
+    df['Transaction ID'] //= 2
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ledger.csv')
+        df.to_csv(path, index=False)
+        plain, validated = [], []
+        for _ in range(runs):  # alternate the two so drift affects both equally
+            plain.append(timed(lambda: clean_df(pd.read_csv(path)))[1])
+            validated.append(timed(lambda: clean_df(pd.read_csv(path), on_exceptions=lambda report: None))[1])
+        total_secs, validate_secs = statistics.median(plain), statistics.median(validated)
+    print(f"Validation, {rows:,} rows, median of {runs} runs")
+    print(f"  read + clean_df:              {total_secs:.3f}s")
+    print(f"  read + validate + clean_df:   {validate_secs:.3f}s ({(validate_secs / total_secs - 1) * 100:+.1f}%)")
+
+def bench_report_cache(rows: int = 1_000_000):
+    """
+    Time to get a ledger's statements cold, from the in-process cache, and from the
+    on-disk cache in a fresh process (simulated by a new ReportCache on the same directory).
+    """
+    from accountpy import load_statements
+    from ReportCache import ReportCache
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ledger.csv')
+        sample_ledger(rows).to_csv(path, index=False)
+        cache = ReportCache(disk_dir=os.path.join(tmp, 'reports'))
+        _, cold = timed(load_statements, path, cache=cache)
+        _, memory = timed(load_statements, path, cache=cache)
+        _, disk = timed(load_statements, path, cache=ReportCache(disk_dir=os.path.join(tmp, 'reports')))
+    print(f"Report cache, {rows:,} rows")
+    print(f"  computed: {cold:.3f}s, memory hit: {memory:.4f}s, disk hit: {disk:.4f}s")
+
+def bench_balance_index(rows: int = 1_000_000, accounts: int = 500, years: int = 10):
+    """
+    Building a BalanceIndex once, then statements for several ranges and periods, against
+    rerunning clean_df; query time should not depend on the number of ledger rows.
+    """
+    from BalanceIndex import BalanceIndex
+    df = synthetic_ledger(rows, accounts=accounts, months=12 * years)
+    _, clean_secs = timed(clean_df, df.copy())
+    index, build_secs = timed(BalanceIndex.from_frame, df)
+    print(f"Balance index, {rows:,} rows, {accounts} accounts over {years} years ({index.nbytes / 2**20:.1f} MiB)")
+    print(f"  clean_df: {clean_secs:.3f}s, index build: {build_secs:.3f}s")
+    for period, fiscal_year_start, start, end in [('M', 1, None, None), ('Q', 4, None, None), ('FY', 7, None, None),
+                                                  ('W', 1, '2025-01-01', '2025-12-31'), ('D', 1, '2025-03-01', '2025-03-31')]:
+        _, secs = timed(index.statements, start, end, period, fiscal_year_start)
+        print(f"  {period:<2} from {start or 'first date'} to {end or 'last date'}: {secs:.4f}s")
+
+def bench_cash_flow(rows: int = 1_000_000, accounts: int = 500, years: int = 10):
+    """
+    Statement of cash flows from finished statements, against building the statements;
+    it works on the accounts x months balance sheet, so it should not depend on ledger rows.
+    """
+    from CashFlow import cash_flow_statement
+    (ic, bs), clean_secs = timed(clean_df, synthetic_ledger(rows, accounts=accounts, months=12 * years))
+    _, secs = timed(cash_flow_statement, ic, bs)
+    print(f"Cash flow, {rows:,} rows, {accounts} accounts over {years} years: clean_df {clean_secs:.3f}s, "
+          f"cash_flow_statement {secs:.4f}s")
+
+def bench_drilldown(rows: int = 1_000_000, accounts: int = 500, years: int = 10):
+    """
+    clean_df with and without the drill-down index, and lookups of one month and of a
+    balance through a month.
+    """
+    df = synthetic_ledger(rows, accounts=accounts, months=12 * years)
+    found = []
+    setup = lambda: Ledger.from_frame(df)
+    plain_secs = median_seconds(clean_df, 3, setup)
+    drill_secs = median_seconds(lambda ledger: clean_df(ledger, on_drilldown=found.append), 3, setup)
+    index = found[-1]
+    month = index.months[len(index.months) // 2]
+    month_rows, month_secs = timed(index.transactions, 'Cash', month)
+    balance_rows, balance_secs = timed(index.transactions, 'Cash', month, True)
+    print(f"Drill-down, {rows:,} rows, {accounts} accounts over {years} years ({index.nbytes / 2**20:.1f} MiB)")
+    print(f"  clean_df: {plain_secs:.3f}s, with index: {drill_secs:.3f}s")
+    print(f"  one month: {len(month_rows):,} rows in {month_secs:.4f}s, balance: {len(balance_rows):,} rows in {balance_secs:.4f}s")
+
+def bench_ledger_store(rows: int = 1_000_000, accounts: int = 500, years: int = 10):
+    """
+    Bulk import into a LedgerStore, then whole, quarterly and part-month statements, a filtered
+    monthly query and a per-account history, against clean_df on the same ledger.
+    """
+    from LedgerStore import LedgerStore
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ledger.csv')
+        synthetic_ledger(rows, accounts=accounts, months=12 * years).to_csv(path, index=False)
+        _, clean_secs = timed(lambda: clean_df(pd.read_csv(path)))
+        with LedgerStore(os.path.join(tmp, 'ledgers.sqlite')) as store:
+            _, import_secs = timed(store.import_csv, path, 'bench')
+            print(f"Ledger store, {rows:,} rows, {accounts} accounts over {years} years")
+            print(f"  read_csv + clean_df: {clean_secs:.3f}s, import: {import_secs:.3f}s "
+                  f"({os.path.getsize(store.path) / 2**20:,.0f} MiB)")
+            for label, query in [('statements', lambda: store.statements()),
+                                 ('quarter statements', lambda: store.statements(start='2025-07-01', end='2025-09-30')),
+                                 ('part-month statements', lambda: store.statements(start='2025-07-15', end='2026-02-10')),
+                                 ('one account, one quarter', lambda: store.monthly_partials(start='2025-07-01', end='2025-09-30', accounts='Accounts Payable')),
+                                 ('account history, one quarter', lambda: store.account_history('Accounts Payable', start='2025-07-01', end='2025-09-30'))]:
+                print(f"  {label + ':':<30}{timed(query)[1] * 1000:8.1f} ms")
+
+def bench_chunked(rows: int = 500_000, chunksize: int = 50_000):
+    """
+    Compares peak memory and time of clean_df(pd.read_csv(...)) against clean_df_chunked.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ledger.csv')
+        sample_ledger(rows).to_csv(path, index=False)
+
+        (ic, bs), whole_secs, whole_peak = peak_memory(lambda: clean_df(pd.read_csv(path)))
+        (ic_chunked, bs_chunked), chunked_secs, chunked_peak = peak_memory(clean_df_chunked, path, chunksize)
+
+    pd.testing.assert_frame_equal(ic, ic_chunked)
+    pd.testing.assert_frame_equal(bs, bs_chunked)
+    print(f"Ledger ingestion on {rows:,} rows (chunksize {chunksize:,})")
+    print(f"  whole file: {whole_peak / 2**20:>8,.1f} MiB peak ({whole_secs:.3f}s)")
+    print(f"  chunked:    {chunked_peak / 2**20:>8,.1f} MiB peak ({chunked_secs:.3f}s)")
+
+def bench_cache(rows: int = 500_000):
+    """
+    Compares loading a ledger with pd.read_csv + pd.to_datetime against a cold and a warm LedgerCache load.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ledger.csv')
+        cache_dir = os.path.join(tmp, 'cache')
+        sample_ledger(rows).to_csv(path, index=False)
+
+        def read_and_parse():
+            df = pd.read_csv(path)
+            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+            return df
+
+        plain, plain_secs = timed(read_and_parse)
+        cold, cold_secs = timed(load_ledger, path, cache_dir)
+        warm, warm_secs = timed(load_ledger, path, cache_dir)
+
+    pd.testing.assert_frame_equal(plain, warm.astype({col: object for col in ['Account', 'Type', 'Effect']}))
+    print(f"Ledger load on {rows:,} rows")
+    print(f"  read_csv + to_datetime: {plain_secs:.3f}s")
+    print(f"  cache cold:             {cold_secs:.3f}s")
+    print(f"  cache warm (mmap):      {warm_secs:.3f}s")
+
+def bench_consolidate(rows: int = 2_000_000, entities: int = 8, workers: int = None):
+    """
+    Compares clean_df on a concatenated ledger against Consolidate.consolidate on the per-entity files.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(entities):
+            path = os.path.join(tmp, f'entity{i}.csv')
+            sample_ledger(rows // entities).to_csv(path, index=False)
+            paths.append(path)
+
+        def concatenated():
+            return clean_df(pd.concat([pd.read_csv(path) for path in paths], ignore_index=True))
+
+        (ic, bs), serial_secs, serial_peak = peak_memory(concatenated)
+        (ic_con, bs_con), parallel_secs = timed(consolidate, paths, None, workers)
+
+    pd.testing.assert_frame_equal(ic, ic_con)
+    pd.testing.assert_frame_equal(bs, bs_con)
+    print(f"Consolidation of {entities} ledgers, {rows:,} rows total")
+    print(f"  clean_df on concatenated ledger: {serial_secs:.3f}s ({serial_peak / 2**20:,.1f} MiB peak)")
+    print(f"  parallel partials + merge:       {parallel_secs:.3f}s")
+
+def report_frame(rows: int) -> pd.DataFrame:
+    """
+    A balance sheet shaped report with the requested number of rows, built by repeating the sample's.
+    """
+    _, bs = clean_df(pd.read_csv(SAMPLE_LEDGER))
+    return pd.concat([bs] * (-(-rows // len(bs))))[:rows]
+
+def bench_pdf(sizes=(1_000, 10_000, 25_000)):
+    """
+    Times write_pdf on reports of several sizes; rows/sec should stay roughly flat.
+    """
+    print("PDF export")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            _, secs = timed(write_pdf, report_frame(rows), 'Balance Sheet', os.path.join(tmp, 'report.pdf'))
+            print(f"  {rows:>8,} rows: {secs:7.3f}s ({rows / secs:,.0f} rows/sec)")
+
+def bench_html(accounts: int = 500, years: int = 10):
+    """
+    Compares the Styler and streaming HTML renderers on a wide multi-year report:
+    render time and output size.
+    """
+    from OutputHTML import RENDERERS, style_tables
+    statements = clean_df(synthetic_ledger(1_000_000, accounts=accounts, months=12 * years))
+    titles = ['Income Statement', 'Balance Sheet']
+    print(f"HTML export, {accounts} accounts over {years} years")
+    with tempfile.TemporaryDirectory() as tmp:
+        for renderer in RENDERERS:
+            out_dir = os.path.join(tmp, renderer)
+            os.makedirs(out_dir)
+            paths, secs = timed(style_tables, statements, titles, out_dir, renderer)
+            size = sum(os.path.getsize(path) for path in paths)
+            print(f"  {renderer:<7} {secs:7.3f}s {size / 2**20:8.2f} MiB")
+
+def bench_calendar(years=(1, 5, 10)):
+    """
+    Times forecast_calendar with an event on every day; time should grow linearly with the horizon.
+    """
+    print("Forecast calendar, one event per day")
+    for n in years:
+        days = pd.date_range('2025-01-01', periods=365 * n, freq='D')
+        events = pd.Series(range(len(days)), index=days) % 1000 - 500
+        _, secs = timed(forecast_calendar, events, days[0], 12 * n)
+        print(f"  {n:>3} years: {secs:.3f}s")
+
+def bench_forecast(schedules: int = 500, years: int = 5):
+    """
+    Times a ledger-driven cash forecast with many recurring schedules, after checking the
+    semimonthly rule on a month-end start.
+    """
+    payroll = pd.DataFrame({'Name': ['Payroll'], 'Amount': [-100.0], 'Frequency': ['semimonthly'], 'Start': ['2025-01-31']})
+    semimonthly = expand_schedules(payroll, '2025-01-01', '2025-04-30')['Date']
+    expected = pd.to_datetime(['2025-01-31', '2025-02-15', '2025-02-28', '2025-03-15', '2025-03-31', '2025-04-15', '2025-04-30'])
+    pd.testing.assert_series_equal(semimonthly, pd.Series(expected, name='Date'))
+    _, bs = clean_df(pd.read_csv(SAMPLE_LEDGER))
+    frequencies = [FREQUENCIES[i % len(FREQUENCIES)] for i in range(schedules)]
+    schedule_df = pd.DataFrame({
+        'Name': [f'Schedule {i}' for i in range(schedules)],
+        'Amount': [(i % 200 - 100) * 10.0 for i in range(schedules)],
+        'Frequency': frequencies,
+        'Start': pd.Timestamp('2024-06-01') + pd.to_timedelta([i % 365 for i in range(schedules)], unit='D'),
+    })
+    balance, secs = timed(projected_balance, bs, schedule_df, years)
+    print(f"Cash forecast, {schedules} schedules over {years} years ({len(balance):,} days): {secs:.3f}s")
+
+def bench_report_server(rows: int = 1_000_000, accounts: int = 500, years: int = 10, clients: int = 200,
+                        requests: int = 20_000):
+    """
+    ReportServer under many concurrent clients: a cold burst, where every client waits on one
+    coalesced computation, then sustained load on cached statements.
+    """
+    import asyncio
+    from LoadTest import format_result, load_test
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.csv')
+        synthetic_ledger(rows, accounts=accounts, months=12 * years).to_csv(path, index=False)
+        env = dict(os.environ, ACCOUNTPY_REPORT_CACHE_MB='0')  # cold means cold: no pickled statements
+        server = subprocess.Popen([sys.executable, 'ReportServer.py', f'bench={path}', '--port', '0'],
+                                  cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                                  stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        try:
+            base = server.stdout.readline().split()[-1].rstrip('/')
+            urls = [f'{base}/ledgers/bench/{name}' for name in ('income-statement.html', 'balance-sheet.json', 'cash-flow.html')]
+            print(f"Report server, {rows:,} rows, {accounts} accounts over {years} years, {clients} clients")
+            print(f"  cold: {format_result(asyncio.run(load_test(urls, clients, clients)))}")
+            print(f"  warm: {format_result(asyncio.run(load_test(urls, clients, requests)))}")
+        finally:
+            server.terminate()
+            server.wait()
+
+def import_seconds(statement: str, runs: int = 5) -> float:
+    """
+    Median wall time of a fresh interpreter running statement, minus an empty interpreter start.
+    """
+    def run(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        return time.perf_counter() - start
+    baseline = statistics.median(run('pass') for _ in range(runs))
+    return statistics.median(run(statement) for _ in range(runs)) - baseline
+
+def bench_imports():
+    """
+    Cold-start import cost of the headless entry point against the eager imports DisplayUI used to do.
+    """
+    eager = 'import tkinter, reportlab.platypus, reportlab.pdfbase.pdfmetrics, pandas.io.formats.style, DataScrub'
+    print("Cold-start import time")
+    print(f"  eager GUI + PDF + Styler imports: {import_seconds(eager):.3f}s")
+    print(f"  import accountpy:                 {import_seconds('import accountpy'):.3f}s")
+
+# (rows, accounts) per scale; the chart grows with the ledger so the exported statements do too
+SUITE_SCALES = [(10_000, 20), (100_000, 100), (1_000_000, 400)]
+SUITE_MONTHS = 24
+BASELINE_FILE = 'benchmark_baseline.json'
+
+def median_seconds(func, runs: int, setup=None) -> float:
+    """
+    Median wall time of func over runs calls, after one untimed warm-up call. setup(), if
+    given, is called untimed before each run and its result passed to func.
+    """
+    times = []
+    func(*((setup(),) if setup else ()))  # warm-up: lazy imports, caches, page faults
+    for _ in range(runs):
+        args = (setup(),) if setup else ()
+        times.append(timed(func, *args)[1])
+    return statistics.median(times)
+
+def run_suite(scales=SUITE_SCALES, runs: int = 5) -> dict:
+    """
+    Times each pipeline stage on deterministic synthetic ledgers.
+    Args:
+        scales: (rows, accounts) pairs.
+        runs: Timed runs per measurement; the median is kept.
+    Returns:
+        dict mapping 'stage/rows' to median seconds.
+    """
+    from OutputHTML import style_tables
+    from CashFlow import cash_flow_statement
+    import warnings
+    from OutputPDF import export_pdfs
+    warnings.filterwarnings('ignore', message='Could not infer format')  # M/D/YY dates, parsed per distinct value
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows, accounts in scales:
+            path = os.path.join(tmp, f'ledger_{rows}.csv')
+            synthetic_ledger(rows, accounts=accounts, months=SUITE_MONTHS).to_csv(path, index=False)
+            df = pd.read_csv(path)
+            statements = clean_df(df.copy())
+            cash_flow_statement(*statements)  # raises if the chart and the statements disagree on signs
+            results[f'read_csv/{rows}'] = median_seconds(lambda: pd.read_csv(path), runs)
+            results[f'clean_df/{rows}'] = median_seconds(clean_df, runs, setup=df.copy)
+            results[f'html/{rows}'] = median_seconds(lambda: style_tables(statements, ['Income Statement', 'Balance Sheet'], tmp), runs)
+            results[f'pdf/{rows}'] = median_seconds(lambda: export_pdfs(statements, ['Income Statement', 'Balance Sheet'], tmp), runs)
+            print(' '.join(f"{name}: {results[name]:.3f}s" for name in results if name.endswith(f'/{rows}')), file=sys.stderr)
+    return results
+
+def suite_metadata(runs: int) -> dict:
+    """
+    Where and how a suite run was made, stored with the results so baselines are comparable.
+    """
+    import numpy as np
+    return {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': platform.machine(),
+        'node': platform.node(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'runs': runs,
+    }
+
+def compare_results(results: dict, baseline: dict, threshold: float = 0.10) -> list:
+    """
+    Prints each timing next to its baseline with the relative change.
+    Args:
+        threshold: Relative slowdown above which a timing is flagged.
+    Returns:
+        list of the names of flagged (slower) timings.
+    """
+    slower = []
+    print(f"{'benchmark':<20} {'baseline':>10} {'current':>10} {'delta':>9}")
+    for name, secs in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<20} {'-':>10} {secs:>9.3f}s {'new':>9}")
+            continue
+        delta = secs / base - 1
+        flag = ''
+        if delta > threshold:
+            flag = '  SLOWER'
+            slower.append(name)
+        elif delta < -threshold:
+            flag = '  faster'
+        print(f"{name:<20} {base:>9.3f}s {secs:>9.3f}s {delta * 100:>+8.1f}%{flag}")
+    return slower
+
+def suite_main(argv=None) -> int:
+    """
+    Command line for the regression suite. Returns 1 if any timing regressed past the threshold.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog='Benchmark.py suite', description="Pipeline benchmarks on synthetic ledgers.")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help=f"Baseline to compare against, if it exists. Default: {BASELINE_FILE}.")
+    parser.add_argument('--save', default=None, metavar='FILE', help="Write these results as a new baseline.")
+    parser.add_argument('--runs', type=int, default=5, help="Timed runs per measurement (median). Default: 5.")
+    parser.add_argument('--rows', default=None, help="Comma separated row counts to run, a subset of the default scales.")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Relative slowdown reported as a regression. Default: 0.10.")
+    args = parser.parse_args(argv)
+
+    scales = SUITE_SCALES
+    if args.rows:
+        wanted = {int(rows) for rows in args.rows.split(',')}
+        scales = [scale for scale in SUITE_SCALES if scale[0] in wanted] or [(rows, 20) for rows in sorted(wanted)]
+    results = run_suite(scales, args.runs)
+
+    slower = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.baseline} ({baseline['meta']['date']}, {baseline['meta']['node']})")
+        slower = compare_results(results, baseline['results'], args.threshold)
+    else:
+        for name, secs in results.items():
+            print(f"{name:<20} {secs:>9.3f}s")
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'meta': suite_metadata(args.runs), 'results': results}, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+    return 1 if slower else 0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'suite':
+        sys.exit(suite_main(sys.argv[2:]))
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    bench_gaap(rows)
+    bench_clean_df()
+    bench_ledger_model(rows)
+    bench_validate(rows)
+    bench_report_cache(rows)
+    bench_balance_index(rows)
+    bench_cash_flow(rows)
+    bench_drilldown(rows)
+    bench_ledger_store(rows)
+    bench_chunked(rows)
+    bench_cache(rows)
+    bench_consolidate(rows)
+    bench_pdf()
+    bench_html()
+    bench_calendar()
+    bench_forecast()
+    bench_report_server(rows)
+    bench_imports()
@@ -0,0 +1,115 @@
+import re
+import numpy as np
+import pandas as pd
+from DataScrub import CASH_PATTERN
+
+# Statement of Cash Flows, indirect method.
+# Built from the finished income statement and balance sheet, not from the ledger, so on any
+# ledger size it costs one diff over an accounts x months matrix. Both statements are turned back
+# into the same signed monthly partials, debit positive: a balance sheet row's change (negated for
+# liabilities and equity), and an income account's GAAP amount as is, since income accounts are
+# typed Asset (see the README). In a balanced ledger those partials add up to zero every month, so
+# every line is minus its partial (cash in is positive) and the lines add up to the change in cash
+# by construction; the statement checks this and raises if it does not hold. Net income is the
+# income accounts' line, so it has the opposite sign of the income statement's debit-signed row.
+# Cash and cash equivalent accounts (DataScrub.CASH_PATTERN, which CashForecast also uses for its
+# opening balance) are the result, not a line. Other accounts are classified by name:
+# - investing: long-lived assets (equipment, property, investments, ...)
+# - financing: borrowings (notes and loans payable, debt, ...) and every equity account
+# - operating: all other assets and liabilities (receivables, inventory, payables, ...)
+# An increase in an asset uses cash; an increase in a liability or equity account provides it.
+
+CENT = 0.01  # statements are rounded to cents, so each summed line may be off by up to a cent
+
+INVESTING_PATTERN = re.compile(r'equipment|property|plant|building|\bland\b|vehicle|furniture|machinery|investment|'
+                               r'intangible|patent|goodwill|depreciation|amortization', flags=re.IGNORECASE)
+FINANCING_PATTERN = re.compile(r'notes? payable|loan|debt|bond|mortgage|long[- ]term|lease liabilit|dividend',
+                               flags=re.IGNORECASE)
+CASH_FLOW_SECTIONS = [('operating', 'Operating Activities', 'Net Cash from Operating Activities'),
+                      ('investing', 'Investing Activities', 'Net Cash from Investing Activities'),
+                      ('financing', 'Financing Activities', 'Net Cash from Financing Activities')]
+
+def classify_account(section: str, account: str) -> str:
+    """
+    Cash flow activity of a balance sheet row: 'cash', 'operating', 'investing' or 'financing'.
+    Args:
+        section: Balance sheet section ('Assets', 'Liabilities' or 'Equities').
+        account: Account name.
+    """
+    if section == 'Assets':
+        if CASH_PATTERN.search(account):
+            return 'cash'
+        return 'investing' if INVESTING_PATTERN.search(account) else 'operating'
+    if section == 'Liabilities':
+        return 'financing' if FINANCING_PATTERN.search(account) else 'operating'
+    return 'financing'
+
+def cash_flow_statement(ic_final: pd.DataFrame, bs_final: pd.DataFrame, opening: pd.Series = None) -> pd.DataFrame:
+    """
+    Indirect-method statement of cash flows with the balance sheet's period columns.
+    Args:
+        ic_final: Income statement from clean_df (or any statements built the same way).
+        bs_final: Balance sheet from the same call.
+        opening: Balances before the first column, indexed like bs_final's rows. Defaults to
+            zero, i.e. statements that start with the ledger.
+    Returns:
+        DataFrame with the same (section, Account) index layout as the other statements: net income and
+        the changes in each activity, their totals, the net change in cash, and cash at the
+        beginning and end of each period, plus a total column named like the income statement's.
+    Raises:
+        ValueError: If the net change in cash differs from ending minus beginning cash, which
+            means the ledger does not balance (see Validate.py) or income accounts are not typed Asset.
+    """
+    months = bs_final.columns
+    total_label = next((col for col in ic_final.columns if col not in set(months)), 'Year Total')
+
+    # Account rows only: no totals, and not the retained earnings row clean_bs derives from net income
+    sections, accounts = bs_final.index.get_level_values(0), bs_final.index.get_level_values(-1)
+    is_account = (sections != '') & ~((sections == 'Equities') & (accounts == 'Net Income'))
+    rows = bs_final[is_account].reindex(columns=months)
+    balances = rows.ffill(axis=1).fillna(0.0).to_numpy()
+    start = np.zeros(len(rows)) if opening is None else opening.reindex(rows.index).fillna(0.0).to_numpy(dtype='float64')
+    changes = np.diff(np.hstack([start[:, np.newaxis], balances]), axis=1)
+
+    row_sections, row_accounts = rows.index.get_level_values(0), rows.index.get_level_values(-1)
+    activities = np.array([classify_account(section, account) for section, account in zip(row_sections, row_accounts)])
+    # Signed monthly partials, debit positive; each line is the cash that moved the other way
+    debits = np.where((row_sections == 'Assets')[:, np.newaxis], changes, -changes)
+    flows = -debits
+
+    # Income accounts' GAAP amounts (clean_ic shows expenses negated), debit positive as they are typed Asset
+    ic_sections = ic_final.index.get_level_values(0)
+    income = ic_final[ic_sections.isin(['Revenues', 'Expenses'])].reindex(columns=months).fillna(0.0)
+    income_debits = np.where((income.index.get_level_values(0) == 'Revenues')[:, np.newaxis], income, -income)
+    net_income = -income_debits.sum(axis=0)
+    values, index = [], []
+    net_change = np.zeros(len(months))
+    for activity, key, total_name in CASH_FLOW_SECTIONS:
+        selected = activities == activity
+        lines = flows[selected]
+        names = list(row_accounts[selected])
+        if activity == 'operating':
+            lines = np.vstack([net_income, lines])
+            names = ['Net Income'] + names
+        total = lines.sum(axis=0)
+        net_change += total
+        values += [lines, total[np.newaxis]]
+        index += [(key, name) for name in names] + [('', total_name)]
+
+    is_cash = activities == 'cash'
+    cash_end = balances[is_cash].sum(axis=0)
+    cash_start = np.concatenate([[start[is_cash].sum()], cash_end[:-1]])
+    gap = net_change - (cash_end - cash_start)
+    worst = int(np.argmax(np.abs(gap))) if len(gap) else 0
+    if len(gap) and abs(gap[worst]) > CENT * (len(rows) + len(income)):
+        raise ValueError(f"Statement of cash flows does not reconcile in {months[worst]}: net change in cash "
+                         f"{net_change[worst]:,.2f}, but cash moved {cash_end[worst] - cash_start[worst]:,.2f}. "
+                         "Check that the ledger balances (Validate.py) and income accounts are typed Asset.")
+    values += [net_change[np.newaxis], cash_start[np.newaxis], cash_end[np.newaxis]]
+    index += [('', 'Net Change in Cash'), ('', 'Cash at Beginning of Period'), ('', 'Cash at End of Period')]
+
+    values = np.vstack(values)
+    cf_final = pd.DataFrame(values, index=pd.MultiIndex.from_tuples(index, names=[None, 'Account']), columns=months)
+    # Flows add up over the periods; the cash balances are taken at the ends of the whole span
+    cf_final[total_label] = np.concatenate([values[:-2].sum(axis=1), [cash_start[:1].sum(), cash_end[-1:].sum()]])
+    return cf_final.round(2)
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+from DataScrub import CASH_PATTERN, account_mask
+from ForecastCalendar import running_balance
+
+# Ledger-driven cash forecast.
+# The opening balance comes from the cash accounts on clean_df's balance sheet, and
+# recurring schedules (rent, payroll, ...) are expanded into daily cash events with
+# whole-array date arithmetic, one pass per frequency rather than one loop per schedule.
+#
+# Schedules are a DataFrame (or CSV) with columns:
+#   Name, Amount (positive = cash in, negative = cash out), Frequency, Start, End (optional)
+# Month-based schedules fall on the start date's day of the month, or the month's last day when
+# it is shorter. Semimonthly schedules add a second date 15 days after each of those, which rolls
+# into the next month for late start days (Jan 31 -> Jan 31, Feb 15, Feb 28, Mar 15, ...).
+
+SCHEDULE_COLUMNS = ['Name', 'Amount', 'Frequency', 'Start']
+DAY_STEPS = {'daily': 1, 'weekly': 7, 'biweekly': 14}
+MONTH_STEPS = {'monthly': 1, 'quarterly': 3, 'semiannually': 6, 'annually': 12}
+FREQUENCIES = list(DAY_STEPS) + ['semimonthly'] + list(MONTH_STEPS)
+
+def load_schedules(file_path) -> pd.DataFrame:
+    """
+    Reads recurring schedules from a CSV with Name, Amount, Frequency, Start and optional End columns.
+    """
+    return normalize_schedules(pd.read_csv(file_path))
+
+def normalize_schedules(schedules: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validates schedule columns and parses dates and frequencies.
+    """
+    missing = [col for col in SCHEDULE_COLUMNS if col not in schedules.columns]
+    if missing:
+        raise ValueError(f"Schedules must contain the following columns: {SCHEDULE_COLUMNS}")
+    schedules = schedules.copy()
+    schedules['Frequency'] = schedules['Frequency'].str.strip().str.lower()
+    unknown = sorted(set(schedules['Frequency']) - set(FREQUENCIES))
+    if unknown:
+        raise ValueError(f"Unknown schedule frequencies {unknown}, expected any of {FREQUENCIES}")
+    schedules['Start'] = pd.to_datetime(schedules['Start']).dt.normalize()
+    schedules['End'] = pd.to_datetime(schedules['End']).dt.normalize() if 'End' in schedules.columns else pd.NaT
+    schedules['Amount'] = schedules['Amount'].astype('float64')
+    return schedules
+
+def _group_offsets(counts: np.ndarray) -> np.ndarray:
+    """
+    For counts [2, 3] returns [0, 1, 0, 1, 2]: the position of each occurrence within its schedule.
+    """
+    total = counts.sum()
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(total) - starts
+
+def _expand_day_steps(schedules, steps, end) -> tuple:
+    start = schedules['Start'].to_numpy(dtype='datetime64[D]')
+    stop = np.minimum(schedules['End'].fillna(end).to_numpy(dtype='datetime64[D]'), np.datetime64(end, 'D'))
+    counts = np.maximum((stop - start).astype('int64') // steps + 1, 0)
+    dates = np.repeat(start, counts) + _group_offsets(counts) * np.repeat(steps, counts)
+    return dates, np.repeat(schedules.index.to_numpy(), counts)
+
+def _expand_month_steps(schedules, steps, end, day_shift=0) -> tuple:
+    start = schedules['Start'].to_numpy(dtype='datetime64[D]')
+    stop = np.minimum(schedules['End'].fillna(end).to_numpy(dtype='datetime64[D]'), np.datetime64(end, 'D'))
+    first_month = start.astype('datetime64[M]')
+    counts = np.maximum((stop.astype('datetime64[M]') - first_month).astype('int64') // steps + 1, 0)
+    months = np.repeat(first_month, counts) + _group_offsets(counts) * np.repeat(steps, counts)
+    # Same day of month as the start date, clamped to the month's last day, then day_shift days later
+    day = np.repeat((start - first_month.astype('datetime64[D]')).astype('int64'), counts)
+    month_days = ((months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')).astype('int64')
+    dates = months.astype('datetime64[D]') + np.minimum(day, month_days - 1) + day_shift
+    index = np.repeat(schedules.index.to_numpy(), counts)
+    keep = dates <= np.repeat(stop, counts)
+    return dates[keep], index[keep]
+
+def expand_schedules(schedules: pd.DataFrame, start, end) -> pd.DataFrame:
+    """
+    Expands recurring schedules into dated cash events between start and end (inclusive).
+    Semimonthly schedules fall on the monthly date and 15 days after it (see module comment).
+    Args:
+        schedules: DataFrame of schedules (see module comment).
+        start, end: Forecast window.
+    Returns:
+        DataFrame with 'Date', 'Name' and 'Amount' columns, sorted by date.
+    """
+    schedules = normalize_schedules(schedules).reset_index(drop=True)
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    frequency = schedules['Frequency']
+    pieces = []
+
+    day_rows = schedules[frequency.isin(list(DAY_STEPS))]
+    if len(day_rows):
+        pieces.append(_expand_day_steps(day_rows, day_rows['Frequency'].map(DAY_STEPS).to_numpy(), end))
+    month_rows = schedules[frequency.isin(list(MONTH_STEPS))]
+    if len(month_rows):
+        pieces.append(_expand_month_steps(month_rows, month_rows['Frequency'].map(MONTH_STEPS).to_numpy(), end))
+    semi_rows = schedules[frequency == 'semimonthly']
+    if len(semi_rows):
+        steps = np.ones(len(semi_rows), dtype='int64')
+        pieces.append(_expand_month_steps(semi_rows, steps, end))
+        pieces.append(_expand_month_steps(semi_rows, steps, end, day_shift=15))
+
+    if not pieces:
+        return pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'), 'Name': pd.Series(dtype=object),
+                             'Amount': pd.Series(dtype='float64')})
+    dates = np.concatenate([dates for dates, _ in pieces])
+    index = np.concatenate([index for _, index in pieces])
+    events = pd.DataFrame({
+        'Date': dates.astype('datetime64[ns]'),
+        'Name': schedules['Name'].to_numpy()[index],
+        'Amount': schedules['Amount'].to_numpy()[index],
+    })
+    events = events[(events['Date'] >= start) & (events['Date'] <= end)]
+    return events.sort_values('Date', kind='stable').reset_index(drop=True)
+
+def opening_cash(bs_final: pd.DataFrame, as_of: str = None, pattern=CASH_PATTERN) -> tuple:
+    """
+    Cash balance from clean_df's balance sheet.
+    Args:
+        bs_final: Balance sheet DataFrame returned by clean_df.
+        as_of: Month column ('YYYY-MM') to read. Defaults to the last month.
+        pattern: Compiled regex for cash account names in the Assets section; defaults to the
+            accounts the statement of cash flows treats as cash.
+    Returns:
+        tuple: (cash balance, first day after the as_of month)
+    """
+    months = [col for col in bs_final.columns if isinstance(col, str) and len(col) == 7 and col[4] == '-']
+    if not months:
+        raise ValueError("Balance sheet has no month columns")
+    as_of = as_of or months[-1]
+    assets = bs_final.loc['Assets']
+    cash = assets[account_mask(assets.index, pattern)]
+    return float(cash[as_of].sum()), pd.Period(as_of, 'M').end_time.normalize() + pd.Timedelta(days=1)
+
+def cash_forecast(bs_final: pd.DataFrame, schedules: pd.DataFrame, years: float = 5, as_of: str = None) -> tuple:
+    """
+    Projected daily cash balance starting from the ledger's closing cash.
+    Args:
+        bs_final: Balance sheet DataFrame returned by clean_df.
+        schedules: Recurring schedules (see module comment).
+        years: Length of the forecast.
+        as_of: Month of the opening balance, see opening_cash.
+    Returns:
+        tuple: (daily cash events Series indexed by date, opening balance, forecast start date, end date)
+        which can be passed on to running_balance or ForecastCalendar.forecast_calendar.
+    """
+    opening, start = opening_cash(bs_final, as_of)
+    end = start + pd.DateOffset(days=round(365.25 * years)) - pd.Timedelta(days=1)
+    events = expand_schedules(schedules, start, end)
+    daily = events.groupby('Date')['Amount'].sum()
+    return daily, opening, start, end
+
+def projected_balance(bs_final: pd.DataFrame, schedules: pd.DataFrame, years: float = 5, as_of: str = None) -> pd.Series:
+    """
+    Daily projected cash balance, one value per day of the forecast.
+    """
+    daily, opening, start, end = cash_forecast(bs_final, schedules, years, as_of)
+    return running_balance(daily, start, end, opening)
@@ -0,0 +1,96 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from DataScrub import read_partials, merge_partials, build_statements
+
+# Consolidated statements across many ledgers, map-reduce style.
+# Map: each worker reduces one shard (a byte range of a ledger CSV) to monthly partials
+# per (Account, Type, year_month). Reduce: the partials are merged and fed to the same
+# build_statements that clean_df uses, so the result matches clean_df on the concatenated
+# ledgers. Intercompany eliminations are not applied.
+
+MIN_SHARD_BYTES = 32 * 2**20  # files smaller than this are read by a single worker
+
+def shard_ranges(file_path, shards: int) -> list:
+    """
+    Splits a CSV file into up to 'shards' byte ranges that start and end on line boundaries.
+    Assumes no quoted field spans multiple lines.
+    Returns:
+        list of (start, end) byte offsets; the first range includes the header line.
+    """
+    size = os.path.getsize(file_path)
+    shards = max(1, min(shards, size // MIN_SHARD_BYTES))
+    bounds = [0]
+    with open(file_path, 'rb') as f:
+        for i in range(1, shards):
+            f.seek(max(size * i // shards, bounds[-1]))
+            f.readline()  # move to the start of the next full line
+            if f.tell() < size:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def shard_partials(file_path, start: int, end: int, columns: list, entity_column: str = None,
+                   chunksize: int = 250_000) -> pd.DataFrame | None:
+    """
+    Reduces bytes [start, end) of a ledger CSV to monthly partials. Runs inside a worker process.
+    Args:
+        file_path: Path to the ledger CSV file.
+        start, end: Byte range from shard_ranges.
+        columns: Header of the file, used for ranges after the first.
+        entity_column: Optional column kept as a key (see monthly_partials' 'by').
+    """
+    by = [entity_column] if entity_column else None
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        buffer = io.BytesIO(f.read(end - start))
+    if start == 0:
+        return read_partials(buffer, chunksize, by)
+    return read_partials(buffer, chunksize, by, header=None, names=columns)
+
+def consolidated_partials(sources, entity_column: str = None, workers: int = None) -> pd.DataFrame:
+    """
+    Reduces every ledger to monthly partials in parallel and merges them.
+    Args:
+        sources: List of ledger CSV paths.
+        entity_column: Optional column in the ledgers identifying the entity; it is kept
+            as a leading key so per-entity statements can be built from the same partials.
+        workers: Number of worker processes. Defaults to the number of CPUs.
+    Returns:
+        DataFrame of merged partials with (entity_column,) 'Account', 'Type', 'year_month', 'gaap_amount'.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = []
+    for path in sources:
+        columns = list(pd.read_csv(path, nrows=0).columns)
+        if entity_column and entity_column not in columns:
+            raise ValueError(f"Ledger {path} has no '{entity_column}' column")
+        tasks += [(path, start, end, columns) for start, end in shard_ranges(path, workers)]
+
+    with ProcessPoolExecutor(max_workers=min(workers, max(len(tasks), 1))) as pool:
+        futures = [pool.submit(shard_partials, *task, entity_column) for task in tasks]
+        partials = [future.result() for future in futures]
+
+    partials = [p for p in partials if p is not None]
+    if not partials:
+        raise ValueError("No ledger rows found")
+    return merge_partials(pd.concat(partials, ignore_index=True), [entity_column] if entity_column else None)
+
+def consolidate(sources, entity_column: str = None, workers: int = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Consolidated income statement and balance sheet across ledgers.
+    Same result as clean_df on the concatenated ledgers.
+    Returns:
+        tuple: (DataFrame for income statement, DataFrame for balance sheet)
+    """
+    return build_statements(merge_partials(consolidated_partials(sources, entity_column, workers)))
+
+def entity_statements(partials: pd.DataFrame, entity_column: str) -> dict:
+    """
+    Per-entity statements from partials returned by consolidated_partials(..., entity_column).
+    Returns:
+        dict of entity -> (income statement, balance sheet)
+    """
+    return {entity: build_statements(group.drop(columns=entity_column))
+            for entity, group in partials.groupby(entity_column)}
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 import re
+from Profiling import stage
 
 # TO DO:
 # ensure columns are adjusted for caps. ie: doesn't matter if date or Date
@@ -11,6 +13,7 @@ def adj_credits_debit(row):
     Debits increase assets, decrease liabilities and equities.
     Effect is required to be either 'CREDIT' or 'DEBIT'.
     intended to be used with pandas DataFrame's apply method.
+    Kept as the row-wise reference for gaap_adjust, which clean_df uses.
 
     Args:
         row: A pandas Series representing a row in the DataFrame with columns 'Type', 'Effect', and 'Amount'.
@@ -26,6 +29,62 @@ def adj_credits_debit(row):
         else:
             return row['Amount']
 
+def _label_codes(labels: pd.Series, case) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Integer codes for a label column plus its distinct values, stripped and cased.
+    Only the distinct values are normalized; labels equal after normalization share a code.
+    Missing and non-string values get code -1.
+    """
+    codes, uniques = pd.factorize(labels)
+    normalized = [case(val.strip()) if isinstance(val, str) else None for val in uniques]
+    categories = list(dict.fromkeys(val for val in normalized if val is not None))
+    lookup = {label: code for code, label in enumerate(categories)}
+    remap = np.array([lookup.get(val, -1) for val in normalized] + [-1], dtype=codes.dtype)
+    return remap[codes], np.array(categories, dtype=object)
+
+def gaap_adjust(df: pd.DataFrame) -> pd.Series:
+    """
+    Vectorized GAAP adjustment for credits and debits.
+    Column-wide equivalent of adj_credits_debit, applied to the whole DataFrame at once
+    instead of one Python call per row. 'Type' and 'Effect' are normalized in place
+    (whitespace stripped, 'Type' title-cased, 'Effect' upper-cased) so the comparison
+    is case-insensitive. Comparisons are made once per distinct label, then looked up by code.
+    Both columns are stored as categoricals, so later stages (aggregation, validation)
+    reuse the codes instead of hashing the strings again.
+
+    Args:
+        df: DataFrame with 'Type', 'Effect', and 'Amount' columns.
+
+    Returns:
+        Series of GAAP adjusted amounts aligned with df's index.
+    """
+    type_codes, types = _label_codes(df['Type'], str.title)
+    effect_codes, effects = _label_codes(df['Effect'], str.upper)
+    df['Type'] = pd.Categorical.from_codes(type_codes, types)
+    df['Effect'] = pd.Categorical.from_codes(effect_codes, effects)
+
+    amount = df['Amount'].to_numpy(dtype='float64')
+    is_asset = np.append(types == 'Asset', False)[type_codes]
+    is_credit = np.append(effects == 'CREDIT', False)[effect_codes]
+    is_debit = np.append(effects == 'DEBIT', False)[effect_codes]
+    # Assets are reduced by credits, everything else is reduced by debits.
+    reduces = np.where(is_asset, is_credit, is_debit)
+    return pd.Series(np.where(reduces, -np.abs(amount), amount), index=df.index, name='gaap_amount')
+
+INCOME_STATEMENT_PATTERN = re.compile(r'expense|revenue', flags=re.IGNORECASE)
+REVENUE_PATTERN = re.compile(r'revenue', flags=re.IGNORECASE)
+CASH_PATTERN = re.compile(r'\bcash\b|\bbank\b', flags=re.IGNORECASE)  # cash and cash equivalent asset accounts
+
+def account_mask(accounts, pattern) -> np.ndarray:
+    """
+    Boolean mask of account names matching a compiled regex.
+    The regex runs once per distinct account name rather than once per row.
+    Missing names never match.
+    """
+    codes, uniques = pd.factorize(np.asarray(accounts, dtype=object))
+    matches = np.array([isinstance(val, str) and pattern.search(val) is not None for val in uniques] + [False])
+    return matches[codes]
+
 def split_df(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]: # Intended to be reusable in clean_df function, needs further testing.
     """
     Splits a DataFrame into two based on categories containing 'expense' or 'revenue'.
@@ -38,208 +97,402 @@ def split_df(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]: # Intended
     Returns:
         tuple: (DataFrame with matching categories, DataFrame with non-matching categories)
     """
-    pattern = re.compile(r'expense|revenue', flags=re.IGNORECASE)
-    mask = df['Account'].str.contains(pattern, na=False) # Consider error handle for na values.
+    mask = account_mask(df['Account'], INCOME_STATEMENT_PATTERN) # na values never match
     matching_df = df[mask]
     non_matching_df = df[~mask]
     return matching_df, non_matching_df
 
 
-def clean_df(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+REQUIRED_COLUMNS = ['Date', 'Account', 'Type', 'Effect', 'Amount']
+
+def parse_dates(dates: pd.Series) -> pd.Series:
     """
-    Cleans the DataFrame in preparation for financial reporting.
-    Requires the DataFrame to have 'Date', 'Account', 'Type', 'Effect', and 'Amount' columns.
-    This function has two main sub-functions:
-        - clean_ic: Cleans and organizes the income statement DataFrame, pivots it, and calculates net income.
-        - clean_bs: Cleans and organizes the balance sheet DataFrame, pivots it, and calculates totals.
+    Same as pd.to_datetime(dates, errors='coerce'), but each distinct date string is parsed once.
+    Ledgers repeat the same few hundred dates across many rows, so this avoids re-parsing
+    (and dateutil format inference on strings like '10/4/24') for every row.
+    """
+    codes, uniques = pd.factorize(dates)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), errors='coerce').to_numpy(dtype='datetime64[ns]')
+    return pd.Series(np.append(parsed, np.datetime64('NaT', 'ns'))[codes], index=dates.index, name=dates.name)
+
+def report_progress(progress, stage: str, statement: pd.DataFrame = None):
+    """
+    Calls the optional progress callback used by clean_df and its stages.
+    The callback receives the stage name, plus the finished statement for the
+    'income statement' and 'balance sheet' stages. It may raise to cancel the run.
+    """
+    if progress is not None:
+        progress(stage, statement)
+
+def parse_ledger(df: pd.DataFrame, progress=None) -> pd.DataFrame:
+    """
+    Validates the ledger columns, converts 'Date' to datetime and adds the 'gaap_amount' column.
     Args:
         df: DataFrame with 'Date', 'Account', 'Type', 'Effect', and 'Amount' columns.
+        progress: Optional callback, see report_progress.
     Returns:
-        tuple: (DataFrame for income statement, DataFrame for balance sheet)
+        The same DataFrame, modified in place.
     """
 
     # Ensure required columns are present
-    required_columns = ['Date', 'Account', 'Type', 'Effect', 'Amount']
-    if not all(col in df.columns for col in required_columns):
-        raise ValueError(f"Ledger must contain the following columns: {required_columns}")  
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise ValueError(f"Ledger must contain the following columns: {REQUIRED_COLUMNS}")  
     
     # Convert 'Date' to datetime format and apply GAAP adjustments
+    report_progress(progress, 'parsing dates')
     if df['Date'].dtype != 'datetime64[ns]':
         try:
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')  # Convert to datetime, coerce errors to NaT
+            with stage('parse_dates', rows=len(df)):
+                df['Date'] = parse_dates(df['Date'])  # Convert to datetime, coerce errors to NaT
             # Need to ignore warnings
         except Exception as e:
             raise ValueError(f"Error converting 'Date' column to datetime: {e}")
  
     # Apply GAAP adjustments and establish new column.
-    df['gaap_amount'] = df.apply(adj_credits_debit, axis = 1)
-
-    # Resolve multiple day entries for the same account, add month index, and sort.
-    daily = df.groupby([df['Date'].dt.date, 'Type', 'Account'])[['gaap_amount']].sum().reset_index()
-    daily['year_month'] = daily['Date'].apply(lambda x: x.strftime('%Y-%m'))
-    daily = daily.sort_values(['Account', 'year_month', 'Date']) # sort is required prior to cumsum
-
-    # Split the DataFrame into income statement and balance sheet DataFrames
-    ic, bs = split_df(daily)
-    ic = ic.groupby(['Account', 'year_month'], as_index=False)['gaap_amount'].sum().round(2)
-    bs = bs.groupby(['Account', 'Type', 'year_month'])['gaap_amount'].sum().groupby(level=0).cumsum().reset_index()
-
-    def make_total_row(df, numeric_cols, label): # Need to incorporate into clean_ic revenue_totals, expense_totals
-        """
-        Create a total row DataFrame for the given section.
-        Args:
-            df: DataFrame (e.g., asset_items)
-            numeric_cols: list of columns to sum
-            label: string for the total row index (e.g., 'Total Assets')
-        Returns:
-            DataFrame with the total row, index set to label
-        """
-        total = df[numeric_cols].sum().to_frame().T
-        total['Account'] = label
-        total.set_index('Account', inplace=True)
-        return total
-    
-    def numeric_cols(df: pd.DataFrame) -> list:
-        return df.select_dtypes(include='number').columns
-    
-    # --- Income Statement Processing ---
-    def clean_ic(ic: pd.DataFrame) -> pd.DataFrame:
-        """
-        Cleans the income statement DataFrame, pivots it, and calculates net income.
-        Args:
-            ic: DataFrame with 'Account', 'year_month', and 'gaap_amount' columns.
-        Returns:
-            DataFrame with cleaned income statement, split into revenues and expenses,
-            with totals and net income calculated.
-        """
-
-        # Add a category column to distinguish revenues and expenses
-        ic['Category'] = ic['Account'].str.contains(r'revenue', case=False, na=False).map({True: 'Revenue', False: 'Expense'})
-        
-        # Pivot the income statement: Accounts on rows, months as columns
-        ic_pivot = ic.pivot_table(
-            index=['Category', 'Account'], 
-            columns='year_month', 
-            values='gaap_amount', 
-            aggfunc='sum', 
-            fill_value=0
-            ).reset_index()
-
-        def calc_net_income(ic_pivot):
-            """
-            Calculate net income from the income statement pivot table.
-            Net income is calculated as total revenues minus total expenses.
-            
-            Args:
-                ic_pivot: DataFrame with 'Category' and 'Account' as index, months as columns.
-                
-            Returns:
-                DataFrame with net income for each month.
-            """
-            month_cols = ic_pivot.select_dtypes(include='number').columns
-            revenues = ic_pivot[ic_pivot['Category'] == 'Revenue'][month_cols].sum()
-            expenses = ic_pivot[ic_pivot['Category'] == 'Expense'][month_cols].sum()
-            net_income = revenues + expenses
-            return pd.DataFrame([net_income])
-
-        def split_expenses_revenues(ic_pivot): # Could optimize split_df to take reason as an input for reusability
-            """
-            Splits the pivoted income statement into expenses and revenues DataFrames,
-            cleans up the Account names, and returns both.
-            """
-            ic_expenses = ic_pivot[ic_pivot['Category'] == 'Expense'].copy()
-            ic_revenues = ic_pivot[ic_pivot['Category'] == 'Revenue'].copy()
-            ic_expenses = ic_expenses.drop(columns=['Category'])
-            ic_revenues = ic_revenues.drop(columns=['Category'])
-            ic_expenses['Account'] = ic_expenses['Account'].str.replace(r'Expense\s*', '', regex=True)
-            ic_revenues['Account'] = ic_revenues['Account'].str.replace(r'Revenue\s*', '', regex=True)
-            ic_expenses.set_index('Account', inplace=True)
-            ic_revenues.set_index('Account', inplace=True)
-            return ic_expenses, ic_revenues
-        
-        # Split out revenues and expenses
-        ic_expenses, ic_revenues = split_expenses_revenues(ic_pivot)
-
-        # Calculate totals for each
-        revenue_totals = make_total_row(ic_revenues, numeric_cols(ic_revenues), 'Total Revenues')
-        expense_totals = make_total_row(ic_expenses, numeric_cols(ic_expenses), 'Total Expenses')
-
-        # Calculate net income
-        net_income_pivot = calc_net_income(ic_pivot)
-        net_income_pivot['Account'] = 'Net Income'
-        net_income_pivot.set_index('Account', inplace=True)
-
-        # Concatenate in order: revenues, revenue total, expenses, expense total, net income
-        ic_final = pd.concat(
-            [ic_revenues, revenue_totals, -ic_expenses, -expense_totals, net_income_pivot], 
-            keys = ['Revenues', '', 'Expenses', '', 'Net Income']
-            )
-
-        # Add year total column
-        month_cols = [col for col in ic_final.columns if re.match(r'\d{4}-\d{2}', str(col))]
-        ic_final['Year Total'] = ic_final[month_cols].sum(axis=1)
-        ic_final = ic_final.round(2)
-
-        return ic_final, net_income_pivot
-    
-    ic_final, net_income = clean_ic(ic)
-
-    # --- Balance Sheet Processing ---
-    def clean_bs(bs: pd.DataFrame, net_income:pd.DataFrame) -> pd.DataFrame:
-        """
-        Cleans the balance sheet DataFrame, pivots it, and calculates totals.
-        Args:
-            bs: DataFrame with 'Account', 'Type', 'year_month', and 'gaap_amount' columns.
-        Returns:
-            DataFrame with cleaned balance sheet, split into assets, liabilities, and equities,
-            with totals calculated.
-        """
-        # Pivot the balance sheet: Accounts on rows, months as columns
-        bs_pivot = bs.pivot_table(
-            index=['Type', 'Account'], 
-            columns='year_month', 
-            values='gaap_amount', 
-            aggfunc='sum'
-            ).reset_index()
-
-        numeric_cols = bs_pivot.select_dtypes(include='number').columns
-
-        bs_pivot[numeric_cols] = bs_pivot[numeric_cols].fillna(method='ffill', axis=1)
-
-        # Seperate the balance sheet into assets, liabilities, and equities
-        asset_items = bs_pivot[bs_pivot['Type'] == 'Asset'].copy()
-        asset_items.drop(columns=['Type'], inplace=True)
-        asset_items.set_index('Account', inplace=True)
-
-        liability_items = bs_pivot[bs_pivot['Type'] == 'Liability'].copy()
-        liability_items.drop(columns=['Type'], inplace=True)
-        liability_items.set_index('Account', inplace=True)
-
-        equity_items = bs_pivot[bs_pivot['Type'] == 'Equity'].copy()
-        equity_items.drop(columns=['Type'], inplace=True)
-        equity_items.set_index('Account', inplace=True)
-        equity_items = pd.concat([net_income.cumsum(axis=1), equity_items])
-
-        # Calculate totals for each section
-        total_assets = make_total_row(asset_items, numeric_cols, 'Total Assets')
-        total_liabilities = make_total_row(liability_items, numeric_cols, 'Total Liabilities')
-        total_equities = make_total_row(equity_items, numeric_cols, 'Total Equity')
-
-        # Concatenate in order: assets, total assets, liabilities, total liabilities, equities, total equities
-        bs_final = pd.concat(
-            [asset_items, total_assets, liability_items, total_liabilities, equity_items, total_equities], 
-            keys=['Assets', '', 'Liabilities', '', 'Equities', '']
-            )
-        bs_final = bs_final.round(2)
-
-        return bs_final
-    
-    bs_final = clean_bs(bs, net_income)
+    report_progress(progress, 'GAAP adjustment')
+    with stage('gaap_adjust', rows=len(df)):
+        df['gaap_amount'] = gaap_adjust(df)
+        if not isinstance(df['Account'].dtype, pd.CategoricalDtype):
+            df['Account'] = pd.Categorical.from_codes(*pd.factorize(df['Account']))  # hashed once, codes reused downstream
+    return df
+
+BLANK_KEY = '(blank)'  # label for rows whose 'by' column (e.g. Entity) is empty
+
+def monthly_partials(df: pd.DataFrame, by: list = None) -> pd.DataFrame:
+    """
+    Reduces a parsed ledger to GAAP amounts summed per (Account, Type, year_month).
+    Partials from separate pieces of a ledger can be concatenated and passed to
+    merge_partials, which gives the same result as reducing the whole ledger at once.
+    Rows with a missing date, account or type are dropped; rows with an empty 'by' column are
+    kept under BLANK_KEY, so consolidated totals still match clean_df on the whole ledger.
+    This is the only step that touches every row: each key column is reduced to integer
+    codes, the month is taken from the datetime64 values directly, and the sums are
+    accumulated in a single bincount over the combined key.
+    Args:
+        df: DataFrame returned by parse_ledger.
+        by: Optional extra columns to keep as leading keys (e.g. ['Entity']).
+    Returns:
+        DataFrame with the 'by' columns, 'Account', 'Type', 'year_month', and 'gaap_amount' columns,
+        sorted by those keys.
+    """
+    key_cols = list(by or []) + ['Account', 'Type']
+    months = df['Date'].to_numpy(dtype='datetime64[M]')
+    valid = ~np.isnat(months)
+    codes, uniques = [], []
+    for col in key_cols:
+        col_codes, col_uniques = pd.factorize(df[col])
+        col_uniques = np.asarray(col_uniques)
+        if col in ('Account', 'Type'):
+            valid &= col_codes >= 0
+        elif (col_codes < 0).any():
+            col_codes = np.where(col_codes < 0, len(col_uniques), col_codes)
+            col_uniques = np.append(col_uniques.astype(object), BLANK_KEY)
+        codes.append(col_codes)
+        uniques.append(col_uniques)
+
+    month_ints = months.astype('int64')
+    first_month = month_ints[valid].min() if valid.any() else 0
+    codes.append(month_ints - first_month)
+    dims = [len(col_uniques) for col_uniques in uniques] + [int(month_ints[valid].max() - first_month + 1) if valid.any() else 1]
+    codes = [col_codes[valid] for col_codes in codes]
+    amounts = df['gaap_amount'].to_numpy(dtype='float64')[valid]
+    amounts = np.where(np.isnan(amounts), 0.0, amounts)  # groupby sum skips NaN
+
+    if np.prod(dims, dtype='float64') <= 2**26:
+        flat = np.ravel_multi_index(codes, dims)
+        size = int(np.prod(dims))
+        present = np.flatnonzero(np.bincount(flat, minlength=size))
+        sums = np.bincount(flat, weights=amounts, minlength=size)[present]
+        key_codes = np.unravel_index(present, dims)
+    else:  # too many combinations for a dense table; fall back to sorting the keys
+        keys, inverse = np.unique(np.stack(codes), axis=1, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=amounts, minlength=keys.shape[1])
+        key_codes = list(keys)
+
+    partials = pd.DataFrame({col: col_uniques[col_codes] for col, col_uniques, col_codes in zip(key_cols, uniques, key_codes)})
+    month_labels, month_codes = np.unique(key_codes[-1], return_inverse=True)
+    month_labels = np.datetime_as_string((month_labels + first_month).astype('datetime64[M]'), unit='M').astype(object)
+    partials['year_month'] = month_labels[month_codes.ravel()]
+    partials['gaap_amount'] = sums
+    return partials.sort_values(key_cols + ['year_month'], ignore_index=True)
+
+def merge_partials(partials: pd.DataFrame, by: list = None) -> pd.DataFrame:
+    """
+    Combines monthly partials that may repeat the same (Account, Type, year_month) key.
+    Columns not in 'by' or the key are summed away, e.g. merging entity partials with
+    by=None consolidates them.
+    """
+    return partials.groupby(list(by or []) + ['Account', 'Type', 'year_month'], as_index=False)['gaap_amount'].sum()
+
+def make_total_row(df, numeric_cols, label): # Need to incorporate into clean_ic revenue_totals, expense_totals
+    """
+    Create a total row DataFrame for the given section.
+    Args:
+        df: DataFrame (e.g., asset_items)
+        numeric_cols: list of columns to sum
+        label: string for the total row index (e.g., 'Total Assets')
+    Returns:
+        DataFrame with the total row, index set to label
+    """
+    total = df[numeric_cols].sum().to_frame().T
+    total['Account'] = label
+    total.set_index('Account', inplace=True)
+    return total
+
+def month_matrix(df: pd.DataFrame, keys: list, fill_value=np.nan) -> tuple:
+    """
+    Dense rows x months matrix of 'gaap_amount', summed per (keys, year_month).
+    Rows and months are sorted, as pivot_table would sort them.
+    Args:
+        df: DataFrame with the key columns, 'year_month' and 'gaap_amount'.
+        keys: Columns identifying a row.
+        fill_value: Value for (row, month) cells with no amounts.
+    Returns:
+        tuple: (2D numpy array, list of row key arrays, pd.Index of months named 'year_month')
+    """
+    key_codes, key_uniques = zip(*[pd.factorize(df[key], sort=True) for key in keys])
+    dims = [max(len(uniques), 1) for uniques in key_uniques]
+    valid = np.logical_and.reduce([codes >= 0 for codes in key_codes])
+    # Rows are the key combinations present, in sorted order
+    rows, inverse = np.unique(np.ravel_multi_index([codes[valid] for codes in key_codes], dims), return_inverse=True)
+    row_codes = np.full(len(df), -1)
+    row_codes[valid] = inverse.ravel()
+    row_keys = [np.asarray(uniques, dtype=object)[codes] for uniques, codes in zip(key_uniques, np.unravel_index(rows, dims))]
+    month_codes, months = pd.factorize(df['year_month'], sort=True)
+    keep = (row_codes >= 0) & (month_codes >= 0)
+    flat = row_codes[keep] * len(months) + month_codes[keep]
+    size = len(rows) * len(months)
+    sums = np.bincount(flat, weights=df['gaap_amount'].to_numpy(dtype='float64')[keep], minlength=size)
+    matrix = np.where(np.bincount(flat, minlength=size) > 0, sums, fill_value).reshape(len(rows), len(months))
+    return matrix, row_keys, pd.Index(months, dtype=object, name='year_month')
+
+def statement_section(values: np.ndarray, accounts, months: pd.Index) -> pd.DataFrame:
+    """
+    One section of a statement: accounts on rows, months as columns.
+    """
+    return pd.DataFrame(values, index=pd.Index(accounts, dtype=object, name='Account'), columns=months)
+
+# --- Income Statement Processing ---
+def clean_ic(ic: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Pivots the income statement into one accounts x months matrix and calculates net income.
+    Monthly amounts are rounded to cents. Accounts are classified as revenue or expense
+    once per distinct name, and every section and total is sliced from the same matrix.
+    Args:
+        ic: DataFrame with 'Account', 'year_month', and 'gaap_amount' columns.
+    Returns:
+        tuple: (DataFrame with cleaned income statement, split into revenues and expenses,
+        with totals and net income calculated, DataFrame with net income for each month)
+    """
+    matrix, (accounts,), months = month_matrix(ic, ['Account'], fill_value=0.0)
+    matrix = matrix.round(2)
+    is_revenue = account_mask(accounts, REVENUE_PATTERN)
+    revenues, expenses = matrix[is_revenue], matrix[~is_revenue]
+    revenue_total, expense_total = revenues.sum(axis=0), expenses.sum(axis=0)
+
+    # Display names drop the 'Revenue'/'Expense' prefix
+    revenue_names = pd.Series(accounts[is_revenue], dtype=object).str.replace(r'Revenue\s*', '', regex=True)
+    expense_names = pd.Series(accounts[~is_revenue], dtype=object).str.replace(r'Expense\s*', '', regex=True)
+
+    net_income_pivot = statement_section((revenue_total + expense_total)[np.newaxis], ['Net Income'], months)
+
+    # Stack in order: revenues, revenue total, expenses, expense total, net income
+    values = np.vstack([revenues, revenue_total, -expenses, -expense_total, net_income_pivot.to_numpy()])
+    sections = [('Revenues', name) for name in revenue_names] + [('', 'Total Revenues')]
+    sections += [('Expenses', name) for name in expense_names] + [('', 'Total Expenses'), ('Net Income', 'Net Income')]
+    ic_final = pd.DataFrame(values, index=pd.MultiIndex.from_tuples(sections, names=[None, 'Account']), columns=months)
+
+    # Add year total column
+    ic_final['Year Total'] = values.sum(axis=1)
+    ic_final = ic_final.round(2)
+
+    return ic_final, net_income_pivot
+
+# --- Balance Sheet Processing ---
+BALANCE_SHEET_SECTIONS = [('Asset', 'Assets', 'Total Assets'),
+                          ('Liability', 'Liabilities', 'Total Liabilities'),
+                          ('Equity', 'Equities', 'Total Equity')]
+
+def clean_bs(bs: pd.DataFrame, net_income:pd.DataFrame) -> pd.DataFrame:
+    """
+    Pivots the balance sheet into one (Type, Account) x months matrix and calculates totals.
+    Months without a balance carry the previous month's balance forward.
+    Args:
+        bs: DataFrame with 'Account', 'Type', 'year_month', and cumulative 'gaap_amount' columns.
+        net_income: DataFrame with net income for each month, as returned by clean_ic.
+    Returns:
+        DataFrame with cleaned balance sheet, split into assets, liabilities, and equities,
+        with totals calculated.
+    """
+    matrix, (types, accounts), months = month_matrix(bs, ['Type', 'Account'])
+    matrix = pd.DataFrame(matrix).ffill(axis=1).to_numpy()
+
+    # Months only seen in the income statement are appended after the balance sheet months
+    extra_months = [month for month in net_income.columns if month not in set(months)]
+    columns = months.append(pd.Index(extra_months, dtype=object)).rename('year_month')
+    retained = net_income.cumsum(axis=1).reindex(columns=columns).to_numpy()
+    matrix = np.hstack([matrix, np.full((len(matrix), len(extra_months)), np.nan)])
+
+    values, sections = [], []
+    for type_name, key, total_label in BALANCE_SHEET_SECTIONS:
+        rows = matrix[types == type_name]
+        names = list(accounts[types == type_name])
+        if type_name == 'Equity':  # retained earnings (cumulative net income) lead the equity section
+            rows = np.vstack([retained, rows])
+            names = ['Net Income'] + names
+        # Totals cover the balance sheet months only
+        total = np.concatenate([np.nansum(rows[:, :len(months)], axis=0), np.full(len(extra_months), np.nan)])
+        values += [rows, total[np.newaxis]]
+        sections += [(key, name) for name in names] + [('', total_label)]
+
+    bs_final = pd.DataFrame(np.vstack(values), index=pd.MultiIndex.from_tuples(sections, names=[None, 'Account']),
+                            columns=columns)
+    bs_final = bs_final.round(2)
+
+    return bs_final
+
+def cumulative_balances(bs: pd.DataFrame) -> pd.Series:
+    """
+    Running balance sheet balances per account from monthly balance sheet partials.
+    Args:
+        bs: DataFrame with 'Account', 'Type', 'year_month', and 'gaap_amount' columns.
+    Returns:
+        Series of cumulative gaap_amount indexed by ('Account', 'Type', 'year_month').
+    """
+    return bs.groupby(['Account', 'Type', 'year_month'])['gaap_amount'].sum().groupby(level=0).cumsum()
+
+def finish_statements(ic: pd.DataFrame, bs: pd.DataFrame, progress=None, opening_income: float = 0.0) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Runs clean_ic and clean_bs on already aggregated data.
+    Args:
+        ic: DataFrame with 'Account', 'year_month', and monthly 'gaap_amount' columns.
+        bs: DataFrame with 'Account', 'Type', 'year_month', and cumulative 'gaap_amount' columns.
+        progress: Optional callback, see report_progress. Each statement is passed as it finishes.
+        opening_income: Net income from before the first month, carried into retained earnings
+            when the statements start part way through a ledger.
+    Returns:
+        tuple: (DataFrame for income statement, DataFrame for balance sheet)
+    """
+    with stage('clean_ic', rows=len(ic)):
+        ic_final, net_income = clean_ic(ic)
+    report_progress(progress, 'income statement', ic_final)
+    if opening_income:
+        net_income = net_income.copy()
+        net_income.iloc[:, 0] += opening_income
+    with stage('clean_bs', rows=len(bs)):
+        bs_final = clean_bs(bs, net_income)
+    report_progress(progress, 'balance sheet', bs_final)
 
     #bs_final.reset_index(inplace=True) # problem not showing accounts on display_table in main.py
     #ic_final.reset_index(inplace=True) # problem
 
     return ic_final, bs_final
 
+def build_statements(partials: pd.DataFrame, progress=None, opening_income: float = 0.0) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Builds the income statement and balance sheet from monthly partials.
+    Args:
+        partials: DataFrame with 'Account', 'Type', 'year_month', and 'gaap_amount' columns,
+            as returned by monthly_partials or merge_partials.
+        progress: Optional callback, see report_progress.
+        opening_income: See finish_statements. Opening balance sheet balances are passed as
+            partials in the first month.
+    Returns:
+        tuple: (DataFrame for income statement, DataFrame for balance sheet)
+    """
+    report_progress(progress, 'pivoting')
+
+    # Split the partials into income statement and balance sheet DataFrames
+    with stage('split_partials', rows=len(partials)):
+        ic, bs = split_df(partials)
+        bs = cumulative_balances(bs).reset_index()
 
+    return finish_statements(ic, bs, progress, opening_income)
 
+def clean_df(df: pd.DataFrame, progress=None, on_exceptions=None, on_drilldown=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Cleans the DataFrame in preparation for financial reporting.
+    Requires the DataFrame to have 'Date', 'Account', 'Type', 'Effect', and 'Amount' columns.
+    The ledger is reduced to monthly partials, which feed two sub-functions:
+        - clean_ic: Cleans and organizes the income statement DataFrame, pivots it, and calculates net income.
+        - clean_bs: Cleans and organizes the balance sheet DataFrame, pivots it, and calculates totals.
+    Args:
+        df: DataFrame with 'Date', 'Account', 'Type', 'Effect', and 'Amount' columns,
+            or a Ledger (see Ledger.py), whose monthly sums are exact in integer cents.
+        progress: Optional callback called as each stage starts, see report_progress.
+        on_exceptions: Optional callback. When given, the parsed ledger is checked with
+            Validate.validate_ledger before aggregation and the callback receives the exceptions report.
+        on_drilldown: Optional callback. When given, it receives a DrillDown.DrillDownIndex from the
+            aggregated rows' statement cells back to the parsed ledger rows.
+    Returns:
+        tuple: (DataFrame for income statement, DataFrame for balance sheet)
+    """
+    with stage('clean_df', rows=len(df)):
+        return _clean_df(df, progress, on_exceptions, on_drilldown)
+
+def _clean_df(df, progress, on_exceptions, on_drilldown=None):
+    from Ledger import Ledger
+    if isinstance(df, Ledger):  # already parsed and GAAP adjusted per transaction
+        if on_exceptions is not None:
+            from Validate import validate_ledger
+            with stage('validate', rows=len(df)):
+                on_exceptions(validate_ledger(df.to_frame()))
+        report_progress(progress, 'aggregation')
+        with stage('monthly_partials', rows=len(df)):
+            partials = df.monthly_partials()
+        if on_drilldown is not None:
+            from DrillDown import DrillDownIndex
+            with stage('drilldown_index', rows=len(df)):
+                on_drilldown(DrillDownIndex.from_ledger(df))
+        return build_statements(partials, progress)
+    df = parse_ledger(df, progress)
+    if on_exceptions is not None:
+        from Validate import validate_ledger
+        with stage('validate', rows=len(df)):
+            on_exceptions(validate_ledger(df))
+    report_progress(progress, 'aggregation')
+    with stage('monthly_partials', rows=len(df)):
+        partials = monthly_partials(df)
+    if on_drilldown is not None:
+        from DrillDown import DrillDownIndex
+        with stage('drilldown_index', rows=len(df)):
+            on_drilldown(DrillDownIndex.from_frame(df))
+    return build_statements(partials, progress)
+
+def read_partials(file_path_or_buffer, chunksize: int = 250_000, by: list = None, **read_csv_kwargs) -> pd.DataFrame | None:
+    """
+    Reads a ledger CSV in chunks and folds each chunk into running monthly partials.
+    Only the required columns (and any 'by' columns) are read.
+    Args:
+        file_path_or_buffer: Path or open file passed to pd.read_csv.
+        chunksize: Number of rows read per chunk.
+        by: Optional extra key columns, see monthly_partials.
+        **read_csv_kwargs: Extra arguments for pd.read_csv (e.g. header/names when reading from an offset).
+    Returns:
+        DataFrame of merged monthly partials, or None if there were no rows.
+    """
+    columns = REQUIRED_COLUMNS + list(by or [])
+    running = None
+    chunks = pd.read_csv(file_path_or_buffer, chunksize=chunksize, usecols=lambda col: col in columns, **read_csv_kwargs)
+    for chunk in chunks:
+        with stage('chunk_partials', rows=len(chunk)):
+            partials = monthly_partials(parse_ledger(chunk), by)
+        running = partials if running is None else merge_partials(pd.concat([running, partials], ignore_index=True), by)
+    return running
+
+def clean_df_chunked(file_path, chunksize: int = 250_000) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Streaming version of clean_df for ledgers too large to load at once.
+    Reads the CSV in chunks and folds each chunk into running monthly partials, so peak
+    memory is bounded by the chunk size plus accounts x months rather than the ledger size.
+    Only the required columns are read.
+    Args:
+        file_path: Path to the ledger CSV file.
+        chunksize: Number of rows read per chunk.
+    Returns:
+        tuple: (DataFrame for income statement, DataFrame for balance sheet), same as clean_df.
+    """
+    running = read_partials(file_path, chunksize)
+    if running is None:
+        raise ValueError(f"Ledger must contain the following columns: {REQUIRED_COLUMNS}")
+    return build_statements(running)
@@ -1,22 +1,14 @@
+import queue
+import sys
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
-from reportlab.pdfbase.pdfmetrics import stringWidth
-from reportlab.lib.fonts import tt2ps
-from csvLoaderGUI import csv_loader
-from DataScrub import clean_df
-
-# todo:
-# export_to_pdf function has left and right margins running off the page, need to adjust
-# export_to_pdf add a header to the pdf with the title of the table
-# export_to_pdf function should handle empty DataFrames gracefully displaying empty instead of 0. 
+from OutputPDF import write_pdf, display_column
+
 def export_to_pdf(df, title):
     """
     Export a DataFrame to a PDF file with a table.
+    Asks for the save location, then writes the file with OutputPDF.write_pdf.
     
     Args:
         df (pandas.DataFrame): DataFrame to export.
@@ -32,101 +24,187 @@ def export_to_pdf(df, title):
         return
 
     try:
-        # Use landscape orientation
-        from reportlab.lib.pagesizes import landscape
-        page_size = landscape(letter)  # 792 x 612 points
-        doc = SimpleDocTemplate(
-            file_path,
-            pagesize=page_size,
-            leftMargin=0.25 * inch,
-            rightMargin=0.25 * inch,
-            topMargin=0.25 * inch,
-            bottomMargin=0.25 * inch
-        )
-        elements = []
-
-        # Add title as a header
-        styles = getSampleStyleSheet()
-        title_style = styles['Heading1']
-        title_style.alignment = 1  # Center alignment
-        title_paragraph = Paragraph(title, title_style)
-        elements.append(title_paragraph)
-        elements.append(Paragraph("<br/>", styles['Normal']))  # Add spacing after title
-
-        # Handle empty DataFrame
-        if df.empty:
-            elements.append(Paragraph("No data available.", styles['Normal']))
-        else:
-            # Prepare data for table, replacing zeros with empty strings
-            data = [df.columns.tolist()]  # Headers
-            for _, row in df.iterrows():
-                display_row = ['' if isinstance(val, (int, float)) and val == 0 else val for val in row.tolist()]
-                data.append(display_row)
-
-            # Calculate dynamic column widths based on content
-            num_cols = len(df.columns)
-            page_width = page_size[0] - (doc.leftMargin + doc.rightMargin)  # Available width
-            col_widths = []
-
-            # Font settings for width calculation
-            header_font = 'Helvetica-Bold'
-            cell_font = 'Helvetica'
-            header_font_size = 12
-            cell_font_size = 10
-
-            # Calculate maximum width for each column
-            for col_idx in range(num_cols):
-                # Get all values in this column, including header
-                col_values = [str(row[col_idx]) for row in data]
-                # Calculate width for header (bold font)
-                header_width = stringWidth(
-                    col_values[0],
-                    tt2ps(header_font, 0, 0),
-                    header_font_size
-                )
-                # Calculate width for data cells
-                cell_widths = [
-                    stringWidth(str(val), tt2ps(cell_font, 0, 0), cell_font_size)
-                    for val in col_values[1:]
-                ]
-                # Use the maximum width (header or widest cell) plus padding
-                max_width = max([header_width] + cell_widths) + 10  # Add padding (10 points)
-                col_widths.append(max_width)
-
-            # Scale widths to fit page if total exceeds page width
-            total_width = sum(col_widths)
-            if total_width > page_width:
-                scale_factor = page_width / total_width
-                col_widths = [w * scale_factor for w in col_widths]
-
-            # Create table with dynamic column widths
-            table = Table(data, colWidths=col_widths)
-
-            # Apply table style
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('BOX', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-
-            elements.append(table)
-
-        # Build PDF
-        doc.build(elements)
+        write_pdf(df, title, file_path)
         messagebox.showinfo("Success", f"PDF saved successfully to {file_path}")
     except Exception as e:
         messagebox.showerror("Error", f"Failed to export PDF:\n{str(e)}")
 
+class VirtualTable(ttk.Frame):
+    """
+    A ttk.Treeview that only holds items for the rows currently on screen.
+    Scrolling rewrites a fixed pool of items from the DataFrame, so the table opens
+    in the same time whatever the report size. Zero-blanking and row striping are
+    applied as the rows are written.
+
+    Args:
+        parent: Parent widget.
+        df (pandas.DataFrame): DataFrame to display.
+        on_double_click: Optional callback, called with the row position in df and the
+            column label of a double-clicked cell.
+    """
+    ROW_HEIGHT = 25  # must match the Treeview rowheight style
+
+    def __init__(self, parent, df, on_double_click=None):
+        super().__init__(parent)
+        self.labels = list(df.columns)
+        self.columns = [df[col].to_numpy() for col in df.columns]
+        self.row_count = len(df)
+        self.offset = 0
+        self.pool = []
+
+        # Create Treeview
+        self.tree = ttk.Treeview(self, show="headings", columns=[str(col) for col in df.columns])
+
+        # Add scrollbars; the vertical one drives our own row offset instead of the Treeview
+        self.yscroll = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        xscroll = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=xscroll.set)
+        self.yscroll.pack(side="right", fill="y")
+        xscroll.pack(side="bottom", fill="x")
+        self.tree.pack(fill="both", expand=True)
+
+        # Define columns
+        for col in df.columns:
+            self.tree.heading(str(col), text=col, anchor="w")
+            self.tree.column(str(col), width=150, anchor="center")
+
+        # Add alternating row colors for readability
+        self.tree.tag_configure("evenrow", background="#f5f9fa")
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+        self.tree.bind("<Prior>", lambda e: self.yview("scroll", -1, "pages"))
+        self.tree.bind("<Next>", lambda e: self.yview("scroll", 1, "pages"))
+        if on_double_click is not None:
+            self.tree.bind("<Double-1>", lambda e: self._on_double_click(e, on_double_click))
+        self._refresh()
+
+    def _on_double_click(self, event, callback):
+        item, column = self.tree.identify_row(event.y), self.tree.identify_column(event.x)
+        if item in self.pool and column:
+            callback(self.offset + self.pool.index(item), self.labels[int(column[1:]) - 1])
+
+    def _on_resize(self, event):
+        # One row of the widget's height is taken by the headings.
+        visible = max(1, event.height // self.ROW_HEIGHT - 1)
+        wanted = min(visible, self.row_count)
+        while len(self.pool) < wanted:
+            self.pool.append(self.tree.insert("", "end"))
+        if len(self.pool) > wanted:
+            self.tree.delete(*self.pool[wanted:])
+            del self.pool[wanted:]
+        self._refresh()
+
+    def yview(self, *args):
+        """
+        Scrollbar and mouse wheel callback, same arguments as Treeview.yview.
+        """
+        page = max(len(self.pool), 1)
+        if args[0] == "moveto":
+            offset = int(float(args[1]) * self.row_count)
+        elif args[0] == "scroll":
+            step = int(args[1]) * (page if args[2] == "pages" else 1)
+            offset = self.offset + step
+        else:
+            return
+        offset = max(0, min(offset, self.row_count - page))
+        if offset != self.offset:
+            self.offset = offset
+            self.tree.selection_remove(self.tree.selection())
+            self._refresh()
+
+    def _refresh(self):
+        """
+        Writes the rows starting at the current offset into the item pool.
+        """
+        start, end = self.offset, self.offset + len(self.pool)
+        rows = zip(*(display_column(values[start:end]) for values in self.columns))
+        for row_num, (item, values) in enumerate(zip(self.pool, rows), start=start):
+            self.tree.item(item, values=values, tags=("evenrow",) if row_num % 2 == 0 else ())
+        if self.row_count:
+            self.yscroll.set(start / self.row_count, min(end / self.row_count, 1.0))
+        else:
+            self.yscroll.set(0, 1)
+
+def configure_styles():
+    """
+    Style configuration for the Treeview tables and buttons. Needs an existing Tk root.
+    """
+    style = ttk.Style()
+    style.configure("Treeview",
+                    font=("Arial", 10),
+                    rowheight=VirtualTable.ROW_HEIGHT,
+                    background="white",
+                    foreground="black")
+    style.configure("Treeview.Heading",
+                    font=("Arial", 11, "bold"),
+                    background="#4a90e2",
+                    foreground="white")
+    style.map("Treeview",
+              background=[("selected", "#e0e0e0")],
+              foreground=[("selected", "black")])
+
+    # Configure button style
+    style.configure("TButton",
+                    font=("Arial", 10, "bold"),
+                    padding=5)
+
+def show_transactions(parent, index, statement, row, column, through=False):
+    """
+    Opens a window with the ledger rows behind one statement cell.
+
+    Args:
+        parent: Parent widget.
+        index (DrillDown.DrillDownIndex): Index of the ledger the statement was built from.
+        statement (pandas.DataFrame): Income statement or balance sheet shown in the table.
+        row (int): Row position of the cell in statement.
+        column: Column label of the cell; a month, or a total column for every month.
+        through (bool): True for balances, which include every earlier month.
+    """
+    section, name = statement.index[row]
+    accounts, type_name = index.cell_accounts(section, name)
+    if not accounts:
+        messagebox.showinfo("Transactions", f"'{name}' is a total; open one of its accounts instead.")
+        return
+    month = column if column in set(index.months) else None
+    rows = index.transactions(accounts, month, through and month is not None, type_name)
+    rows['Date'] = rows['Date'].dt.strftime('%Y-%m-%d')
+
+    window = tk.Toplevel(parent)
+    window.title(f"{name}, {column}: {len(rows):,} transactions")
+    window.geometry("900x400")
+    table = VirtualTable(window, rows)
+    table.pack(fill="both", expand=True, padx=5, pady=5)
+
+def add_table_tab(notebook, df, name, on_double_click=None):
+    """
+    Adds a tab with an export to PDF button and the DataFrame as a table.
+    on_double_click is passed on to VirtualTable.
+    """
+    # Create a frame for each tab
+    tab = ttk.Frame(notebook)
+    notebook.add(tab, text=name)
+
+    # Create button frame for export button
+    button_frame = ttk.Frame(tab)
+    button_frame.pack(fill="x", padx=5, pady=5)
+
+    # Add export to PDF button
+    export_button = ttk.Button(
+        button_frame,
+        text="Export to PDF",
+        command=lambda d=df, n=name: export_to_pdf(d, n),
+        style="TButton"
+    )
+    export_button.pack(side="left")
+
+    # Create the table; only the rows on screen are materialized
+    table = VirtualTable(tab, df, on_double_click)
+    table.pack(fill="both", expand=True, padx=5, pady=5)
+    return tab
+
 def display_tables(dataframes, table_names):
     """
     Display multiple DataFrames as tables in a Tkinter GUI using ttk.Treeview.
@@ -145,78 +223,181 @@ def display_tables(dataframes, table_names):
     # Create notebook for tabs
     notebook = ttk.Notebook(root)
     notebook.pack(fill="both", expand=True, padx=10, pady=10)
-
-    # Style configuration for Treeview
-    style = ttk.Style()
-    style.configure("Treeview",
-                    font=("Arial", 10),
-                    rowheight=25,
-                    background="white",
-                    foreground="black")
-    style.configure("Treeview.Heading",
-                    font=("Arial", 11, "bold"),
-                    background="#4a90e2",
-                    foreground="white")
-    style.map("Treeview",
-              background=[("selected", "#e0e0e0")],
-              foreground=[("selected", "black")])
+    configure_styles()
 
     # Add each DataFrame as a table in a separate tab
     for df, name in zip(dataframes, table_names):
-        # Create a frame for each tab
-        tab = ttk.Frame(notebook)
-        notebook.add(tab, text=name)
-
-        # Create button frame for export button
-        button_frame = ttk.Frame(tab)
-        button_frame.pack(fill="x", padx=5, pady=5)
-
-        # Add export to PDF button
-        export_button = ttk.Button(
-            button_frame,
-            text="Export to PDF",
-            command=lambda d=df, n=name: export_to_pdf(d, n),
-            style="TButton"
-        )
-        export_button.pack(side="left")
+        add_table_tab(notebook, df, name)
 
-        # Create Treeview
-        tree = ttk.Treeview(tab, show="headings")
-        tree.pack(fill="both", expand=True, padx=5, pady=5)
-
-        # Add scrollbars
-        yscroll = ttk.Scrollbar(tab, orient="vertical", command=tree.yview)
-        xscroll = ttk.Scrollbar(tab, orient="horizontal", command=tree.xview)
-        tree.configure(yscrollcommand=yscroll.set, xscrollcommand=xscroll.set)
-        yscroll.pack(side="right", fill="y")
-        xscroll.pack(side="bottom", fill="x")
+    root.mainloop()
 
-        # Define columns
-        columns = df.columns.tolist()
-        tree["columns"] = columns
-        for col in columns:
-            tree.heading(col, text=col, anchor="w")
-            tree.column(col, width=150, anchor="center")
+# --- Background report computation ---
+STAGES = ['reading', 'parsing dates', 'GAAP adjustment', 'aggregation', 'pivoting', 'income statement', 'balance sheet',
+          'cash flow']
+STATEMENT_STAGES = {'income statement': "Income Statement", 'balance sheet': "Balance Sheet",
+                    'cash flow': "Statement of Cash Flows"}
 
-        # Insert data
-        for _, row in df.iterrows():
-            display_values = ['' if isinstance(val, (int, float)) and val == 0 else val for val in row.tolist()]
-            tree.insert("", "end", values=display_values)
+class ReportCancelled(Exception):
+    """
+    Raised from the progress callback to stop a report run at the next stage boundary.
+    """
 
-        # Add alternating row colors for readability
-        tree.tag_configure("evenrow", background="#f5f9fa")
-        for i, item in enumerate(tree.get_children()):
-            if i % 2 == 0:
-                tree.item(item, tags=("evenrow",))
+def run_report(file_path, mode, events, cancel):
+    """
+    Loads, scrubs and pivots a ledger. Runs on a worker thread.
+    Progress is pushed onto the events queue as ('stage', name, statement or None),
+    followed by ('done',), ('cancelled',) or ('error', message).
 
-    # Configure button style
-    style.configure("TButton",
-                    font=("Arial", 10, "bold"),
-                    padding=5)
+    Args:
+        file_path (str): Path to the ledger CSV file.
+        mode (str): Load mode, see accountpy.load_statements.
+        events (queue.Queue): Queue read by the Tk main loop.
+        cancel (threading.Event): Set to cancel the run.
+    """
+    from accountpy import load_statements, with_cash_flow
+
+    sent = set()
+    def progress(stage, statement=None):
+        if cancel.is_set():
+            raise ReportCancelled()
+        sent.add(stage)
+        events.put(('stage', stage, statement))
+
+    try:
+        progress('reading')
+        ic, bs = load_statements(file_path, mode, progress=progress)
+        # Modes that do not report per stage still deliver both statements.
+        for stage, statement in (('income statement', ic), ('balance sheet', bs)):
+            if stage not in sent:
+                progress(stage, statement)
+        progress('cash flow', with_cash_flow((ic, bs))[2])
+        events.put(('done',))
+    except ReportCancelled:
+        events.put(('cancelled',))
+    except Exception as e:
+        events.put(('error', str(e)))
+
+def report_window(mode='cached'):
+    """
+    Main application window. The ledger is processed on a worker thread while the
+    window shows the current stage; each statement's tab appears as soon as it is ready.
+    Double-clicking an income statement or balance sheet cell lists its ledger rows
+    ('cached' and 'plain' modes). The drill-down index is built on the first double-click,
+    so statements still come from ReportCache.
+
+    Args:
+        mode (str): Load mode, see accountpy.load_statements.
+    """
+    root = tk.Tk()
+    root.title("Data Tables")
+    root.geometry("800x600")
+    root.configure(bg="#f0f0f0")
+    configure_styles()
+
+    # Status bar with open/cancel buttons and a staged progress bar
+    status_frame = ttk.Frame(root)
+    status_frame.pack(fill="x", padx=10, pady=(10, 0))
+    open_button = ttk.Button(status_frame, text="Open Ledger", style="TButton")
+    open_button.pack(side="left")
+    cancel_button = ttk.Button(status_frame, text="Cancel", style="TButton", state="disabled")
+    cancel_button.pack(side="left", padx=5)
+    status = ttk.Label(status_frame, text="Select a ledger to begin.")
+    status.pack(side="left", padx=10)
+    progress_bar = ttk.Progressbar(status_frame, maximum=len(STAGES), length=200)
+    progress_bar.pack(side="right")
+
+    # Create notebook for tabs
+    notebook = ttk.Notebook(root)
+    notebook.pack(fill="both", expand=True, padx=10, pady=10)
+
+    run = {'events': None, 'cancel': None, 'file_path': None, 'drilldown': None}
+
+    def start():
+        file_path = filedialog.askopenfilename(title="Select CSV File", filetypes=[("CSV files", "*.csv")])
+        if not file_path:
+            return
+        for tab in notebook.tabs():
+            notebook.forget(tab)
+        run['events'], run['cancel'], run['file_path'], run['drilldown'] = queue.Queue(), threading.Event(), file_path, None
+        threading.Thread(target=run_report, args=(file_path, mode, run['events'], run['cancel']), daemon=True).start()
+        open_button.configure(state="disabled")
+        cancel_button.configure(state="normal")
+        progress_bar['value'] = 0
+        poll()
+
+    def cancel():
+        if run['cancel'] is not None:
+            run['cancel'].set()
+            status.configure(text="Cancelling...")
+
+    def finish(message):
+        status.configure(text=message)
+        open_button.configure(state="normal")
+        cancel_button.configure(state="disabled")
+
+    def poll():
+        while True:
+            try:
+                event = run['events'].get_nowait()
+            except queue.Empty:
+                root.after(50, poll)
+                return
+            if event[0] == 'stage':
+                _, stage, statement = event
+                progress_bar['value'] = STAGES.index(stage) + 1
+                status.configure(text=f"{stage.capitalize()}...")
+                if statement is not None:
+                    add_table_tab(notebook, statement, STATEMENT_STAGES[stage], drill_down(stage, statement))
+            elif event[0] == 'done':
+                return finish("Done.")
+            elif event[0] == 'cancelled':
+                return finish("Cancelled.")
+            elif event[0] == 'error':
+                finish("Failed.")
+                messagebox.showerror("Error", f"Failed to build reports:\n{event[1]}")
+                return
+
+    def drilldown_index():
+        if run['drilldown'] is None:
+            from DrillDown import DrillDownIndex
+            message = status.cget("text")
+            status.configure(text="Indexing ledger...")
+            root.configure(cursor="watch")
+            root.update_idletasks()
+            try:
+                run['drilldown'] = DrillDownIndex.from_file(run['file_path'], cached=mode == 'cached')
+            finally:
+                root.configure(cursor="")
+                status.configure(text=message)
+        return run['drilldown']
+
+    def drill_down(stage, statement):
+        if mode not in ('cached', 'plain') or stage not in ('income statement', 'balance sheet'):
+            return None
+        def open_cell(row, column):
+            try:
+                index = drilldown_index()
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to index the ledger:\n{e}")
+                return
+            show_transactions(root, index, statement, row, column, stage == 'balance sheet')
+        return open_cell
+
+    def close():
+        cancel()
+        root.destroy()
 
+    open_button.configure(command=start)
+    cancel_button.configure(command=cancel)
+    root.protocol("WM_DELETE_WINDOW", close)
+    root.after(0, start)
     root.mainloop()
 
 if __name__ == "__main__":
-    ic, bs = clean_df(csv_loader())
-    table_names = ["Income Statement", "Balance Sheet"]
-    display_tables([ic, bs], table_names)
\ No newline at end of file
+    if '--stream' in sys.argv:
+        mode = 'stream'  # Large ledgers: read in chunks
+    elif '--incremental' in sys.argv:
+        mode = 'incremental'  # Only read rows appended since the last run
+    else:
+        mode = 'cached'
+    report_window(mode)
@@ -0,0 +1,197 @@
+import re
+import numpy as np
+import pandas as pd
+from DataScrub import BALANCE_SHEET_SECTIONS, INCOME_STATEMENT_PATTERN, account_mask
+
+# Drill-down from statement cells to the ledger rows behind them.
+# The index is built next to the monthly aggregation (clean_df's on_drilldown callback), or
+# afterwards from the ledger file (from_file) when the statements came from ReportCache, and
+# keeps the link clean_df otherwise discards: source row offsets sorted by (Account, month),
+# in compressed sparse row form. The rows of one account and month are offsets[indptr[k]:indptr[k + 1]]
+# with k = account * months + month, and an account's months are adjacent, so both a month's
+# activity and everything behind a closing balance are a single slice.
+# Offsets are positions in the parsed ledger (the CSV's data rows, in order), and the rows
+# themselves are read from the ledger the index was built from, so a lookup never rescans it.
+#
+# Usage: ic, bs = clean_df(df, on_drilldown=found.append); found[0].transactions('Cash', '2024-03', through=True)
+
+def stable_order(keys: np.ndarray, size: int) -> np.ndarray:
+    """
+    np.argsort(keys, kind='stable') for non-negative integer keys below size.
+    Sorts 16 bits at a time, which numpy does with a radix sort, instead of one comparison sort.
+    """
+    order = np.argsort((keys & 0xFFFF).astype('uint16'), kind='stable')
+    for shift in range(16, int(size - 1).bit_length(), 16):
+        order = order[np.argsort(((keys[order] >> shift) & 0xFFFF).astype('uint16'), kind='stable')]
+    return order
+
+class DrillDownIndex:
+    """
+    Ledger row offsets per (Account, year_month).
+
+    Attributes:
+        accounts: Object array of account names.
+        months: Object array of 'YYYY-MM' labels, every month from the first to the last.
+        indptr (int64): accounts x months + 1 slice bounds into offsets.
+        offsets: Source row positions, grouped by account, then month, in ledger order within a month.
+        source: The parsed DataFrame or Ledger the offsets point into.
+    """
+    __slots__ = ('accounts', 'months', 'indptr', 'offsets', 'source', '_account_codes')
+
+    def __init__(self, accounts, months, indptr, offsets, source):
+        self.accounts = np.asarray(accounts, dtype=object)
+        self.months = np.asarray(months, dtype=object)
+        self.indptr = indptr
+        self.offsets = offsets
+        self.source = source
+        self._account_codes = {name: code for code, name in enumerate(self.accounts)}
+
+    @classmethod
+    def from_codes(cls, account_codes, accounts, days, valid, source) -> 'DrillDownIndex':
+        """
+        Builds the index from per-row codes.
+        Args:
+            account_codes: Integer code of each row's account, indexing accounts.
+            accounts: Account names.
+            days: Day ordinals (days since 1970-01-01), one per row.
+            valid: Boolean array of the rows clean_df aggregates (date, account and type present).
+            source: Parsed ledger the rows come from.
+        """
+        rows = np.flatnonzero(valid).astype('int32' if len(valid) < 2**31 else 'int64')
+        days = np.asarray(days)[rows]
+        first_day, last_day = (int(days.min()), int(days.max())) if len(rows) else (0, -1)
+        # Month of each day from a table over the ledger's span; cheaper than converting every row to datetime64[M]
+        span = np.arange(first_day, last_day + 1).astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+        first_month = int(span[0]) if len(span) else 0
+        n_months = int(span[-1]) - first_month + 1 if len(span) else 0
+        month_of_day = (span - first_month).astype('int32')
+        size = len(accounts) * n_months
+        keys = np.asarray(account_codes)[rows].astype('int32' if size < 2**31 else 'int64') * n_months
+        keys += month_of_day[days - first_day]
+        order = stable_order(keys, size)
+        indptr = np.zeros(size + 1, dtype='int64')
+        np.cumsum(np.bincount(keys, minlength=size), out=indptr[1:])
+        labels = np.datetime_as_string((np.arange(n_months) + first_month).astype('datetime64[M]'), unit='M')
+        return cls(accounts, labels, indptr, rows[order], source)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'DrillDownIndex':
+        """
+        Index of a DataFrame returned by DataScrub.parse_ledger (categorical 'Account' and 'Type').
+        """
+        account = df['Account'].array
+        dates = df['Date'].to_numpy(dtype='datetime64[ns]')
+        valid = (account.codes >= 0) & (df['Type'].array.codes >= 0) & ~np.isnat(dates)
+        days = dates.view('int64') // (86_400 * 10**9)  # floor division, so days before 1970 stay right
+        return cls.from_codes(account.codes, account.categories, days, valid, df)
+
+    @classmethod
+    def from_ledger(cls, ledger) -> 'DrillDownIndex':
+        """
+        Index of a Ledger (see Ledger.py).
+        """
+        from Ledger import NO_DATE
+        valid = (ledger.account_codes >= 0) & (ledger.type_codes >= 0) & (ledger.days != NO_DATE)
+        return cls.from_codes(ledger.account_codes, ledger.accounts, ledger.days, valid, ledger)
+
+    @classmethod
+    def from_file(cls, file_path, cached: bool = True) -> 'DrillDownIndex':
+        """
+        Index of a ledger CSV file, as a Ledger.
+        Args:
+            file_path: Path to the ledger CSV file.
+            cached: Read it through LedgerCache.load_ledger (as the 'cached' load mode does) rather than read_csv.
+        """
+        from Ledger import Ledger
+        if cached:
+            from LedgerCache import load_ledger
+            df = load_ledger(file_path)
+        else:
+            df = pd.read_csv(file_path)
+        return cls.from_ledger(Ledger.from_frame(df))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.offsets.nbytes
+
+    def offsets_of(self, account: str, month: str = None, through: bool = False) -> np.ndarray:
+        """
+        Source row offsets of one account.
+        Args:
+            account: Account name as in the ledger.
+            month: 'YYYY-MM' label, or None for every month.
+            through: With a month, include every earlier month too (the rows behind a closing balance).
+        Returns:
+            Array of offsets, by month and then ledger order; empty for unknown accounts.
+        """
+        code = self._account_codes.get(account)
+        if code is None or not len(self.months):
+            return self.offsets[:0]
+        n_months = len(self.months)
+        first, last = 0, n_months - 1
+        if month is not None:
+            last = int(np.searchsorted(self.months, month, side='right')) - 1
+            if not through:
+                if last < 0 or self.months[last] != month:
+                    return self.offsets[:0]
+                first = last
+        return self.offsets[self.indptr[code * n_months + first]:self.indptr[code * n_months + last + 1]]
+
+    def transactions(self, accounts, month: str = None, through: bool = False, type_name: str = None) -> pd.DataFrame:
+        """
+        Ledger rows behind a statement cell, in ledger order.
+        Args:
+            accounts: Account name or list of names.
+            month, through: As for offsets_of.
+            type_name: Optional 'Type' the rows must have (e.g. 'Asset' for the Assets section).
+        Returns:
+            DataFrame with 'Row' (1-based data row of the ledger) followed by the ledger's columns
+            and 'GAAP Amount', the signed amount that adds up to the cell.
+        """
+        accounts = [accounts] if isinstance(accounts, str) else list(accounts)
+        offsets = np.sort(np.concatenate([self.offsets_of(account, month, through) for account in accounts] or [self.offsets[:0]]))
+        rows = self._rows(offsets)
+        if type_name is not None:
+            rows = rows[rows['Type'] == type_name].reset_index(drop=True)
+        return rows
+
+    def cell_accounts(self, section: str, name: str) -> tuple:
+        """
+        Ledger accounts and Type behind a statement row, or (None, None) for totals.
+        Args:
+            section, name: The row's index in clean_ic's or clean_bs's layout. Income statement
+                names have 'Revenue'/'Expense' dropped, as clean_ic shows them.
+        Returns:
+            tuple: (list of account names, Type the rows must have or None)
+        """
+        if section == '':
+            return None, None
+        is_income = account_mask(self.accounts, INCOME_STATEMENT_PATTERN)
+        if name == 'Net Income' and section in ('Net Income', 'Equities'):
+            return list(self.accounts[is_income]), None
+        if section in ('Revenues', 'Expenses'):
+            word = 'Revenue' if section == 'Revenues' else 'Expense'
+            return [account for account in self.accounts[is_income]
+                    if re.sub(fr'{word}\s*', '', account) == name], None
+        type_name = next((type_name for type_name, key, _ in BALANCE_SHEET_SECTIONS if key == section), None)
+        return ([name] if name in self._account_codes else []), type_name
+
+    def _rows(self, offsets: np.ndarray) -> pd.DataFrame:
+        from Ledger import Ledger
+        if isinstance(self.source, Ledger):
+            ledger = self.source
+            ids = None if ledger.transaction_ids is None else ledger.transaction_ids[offsets]
+            missing = None if ledger.missing_amounts is None else ledger.missing_amounts[offsets]
+            subset = Ledger(ledger.accounts, ledger.types, ledger.effects, ledger.account_codes[offsets],
+                            ledger.type_codes[offsets], ledger.effect_codes[offsets], ledger.days[offsets],
+                            ledger.cents[offsets], ids, missing)
+            rows = subset.to_frame()
+            rows['GAAP Amount'] = subset.gaap_cents() / 100
+        else:
+            rows = self.source.iloc[offsets].rename(columns={'gaap_amount': 'GAAP Amount'}).reset_index(drop=True)
+            rows['Account'] = rows['Account'].astype(object)
+        rows.insert(0, 'Row', offsets.astype('int64') + 1)
+        return rows
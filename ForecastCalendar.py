@@ -0,0 +1,215 @@
+from datetime import datetime, timedelta
+import calendar
+import pandas as pd
+import random
+
+# Cash forecast calendar.
+# Scheduled events (date -> value) are turned into a date-indexed running balance once,
+# then each calendar day is a single dictionary lookup, so rendering is linear in days.
+# Usage: python ForecastCalendar.py [scheduled events.csv]
+
+# Function to load events from a CSV file using pandas
+def load_events_from_csv(file_path):
+    """
+    Loads scheduled events from a CSV with 'Date' (m/d/yy) and 'Value' columns.
+    Returns a dict of date -> summed value, or an empty dict if the file cannot be read.
+    """
+    try:
+        # Read the CSV file
+        df = pd.read_csv(file_path)
+
+        # Check if the required columns exist
+        if 'Date' not in df.columns or 'Value' not in df.columns:
+            raise ValueError("Required columns 'Date' or 'Value' not found in the CSV file.")
+
+        # Convert date strings to datetime and sum the values for each date
+        dates = pd.to_datetime(df['Date'], format='%m/%d/%y')  # Raises ValueError on a bad date
+        values = df['Value'].astype(int)  # This will raise ValueError if conversion fails
+        return values.groupby(dates).sum().to_dict()
+
+    except ValueError as ve:
+        print(f"ValueError: {ve}")
+        return {}
+    except Exception as e:
+        print(f"An error occurred while loading CSV: {e}")
+        return {}
+
+# Random number generator for example purposes
+# Function to generate random events for a specified period
+def generate_random_events(start_date, num_months):
+    scheduled_events = {}
+    current_date = start_date
+
+    for _ in range(num_months):
+        days_in_month = calendar.monthrange(current_date.year, current_date.month)[1]
+        for day in range(1, days_in_month + 1):
+            date = current_date.replace(day=day)
+            # Randomly decide if there's an event and what its value is
+            if random.random() < 0.3:  # 30% chance of an event
+                # Generate a random integer between -500 and 500 for event value
+                event_value = random.randint(-500, 500)
+                scheduled_events[date] = event_value
+        # Move to the next month
+        current_date = current_date.replace(day=1) + timedelta(days=32)
+
+    return scheduled_events
+
+def add_months(date, months):
+    """
+    First day of the month 'months' after date's month.
+    """
+    month_index = date.year * 12 + date.month - 1 + months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+def running_balance(events, start_date, end_date, opening_balance=0):
+    """
+    Daily running balance of scheduled events.
+    Events before start_date are rolled into the balance; days without events carry
+    the previous day's balance forward.
+
+    Args:
+        events: dict of date -> value, or a pandas Series indexed by date.
+        start_date: First day of the forecast.
+        end_date: Last day of the forecast (inclusive).
+        opening_balance: Balance before the first event.
+    Returns:
+        pandas Series with one balance per day from start_date to end_date.
+    """
+    days = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(), freq='D')
+    events = pd.Series(events, dtype='float64')
+    if events.empty:
+        return pd.Series(float(opening_balance), index=days, name='Balance')
+    events.index = pd.to_datetime(events.index).normalize()
+    daily = events.groupby(level=0).sum().sort_index()
+    balance = daily.cumsum() + opening_balance
+    # Forward fill onto every day; days before the first event keep the opening balance
+    return balance.reindex(balance.index.union(days)).ffill().fillna(opening_balance).reindex(days).rename('Balance')
+
+def format_balance(value):
+    return '' if value == 0 else f'{value:,.2f}'
+
+# Function to generate HTML for a single month
+def generate_month_html(year, month, balances):
+    """
+    HTML table for one month. balances maps datetime.date -> running balance.
+    """
+    cal = calendar.Calendar(calendar.SUNDAY)
+
+    html = f"""
+    <div class="month">
+        <h2>{calendar.month_name[month]} {year}</h2>
+        <table>
+            <tr>
+                {"".join([f'<th>{calendar.day_abbr[(i + 6) % 7]}</th>' for i in range(7)])}
+            </tr>
+            {generate_calendar_body(cal, year, month, balances)}
+        </table>
+    </div>
+    """
+    return html
+
+def generate_calendar_body(cal, year, month, balances):
+    """
+    Table rows for one month; each day is a single lookup in balances.
+    """
+    html = []
+    for week in cal.monthdatescalendar(year, month):
+        html.append("<tr>")
+        for date in week:
+            if date.month != month:
+                html.append("<td></td>")
+                continue
+            # Find the balance for this date, or use 0 if it is outside the forecast
+            balance = balances.get(date, 0)
+            # Determine the cell class based on the balance
+            cell_class = "negative-event" if balance < 0 else ("has-events" if balance > 0 else "")
+            html.append(f"""
+                <td class="{cell_class}">
+                    <div>{date.day}</div>
+                    <div>{format_balance(balance)}</div>
+                </td>
+                """)
+        html.append("</tr>")
+    return "".join(html)
+
+PAGE_HEAD = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <style>
+        table {{
+            border-collapse: collapse;
+            width: 100%;
+        }}
+        th, td {{
+            border: 1px solid black;
+            text-align: center;
+            padding: 8px;
+        }}
+        th {{
+            background-color: #f2f2f2;
+        }}
+        .has-events {{
+            background-color: #e6f3ff;
+        }}
+        .negative-event {{
+            background-color: #ffe5e5;  /* Light red background */
+        }}
+        .month {{
+            margin-bottom: 30px;
+        }}
+    </style>
+</head>
+<body>
+"""
+
+def forecast_calendar(events, start_date, num_months, opening_balance=0, title=None):
+    """
+    Builds the forecast calendar HTML.
+
+    Args:
+        events: dict of date -> value, or a pandas Series indexed by date.
+        start_date: Any day in the first month shown.
+        num_months: Number of months shown.
+        opening_balance: Balance before the first event.
+        title: Page title. Defaults to '<n> Months Calendar with Cumulative Events'.
+    Returns:
+        str: The HTML page.
+    """
+    first_day = add_months(start_date, 0)
+    last_day = add_months(start_date, num_months) - timedelta(days=1)
+    balance = running_balance(events, first_day, last_day, opening_balance)
+    balances = dict(zip(balance.index.date, balance.to_numpy()))
+
+    html = [PAGE_HEAD.format(title=title or f"{num_months} Months Calendar with Cumulative Events")]
+    for i in range(num_months):
+        month = add_months(first_day, i)
+        html.append(generate_month_html(month.year, month.month, balances))
+    html.append("""
+</body>
+</html>
+""")
+    return "".join(html)
+
+if __name__ == "__main__":
+    import sys
+
+    # Start date for the first calendar
+    start_date = datetime(2025, 2, 1)
+
+    if len(sys.argv) > 1:
+        scheduled_events = load_events_from_csv(sys.argv[1])
+    else:
+        # Generate random events for 3 months
+        scheduled_events = generate_random_events(start_date, 3)
+
+    html_content = forecast_calendar(scheduled_events, start_date, 3, title="Three Months Calendar with Cumulative Events")
+
+    # Write the combined HTML to a file
+    with open('Three month projected outlook.html', 'w') as f:
+        f.write(html_content)
+
+    print("HTML file 'Three month projected outlook.html' has been created.")
@@ -0,0 +1,271 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from DataScrub import REQUIRED_COLUMNS, parse_dates
+
+# Compact in-memory ledger model.
+# A Ledger keeps one contiguous numpy array per field instead of a DataFrame of Python objects:
+# account names, types and effects are interned into small integer codes, dates are day
+# ordinals (days since 1970-01-01) and amounts are integer cents. Transaction and Account
+# are lightweight views (index or code plus a reference to the ledger) with __slots__, so
+# iterating a ledger never materializes per-row dicts or Series.
+#
+# clean_df accepts a Ledger directly; monthly sums are then added up in exact integer cents.
+
+EPOCH = date(1970, 1, 1)
+NO_DATE = np.iinfo(np.int32).min  # day ordinal stored for unparseable dates
+
+def intern_labels(values, case=None, dtype='int32') -> tuple[np.ndarray, tuple]:
+    """
+    Interns a column of labels into integer codes.
+    Args:
+        values: Column of labels.
+        case: Optional normalization applied to each distinct label after stripping
+            whitespace (e.g. str.title). Labels equal after normalization share a code.
+        dtype: Integer dtype of the codes.
+    Returns:
+        tuple: (codes array, tuple of labels in sorted order). Missing or non-string labels get code -1.
+    """
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    normalized = [(case(val.strip()) if case else val) if isinstance(val, str) else None for val in uniques]
+    labels = tuple(sorted({val for val in normalized if val is not None}))
+    lookup = {label: code for code, label in enumerate(labels)}
+    if len(labels) > np.iinfo(dtype).max:  # widen if there are too many labels
+        dtype = 'int32'
+    remap = np.array([lookup.get(val, -1) for val in normalized] + [-1], dtype=dtype)
+    return remap[codes], labels
+
+class Transaction:
+    """
+    One ledger entry, read from the Ledger's arrays on access.
+    """
+    __slots__ = ('ledger', 'index')
+
+    def __init__(self, ledger, index: int):
+        self.ledger = ledger
+        self.index = index
+
+    @property
+    def date(self) -> date | None:
+        days = int(self.ledger.days[self.index])
+        return None if days == NO_DATE else EPOCH + timedelta(days=days)
+
+    @property
+    def account(self) -> str | None:
+        return self.ledger.label('accounts', self.ledger.account_codes[self.index])
+
+    @property
+    def type(self) -> str | None:
+        return self.ledger.label('types', self.ledger.type_codes[self.index])
+
+    @property
+    def effect(self) -> str | None:
+        return self.ledger.label('effects', self.ledger.effect_codes[self.index])
+
+    @property
+    def cents(self) -> int:
+        return int(self.ledger.cents[self.index])
+
+    @property
+    def amount(self) -> float:
+        missing = self.ledger.missing_amounts
+        return float('nan') if missing is not None and missing[self.index] else self.cents / 100
+
+    @property
+    def transaction_id(self):
+        ids = self.ledger.transaction_ids
+        return None if ids is None else ids[self.index].item()
+
+    def __repr__(self):
+        return (f"Transaction({self.date}, {self.account!r}, {self.type!r}, {self.effect!r}, "
+                f"{self.amount:.2f})")
+
+class Account:
+    """
+    One account of a Ledger, identified by its interned code.
+    """
+    __slots__ = ('ledger', 'code')
+
+    def __init__(self, ledger, code: int):
+        self.ledger = ledger
+        self.code = code
+
+    @property
+    def name(self) -> str:
+        return self.ledger.accounts[self.code]
+
+    def rows(self) -> np.ndarray:
+        """
+        Positions of this account's transactions in the ledger.
+        """
+        return np.flatnonzero(self.ledger.account_codes == self.code)
+
+    def transactions(self):
+        return (Transaction(self.ledger, int(i)) for i in self.rows())
+
+    def balance_cents(self) -> int:
+        """
+        GAAP balance of the account in integer cents.
+        """
+        return int(self.ledger.gaap_cents()[self.rows()].sum())
+
+    def balance(self) -> float:
+        return self.balance_cents() / 100
+
+    def __repr__(self):
+        return f"Account({self.name!r})"
+
+class Ledger:
+    """
+    Column arrays for a whole ledger.
+
+    Attributes:
+        accounts, types, effects: Interned labels; codes index into these tuples.
+        account_codes (int32), type_codes (int8), effect_codes (int8): Per-transaction codes, -1 when missing
+            (widened to int32 if a ledger has more than 127 distinct labels).
+        days (int32): Day ordinals since 1970-01-01, NO_DATE when the date could not be parsed.
+        cents (int64): Amounts in integer cents, 0 when missing.
+        transaction_ids: Optional array of the 'Transaction ID' column.
+        missing_amounts: Optional boolean array, True where the amount was empty (None if none were),
+            so to_frame gives those rows back as NaN and validation still reports them.
+    """
+    __slots__ = ('accounts', 'types', 'effects', 'account_codes', 'type_codes', 'effect_codes',
+                 'days', 'cents', 'transaction_ids', 'missing_amounts')
+
+    def __init__(self, accounts, types, effects, account_codes, type_codes, effect_codes, days, cents,
+                 transaction_ids=None, missing_amounts=None):
+        self.accounts, self.types, self.effects = tuple(accounts), tuple(types), tuple(effects)
+        self.account_codes = np.asarray(account_codes)
+        self.type_codes = np.asarray(type_codes)
+        self.effect_codes = np.asarray(effect_codes)
+        self.days = np.asarray(days, dtype='int32')
+        self.cents = np.asarray(cents, dtype='int64')
+        self.transaction_ids = transaction_ids
+        self.missing_amounts = None if missing_amounts is None else np.asarray(missing_amounts, dtype=bool)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'Ledger':
+        """
+        Builds a Ledger from a DataFrame with 'Date', 'Account', 'Type', 'Effect', and 'Amount' columns
+        (and optionally 'Transaction ID'). Types are title-cased and effects upper-cased, as in gaap_adjust.
+        """
+        if not all(col in df.columns for col in REQUIRED_COLUMNS):
+            raise ValueError(f"Ledger must contain the following columns: {REQUIRED_COLUMNS}")
+        dates = df['Date'] if df['Date'].dtype == 'datetime64[ns]' else parse_dates(df['Date'])
+        dates = dates.to_numpy(dtype='datetime64[D]')
+        days = np.where(np.isnat(dates), NO_DATE, dates.astype('int64')).astype('int32')
+
+        account_codes, accounts = intern_labels(df['Account'])
+        type_codes, types = intern_labels(df['Type'], str.title, 'int8')
+        effect_codes, effects = intern_labels(df['Effect'], str.upper, 'int8')
+
+        amounts = df['Amount'].to_numpy(dtype='float64')
+        missing = np.isnan(amounts)
+        cents = np.rint(np.where(missing, 0.0, amounts) * 100).astype('int64')
+
+        ids = None
+        if 'Transaction ID' in df.columns:
+            ids = df['Transaction ID'].to_numpy()
+            if ids.dtype.kind == 'f' and not np.isnan(ids).any() and (ids == np.floor(ids)).all():
+                ids = ids.astype('int64')
+        return cls(accounts, types, effects, account_codes, type_codes, effect_codes, days, cents, ids,
+                   missing if missing.any() else None)
+
+    @classmethod
+    def from_csv(cls, file_path) -> 'Ledger':
+        return cls.from_frame(pd.read_csv(file_path))
+
+    def __len__(self):
+        return len(self.cents)
+
+    def __getitem__(self, index: int) -> Transaction:
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return Transaction(self, index % len(self))
+
+    def __iter__(self):
+        return (Transaction(self, i) for i in range(len(self)))
+
+    def label(self, field: str, code) -> str | None:
+        return None if code < 0 else getattr(self, field)[code]
+
+    def account(self, name: str) -> Account:
+        """
+        Account by name. Raises KeyError if the ledger has no such account.
+        """
+        try:
+            return Account(self, self.accounts.index(name))
+        except ValueError:
+            raise KeyError(name) from None
+
+    def iter_accounts(self):
+        return (Account(self, code) for code in range(len(self.accounts)))
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes held by the per-transaction arrays.
+        """
+        arrays = [self.account_codes, self.type_codes, self.effect_codes, self.days, self.cents]
+        if self.transaction_ids is not None:
+            arrays.append(self.transaction_ids)
+        if self.missing_amounts is not None:
+            arrays.append(self.missing_amounts)
+        return sum(array.nbytes for array in arrays)
+
+    def gaap_cents(self) -> np.ndarray:
+        """
+        GAAP adjusted amounts in cents, same rule as DataScrub.gaap_adjust:
+        assets are reduced by credits, everything else is reduced by debits.
+        """
+        def code_of(labels, label):
+            return labels.index(label) if label in labels else -2  # -2 never matches a stored code
+        is_asset = self.type_codes == code_of(self.types, 'Asset')
+        reduces = np.where(is_asset, self.effect_codes == code_of(self.effects, 'CREDIT'),
+                           self.effect_codes == code_of(self.effects, 'DEBIT'))
+        return np.where(reduces, -np.abs(self.cents), self.cents)
+
+    def monthly_partials(self) -> pd.DataFrame:
+        """
+        Same result as DataScrub.monthly_partials, summed in exact integer cents.
+        Rows with a missing date, account or type are dropped.
+        Returns:
+            DataFrame with 'Account', 'Type', 'year_month', and 'gaap_amount' columns, sorted by those keys.
+        """
+        valid = (self.account_codes >= 0) & (self.type_codes >= 0) & (self.days != NO_DATE)
+        months = self.days[valid].astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+        first_month = months.min() if len(months) else 0
+        dims = (len(self.accounts), len(self.types), int(months.max() - first_month + 1) if len(months) else 1)
+        # Labels are interned in sorted order, so sorting by code sorts by name
+        keys = np.ravel_multi_index((self.account_codes[valid], self.type_codes[valid], months - first_month), dims)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype='int64')
+        sums = np.add.reduceat(self.gaap_cents()[valid][order], starts) if len(keys) else np.array([], dtype='int64')
+
+        account_codes, type_codes, month_codes = np.unravel_index(keys[starts], dims)
+        month_labels = np.datetime_as_string((np.arange(dims[2]) + first_month).astype('datetime64[M]'), unit='M')
+        return pd.DataFrame({
+            'Account': np.array(self.accounts, dtype=object)[account_codes] if len(keys) else np.array([], dtype=object),
+            'Type': np.array(self.types, dtype=object)[type_codes] if len(keys) else np.array([], dtype=object),
+            'year_month': month_labels.astype(object)[month_codes],
+            'gaap_amount': sums / 100,
+        })
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        The ledger as a DataFrame in the CSV's column format, with normalized labels.
+        Missing amounts are NaN again.
+        """
+        def decode(labels, codes):
+            return np.append(np.array(labels, dtype=object), None)[codes]
+        df = pd.DataFrame({
+            'Date': np.where(self.days == NO_DATE, np.datetime64('NaT'), self.days.astype('datetime64[D]')).astype('datetime64[ns]'),
+            'Effect': decode(self.effects, self.effect_codes),
+            'Account': decode(self.accounts, self.account_codes),
+            'Amount': self.cents / 100 if self.missing_amounts is None else np.where(self.missing_amounts, np.nan, self.cents / 100),
+            'Type': decode(self.types, self.type_codes),
+        })
+        if self.transaction_ids is not None:
+            df['Transaction ID'] = self.transaction_ids
+        return df
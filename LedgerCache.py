@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+from DataScrub import parse_dates
+
+# Typed columnar cache for ledger CSVs.
+# The first load of a ledger parses the CSV and writes an uncompressed Feather file with
+# parsed dates and categorical Account/Type/Effect columns; later loads read it back with the
+# types in place. The cache saves parsing, not memory: to_pandas copies the table either way.
+# Each ledger's last fingerprint is a small JSON file of its own, replaced atomically, so
+# concurrent loads of different ledgers never overwrite each other's records. Feather files
+# are evicted least recently used first once the directory exceeds DISK_LIMIT.
+# Requires pyarrow; without it load_ledger falls back to reading the CSV every time.
+#
+# ACCOUNTPY_LEDGER_CACHE_MB sets the limit (default 1024).
+
+CACHE_DIR = os.environ.get('ACCOUNTPY_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'accountpy'))
+CATEGORICAL_COLUMNS = ['Account', 'Type', 'Effect']
+FINGERPRINT_DIR = 'ledgers'  # one JSON fingerprint per ledger path
+DISK_LIMIT = int(float(os.environ.get('ACCOUNTPY_LEDGER_CACHE_MB', 1024)) * 2**20)
+
+def file_fingerprint(file_path, known: dict = None) -> dict:
+    """
+    Size, mtime and content hash of a file.
+    If a previous fingerprint with the same size and mtime is given, its hash is reused
+    instead of reading the file again.
+    Args:
+        file_path: Path to the file.
+        known: Fingerprint from an earlier call, or None.
+    Returns:
+        dict with 'size', 'mtime_ns' and 'hash' keys.
+    """
+    stat = os.stat(file_path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if known and known.get('size') == stat.st_size and known.get('mtime_ns') == stat.st_mtime_ns:
+        fingerprint['hash'] = known['hash']
+        return fingerprint
+
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    fingerprint['hash'] = digest.hexdigest()
+    return fingerprint
+
+def read_typed_csv(file_path) -> pd.DataFrame:
+    """
+    Reads a ledger CSV with parsed dates and categorical Account/Type/Effect columns.
+    """
+    df = pd.read_csv(file_path)
+    if 'Date' in df.columns:
+        df['Date'] = parse_dates(df['Date'])
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+def _fingerprint_path(cache_dir, key) -> str:
+    name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    return os.path.join(cache_dir, FINGERPRINT_DIR, f"{name}.json")
+
+def _load_fingerprint(cache_dir, key) -> dict | None:
+    try:
+        with open(_fingerprint_path(cache_dir, key)) as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return record.get('fingerprint') if record.get('path') == key else None
+
+def _save_fingerprint(cache_dir, key, fingerprint: dict):
+    path = _fingerprint_path(cache_dir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'path': key, 'fingerprint': fingerprint}, f)
+    os.replace(tmp_path, path)
+
+def _evict(cache_dir, disk_limit: int, keep: str):
+    """
+    Removes the least recently used Feather files, other than keep, until the directory fits in disk_limit.
+    """
+    files = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.feather') and entry.path != keep:
+            stat = entry.stat()
+            files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in files) + os.path.getsize(keep)
+    for _, size, path in sorted(files):
+        if total <= disk_limit:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def known_fingerprint(file_path, cache_dir: str = None) -> dict | None:
+    """
+    Fingerprint recorded by the last load_ledger of file_path, or None.
+    Pass it to file_fingerprint to skip rehashing a file that has not changed.
+    """
+    return _load_fingerprint(cache_dir or CACHE_DIR, os.path.abspath(file_path))
+
+def load_ledger(file_path, cache_dir: str = None, disk_limit: int = DISK_LIMIT) -> pd.DataFrame:
+    """
+    Loads a ledger CSV through the columnar cache.
+    The cache entry is keyed by the file's content hash; size and mtime are used to skip
+    rehashing a file that has not changed since the last load.
+    Args:
+        file_path: Path to the ledger CSV file.
+        cache_dir: Directory for cache files. Defaults to CACHE_DIR.
+        disk_limit: Bytes of Feather files kept in cache_dir; the entry just used is always kept.
+    Returns:
+        DataFrame with parsed 'Date' and categorical 'Account', 'Type', 'Effect' columns.
+    """
+    try:
+        import pyarrow
+        import pyarrow.feather as feather
+    except ImportError:
+        return read_typed_csv(file_path)
+
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    key = os.path.abspath(file_path)
+    previous = _load_fingerprint(cache_dir, key)
+    fingerprint = file_fingerprint(file_path, previous)
+    cache_path = os.path.join(cache_dir, f"{fingerprint['hash']}.feather")
+
+    try:
+        df = feather.read_table(cache_path).to_pandas()
+    except FileNotFoundError:
+        df = None
+    except (OSError, pyarrow.ArrowInvalid):  # truncated, corrupt or from an incompatible pyarrow: rebuild it
+        df = None
+        _remove(cache_path)
+    if df is not None:
+        try:
+            os.utime(cache_path)  # mtime doubles as the last-used time for eviction
+        except OSError:
+            pass
+    else:
+        df = read_typed_csv(file_path)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            feather.write_feather(df, tmp_path, compression='uncompressed')  # uncompressed, so reads skip decompression
+            os.replace(tmp_path, cache_path)
+        except OSError:  # e.g. a full disk; the cache is best effort
+            _remove(tmp_path)
+            return df
+        # Entries for a ledger's old contents are not tracked; they age out here
+        _evict(cache_dir, disk_limit, cache_path)
+
+    if previous != fingerprint:
+        _save_fingerprint(cache_dir, key, fingerprint)
+    return df
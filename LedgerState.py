@@ -0,0 +1,159 @@
+import hashlib
+import os
+import sys
+import pandas as pd
+from DataScrub import (split_df, monthly_partials, merge_partials, parse_ledger,
+                       read_partials, cumulative_balances, finish_statements)
+
+# Persisted aggregate state for incremental report runs.
+# A refresh costs the size of the appended rows, not of the ledger. The state records the
+# file's size and mtime and a hash of the last HASH_BLOCK bytes it consumed:
+# - size and mtime unchanged: nothing is read;
+# - the file grew and that block still hashes the same: a pure append, only new rows are read;
+# - anything else (a same-size edit, a shrink, a touch, or an edit in the final block): the
+#   state is rebuilt from the whole file.
+# An edit earlier in the file made together with an append goes unnoticed; rewriting the
+# ledger in place means deleting the state file.
+# Usage: python LedgerState.py ledger.csv [state file]
+
+HASH_BLOCK = 1 << 20
+
+class LedgerState:
+    """
+    Monthly sums per account plus cumulative balance sheet balances for one ledger.
+    New transactions are folded in with update(), so each run costs the size of the
+    new batch plus accounts x months, not the size of the ledger's history.
+
+    Attributes:
+        monthly: Series of monthly gaap_amount sums indexed by ('Account', 'Type', 'year_month').
+        balances: Series of cumulative balance sheet balances, same index as monthly's balance sheet rows.
+        source: dict describing how much of the source CSV has been read, or None.
+    """
+
+    def __init__(self):
+        self.monthly = pd.Series(
+            dtype='float64', name='gaap_amount',
+            index=pd.MultiIndex.from_arrays([[], [], []], names=['Account', 'Type', 'year_month']))
+        self.balances = self.monthly.copy()
+        self.source = None
+
+    def update(self, df: pd.DataFrame):
+        """
+        Folds a batch of new transactions into the state.
+        Late-dated entries in months that are already closed ripple forward through
+        the cumulative balances of the accounts they touch.
+        Args:
+            df: DataFrame with 'Date', 'Account', 'Type', 'Effect', and 'Amount' columns.
+        """
+        self.update_partials(monthly_partials(parse_ledger(df)))
+
+    def update_partials(self, partials: pd.DataFrame):
+        """
+        Folds monthly partials (as returned by monthly_partials) into the state.
+        """
+        if partials is None or partials.empty:
+            return
+        delta = merge_partials(partials).set_index(['Account', 'Type', 'year_month'])['gaap_amount']
+        self.monthly = self.monthly.add(delta, fill_value=0).sort_index()
+
+        # Only balance sheet accounts touched by the batch need their running balances redone.
+        _, bs_delta = split_df(delta.reset_index())
+        touched = bs_delta['Account'].unique()
+        if len(touched) == 0:
+            return
+        bs_monthly = self.monthly[self.monthly.index.get_level_values('Account').isin(touched)]
+        _, bs_monthly = split_df(bs_monthly.reset_index())
+        untouched = self.balances[~self.balances.index.get_level_values('Account').isin(touched)]
+        self.balances = pd.concat([untouched, cumulative_balances(bs_monthly)]).sort_index()
+
+    def statements(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Re-emits the income statement and balance sheet from the state.
+        Returns:
+            tuple: (DataFrame for income statement, DataFrame for balance sheet), same as clean_df.
+        """
+        ic, _ = split_df(self.monthly.reset_index())
+        return finish_statements(ic, self.balances.reset_index())
+
+    def refresh(self, file_path, chunksize: int = 250_000):
+        """
+        Reads only the rows appended to a ledger CSV since the last refresh.
+        The state is rebuilt from scratch if the file is new or changed other than by an
+        append (see the module comment).
+        Args:
+            file_path: Path to the ledger CSV file.
+            chunksize: Number of rows read per chunk.
+        """
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        size = stat.st_size
+        known = self.source if self.source and self.source['path'] == file_path and 'tail_hash' in self.source else None
+        if known and size == known['offset'] and stat.st_mtime_ns == known['mtime_ns']:
+            return
+        appended = known is not None and size > known['offset'] and _tail_hash(file_path, known['offset']) == known['tail_hash']
+        if not appended:
+            self.__init__()
+            columns = list(pd.read_csv(file_path, nrows=0).columns)
+            self.source = {'path': file_path, 'offset': 0, 'columns': columns}
+
+        offset = self.source['offset']
+        if size > offset:
+            with open(file_path, 'rb') as f:
+                if offset:
+                    f.seek(offset)
+                    partials = read_partials(f, chunksize, header=None, names=self.source['columns'])
+                else:
+                    partials = read_partials(f, chunksize)
+            self.update_partials(partials)
+        self.source.update(offset=size, mtime_ns=stat.st_mtime_ns, tail_hash=_tail_hash(file_path, size))
+
+    def save(self, path):
+        """
+        Persists the state to a pickle file.
+        """
+        pd.to_pickle({'monthly': self.monthly, 'balances': self.balances, 'source': self.source}, path)
+
+    @classmethod
+    def load(cls, path) -> 'LedgerState':
+        """
+        Loads a state saved with save(). Returns an empty state if the file does not exist.
+        """
+        state = cls()
+        if os.path.exists(path):
+            saved = pd.read_pickle(path)
+            state.monthly, state.balances, state.source = saved['monthly'], saved['balances'], saved['source']
+        return state
+
+def _tail_hash(file_path, offset) -> str:
+    """
+    Hash of the HASH_BLOCK bytes before offset (fewer at the start of the file).
+    """
+    start = max(offset - HASH_BLOCK, 0)
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        return hashlib.blake2b(f.read(offset - start), digest_size=20).hexdigest()
+
+def state_path_for(file_path) -> str:
+    """
+    Default location of the persisted state: next to the ledger.
+    """
+    return f"{file_path}.state.pkl"
+
+def incremental_statements(file_path, state_path=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Loads the persisted state for a ledger, reads any appended rows, saves the state and
+    returns (income statement, balance sheet). Can be passed to csv_loader as its reader.
+    """
+    state_path = state_path or state_path_for(file_path)
+    state = LedgerState.load(state_path)
+    state.refresh(file_path)
+    state.save(state_path)
+    return state.statements()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python LedgerState.py ledger.csv [state file]")
+        sys.exit(1)
+    ic, bs = incremental_statements(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(ic)
+    print(bs)
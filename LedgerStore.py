@@ -0,0 +1,403 @@
+import os
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from DataScrub import REQUIRED_COLUMNS, build_statements, merge_partials, split_df
+from Ledger import NO_DATE, Ledger
+from LedgerCache import CACHE_DIR, file_fingerprint
+from Profiling import stage
+
+# Embedded SQLite ledger store.
+# Ledgers are bulk-imported, each in one transaction, into one 'entries' table holding small
+# integer ids for account, type and effect, the date as a day ordinal (days since 1970-01-01),
+# the month, and the amount and its GAAP adjusted value in integer cents. The monthly sums
+# behind clean_df are rolled up in SQL once per import into the 'monthly' table, so whole-month
+# statements read a table of accounts x months rows however large the ledger is. Entries are
+# indexed by (ledger, account, day) and (ledger, Transaction ID) for per-account histories and
+# transaction lookups, and by (ledger, day) covering the rollup columns for part-month ranges.
+# Re-importing a ledger replaces its rows atomically: readers see the old ledger or the new one,
+# and a failed import leaves the old one in place.
+# Only sqlite3 from the standard library is needed.
+#
+# Usage: python accountpy.py import ledgers.sqlite ledger.csv [--name acme]
+#        python accountpy.py report acme --store ledgers.sqlite --start 2024-07-01 --end 2024-09-30
+#        python accountpy.py history ledgers.sqlite "Accounts Payable" --start 2024-07-01 --end 2024-09-30
+
+DEFAULT_STORE = os.environ.get('ACCOUNTPY_STORE', os.path.join(CACHE_DIR, 'ledgers.sqlite'))
+SCHEMA_VERSION = 1
+BATCH_ROWS = 100_000  # rows per executemany call
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledgers (
+    id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, source TEXT, hash TEXT, rows INTEGER, imported REAL);
+CREATE TABLE IF NOT EXISTS accounts (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS types (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS effects (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    ledger_id INTEGER NOT NULL, row INTEGER NOT NULL, day INTEGER, month INTEGER,
+    account_id INTEGER, type_id INTEGER, effect_id INTEGER,
+    cents INTEGER NOT NULL, gaap_cents INTEGER NOT NULL, transaction_id);
+CREATE TABLE IF NOT EXISTS monthly (
+    ledger_id INTEGER NOT NULL, account_id INTEGER NOT NULL, type_id INTEGER NOT NULL, month INTEGER NOT NULL,
+    gaap_cents INTEGER NOT NULL, PRIMARY KEY (ledger_id, account_id, type_id, month)) WITHOUT ROWID;
+"""
+# Created after loading into an empty store rather than maintained row by row during it
+INDEXES = """
+CREATE INDEX IF NOT EXISTS entries_account_day ON entries (ledger_id, account_id, day);
+CREATE INDEX IF NOT EXISTS entries_day ON entries (ledger_id, day, account_id, type_id, month, gaap_cents);
+CREATE INDEX IF NOT EXISTS entries_transaction ON entries (ledger_id, transaction_id);
+"""
+
+def _day(value) -> int:
+    return int(pd.Timestamp(value).to_datetime64().astype('datetime64[D]').astype('int64'))
+
+def _month_of_day(day: int) -> int:
+    return int(np.datetime64(day, 'D').astype('datetime64[M]').astype('int64'))
+
+def _month_labels(months) -> np.ndarray:
+    return np.datetime_as_string(np.asarray(months, dtype='int64').astype('datetime64[M]'), unit='M').astype(object)
+
+class LedgerStore:
+    """
+    SQLite database of imported ledgers.
+
+    Args:
+        path: Database file, created if missing. Defaults to DEFAULT_STORE.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or DEFAULT_STORE
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.executescript(SCHEMA + INDEXES)
+            self.connection.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        self.connection.close()
+
+    # --- Import ---
+
+    def import_csv(self, file_path, name: str = None, chunksize: int = 250_000) -> int:
+        """
+        Imports (or re-imports) a ledger CSV, reading it in chunks so memory stays bounded.
+        A ledger whose file content has not changed since its last import is skipped.
+        Args:
+            file_path: Path to the ledger CSV file.
+            name: Ledger name in the store. Defaults to the file name without extension.
+            chunksize: Rows read and parsed at a time.
+        Returns:
+            int: Number of rows in the stored ledger.
+        """
+        name = name or os.path.splitext(os.path.basename(file_path))[0]
+        fingerprint = file_fingerprint(file_path)
+        row = self.connection.execute('SELECT hash, rows FROM ledgers WHERE name = ?', (name,)).fetchone()
+        if row and row[0] == fingerprint['hash']:
+            return row[1]
+        chunks = pd.read_csv(file_path, chunksize=chunksize, usecols=lambda col: col in REQUIRED_COLUMNS + ['Transaction ID'])
+        return self._import(chunks, name, os.path.abspath(file_path), fingerprint['hash'])
+
+    def import_frame(self, df: pd.DataFrame, name: str) -> int:
+        """
+        Imports (or replaces) a ledger from a DataFrame with the README's columns.
+        Returns:
+            int: Number of rows stored.
+        """
+        return self._import([df], name, None, None)
+
+    def _import(self, chunks, name, source, content_hash) -> int:
+        with stage('store_import') as timing:
+            connection = self.connection
+            # One transaction for the whole replacement, so it commits or rolls back as a unit
+            with connection:
+                ledger_id = self._replace_ledger(name, source, content_hash)
+                # Into an empty store, indexes are built once after the load, which is much faster than
+                # updating them per row; otherwise other ledgers' rows keep them, and rebuilding would cost more
+                bulk = connection.execute('SELECT 1 FROM entries LIMIT 1').fetchone() is None
+                if bulk:
+                    for index in ('entries_account_day', 'entries_day', 'entries_transaction'):
+                        connection.execute(f'DROP INDEX IF EXISTS {index}')
+                rows = 0
+                for chunk in chunks:
+                    ledger = Ledger.from_frame(chunk)
+                    columns = self._columns(ledger, ledger_id, rows)
+                    for start in range(0, len(ledger), BATCH_ROWS):
+                        # Tuples are built per batch, so only one batch of Python objects is alive at a time
+                        batch = zip(*(column[start:start + BATCH_ROWS].tolist() for column in columns))
+                        connection.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+                    rows += len(ledger)
+                if bulk:
+                    # Statement by statement: executescript would commit the transaction first
+                    for statement in filter(str.strip, INDEXES.split(';')):
+                        connection.execute(statement)
+                # The monthly rollup behind clean_df, aggregated in SQL
+                connection.execute("""
+                    INSERT INTO monthly (ledger_id, account_id, type_id, month, gaap_cents)
+                    SELECT ledger_id, account_id, type_id, month, SUM(gaap_cents) FROM entries
+                    WHERE ledger_id = ? AND day IS NOT NULL AND account_id IS NOT NULL AND type_id IS NOT NULL
+                    GROUP BY account_id, type_id, month""", (ledger_id,))
+                connection.execute('UPDATE ledgers SET rows = ?, hash = ? WHERE id = ?', (rows, content_hash, ledger_id))
+            connection.execute('ANALYZE entries')
+            timing.rows = rows
+        return rows
+
+    def _replace_ledger(self, name, source, content_hash) -> int:
+        connection = self.connection
+        row = connection.execute('SELECT id FROM ledgers WHERE name = ?', (name,)).fetchone()
+        if row:
+            connection.execute('DELETE FROM entries WHERE ledger_id = ?', row)
+            connection.execute('DELETE FROM monthly WHERE ledger_id = ?', row)
+            connection.execute('UPDATE ledgers SET source = ?, hash = NULL, rows = 0, imported = ? WHERE id = ?',
+                               (source, time.time(), row[0]))
+            return row[0]
+        return connection.execute('INSERT INTO ledgers (name, source, hash, rows, imported) VALUES (?, ?, NULL, 0, ?)',
+                                  (name, source, time.time())).lastrowid
+
+    def _label_ids(self, table: str, labels) -> np.ndarray:
+        """
+        Store ids for a Ledger's interned labels, adding new ones; index -1 maps to NULL.
+        """
+        self.connection.executemany(f'INSERT OR IGNORE INTO {table} (name) VALUES (?)', [(label,) for label in labels])
+        ids = dict(self.connection.execute(f'SELECT name, id FROM {table}'))
+        return np.array([ids[label] for label in labels] + [None], dtype=object)
+
+    def _columns(self, ledger: Ledger, ledger_id: int, first_row: int) -> list:
+        """
+        entries columns for one parsed chunk, as arrays of Python ints (or None).
+        """
+        days = ledger.days.astype('int64')
+        months = days.astype('datetime64[D]').astype('datetime64[M]').astype('int64').astype(object)
+        days = days.astype(object)  # Python ints, which sqlite3 binds directly
+        months[ledger.days == NO_DATE] = days[ledger.days == NO_DATE] = None
+        ids = ledger.transaction_ids
+        columns = [
+            np.full(len(ledger), ledger_id, dtype=object),
+            np.arange(first_row, first_row + len(ledger), dtype='int64').astype(object),
+            days,
+            months,
+            self._label_ids('accounts', ledger.accounts)[ledger.account_codes],
+            self._label_ids('types', ledger.types)[ledger.type_codes],
+            self._label_ids('effects', ledger.effects)[ledger.effect_codes],
+            ledger.cents.astype(object),
+            ledger.gaap_cents().astype(object),
+            np.full(len(ledger), None, dtype=object) if ids is None else pd.Series(ids).astype(object).where(pd.notna(ids), None).to_numpy(),
+        ]
+        return columns
+
+    # --- Queries ---
+
+    def ledgers(self) -> pd.DataFrame:
+        """
+        Stored ledgers with their source file, row count and import time.
+        """
+        df = pd.read_sql_query('SELECT name, source, rows, imported FROM ledgers ORDER BY name', self.connection)
+        df['imported'] = pd.to_datetime(df['imported'], unit='s')
+        return df
+
+    def _ledger_id(self, name: str = None) -> int:
+        if name is None:
+            rows = self.connection.execute('SELECT id FROM ledgers').fetchall()
+            if len(rows) != 1:
+                raise ValueError(f"The store holds {len(rows)} ledgers; name the one to use")
+            return rows[0][0]
+        row = self.connection.execute('SELECT id FROM ledgers WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise KeyError(f"No ledger named '{name}' in {self.path}")
+        return row[0]
+
+    def _account_filter(self, accounts) -> tuple[str, list]:
+        if accounts is None:
+            return '', []
+        accounts = [accounts] if isinstance(accounts, str) else list(accounts)
+        marks = ', '.join('?' * len(accounts))
+        return f' AND account_id IN (SELECT id FROM accounts WHERE name IN ({marks}))', accounts
+
+    def monthly_partials(self, ledger: str = None, start=None, end=None, accounts=None) -> pd.DataFrame:
+        """
+        Same result as DataScrub.monthly_partials over the stored ledger, aggregated in SQL.
+        Whole months are read from the monthly rollup; a range that starts or ends part way
+        through a month sums the entries of those edge months through the (ledger, day) index.
+        Args:
+            ledger: Ledger name; may be omitted when the store holds one ledger.
+            start, end: Optional date range (inclusive).
+            accounts: Optional account name or list of names.
+        Returns:
+            DataFrame with 'Account', 'Type', 'year_month', and 'gaap_amount' columns, sorted by those keys.
+        """
+        with stage('store_partials') as timing:
+            ledger_id = self._ledger_id(ledger)
+            where, params = self._account_filter(accounts)
+            first_day = _day(start) if start is not None else None
+            last_day = _day(end) if end is not None else None
+            parts = []
+            # Whole months inside the range come from the rollup
+            first_month = None if first_day is None else _month_of_day(first_day) + (_day_of_month(first_day) > 1)
+            last_month = None if last_day is None else _month_of_day(last_day) - (not _last_day_of_month(last_day))
+            month_range, month_params = _between('month', first_month, last_month)
+            parts.append((f'SELECT account_id, type_id, month, gaap_cents FROM monthly WHERE ledger_id = ?{month_range}{where}',
+                          [ledger_id] + month_params + params))
+            # Part months at either edge come from the entries
+            for edge_first, edge_last in _edge_ranges(first_day, last_day):
+                day_range, day_params = _between('day', edge_first, edge_last)
+                parts.append((f"""SELECT account_id, type_id, month, SUM(gaap_cents) FROM entries
+                                 WHERE ledger_id = ?{day_range}{where} AND account_id IS NOT NULL AND type_id IS NOT NULL
+                                 GROUP BY account_id, type_id, month""", [ledger_id] + day_params + params))
+            query = ' UNION ALL '.join(sql for sql, _ in parts)
+            partials = pd.read_sql_query(f"""
+                SELECT a.name AS Account, t.name AS Type, p.month AS month, SUM(p.gaap_cents) AS cents
+                FROM ({query}) p JOIN accounts a ON a.id = p.account_id JOIN types t ON t.id = p.type_id
+                GROUP BY a.name, t.name, p.month ORDER BY a.name, t.name, p.month""",
+                self.connection, params=[param for _, params_ in parts for param in params_])
+            timing.rows = len(partials)
+        return pd.DataFrame({
+            'Account': partials['Account'].astype(object),
+            'Type': partials['Type'].astype(object),
+            'year_month': _month_labels(partials['month']),
+            'gaap_amount': partials['cents'].to_numpy(dtype='int64') / 100,
+        })
+
+    def opening_balances(self, ledger: str = None, before=None, accounts=None) -> pd.DataFrame:
+        """
+        Per (Account, Type) GAAP totals in cents of all entries dated before a day: whole months
+        from the rollup plus the days of the day's own month before it.
+        """
+        ledger_id = self._ledger_id(ledger)
+        where, params = self._account_filter(accounts)
+        day = _day(before)
+        month = _month_of_day(day)
+        month_start = int(np.datetime64(month, 'M').astype('datetime64[D]').astype('int64'))
+        return pd.read_sql_query(f"""
+            SELECT a.name AS Account, t.name AS Type, SUM(p.gaap_cents) AS cents FROM (
+                SELECT account_id, type_id, gaap_cents FROM monthly WHERE ledger_id = ? AND month < ?{where}
+                UNION ALL
+                SELECT account_id, type_id, gaap_cents FROM entries
+                WHERE ledger_id = ? AND day >= ? AND day < ?{where} AND account_id IS NOT NULL AND type_id IS NOT NULL
+            ) p JOIN accounts a ON a.id = p.account_id JOIN types t ON t.id = p.type_id
+            GROUP BY a.name, t.name""", self.connection, params=[ledger_id, month] + params + [ledger_id, month_start, day] + params)
+
+    def statements(self, ledger: str = None, start=None, end=None, accounts=None, progress=None) -> tuple:
+        """
+        Income statement and balance sheet from the store, as clean_df would build them.
+        With a start date, balance sheet accounts open with their balance before it and
+        retained earnings include the net income before it.
+        Returns:
+            tuple: (DataFrame for income statement, DataFrame for balance sheet)
+        """
+        partials = self.monthly_partials(ledger, start, end, accounts)
+        opening_income = 0.0
+        if start is not None and len(partials):
+            opening = self.opening_balances(ledger, start, accounts)
+            income, balances = split_df(opening)
+            opening_income = income['cents'].sum() / 100
+            # Opening balances belong to the range's first month, even when it has no entries; zero income
+            # partials give that month an income statement column to carry the opening income
+            first_month = _month_labels([_month_of_day(_day(start))])[0]
+            balances = pd.DataFrame({'Account': balances['Account'], 'Type': balances['Type'],
+                                     'year_month': first_month, 'gaap_amount': balances['cents'] / 100})
+            income_accounts = pd.concat([split_df(partials)[0], income])[['Account', 'Type']].drop_duplicates()
+            zeros = income_accounts.assign(year_month=first_month, gaap_amount=0.0)
+            partials = merge_partials(pd.concat([partials, balances, zeros], ignore_index=True))
+        return build_statements(partials, progress, opening_income)
+
+    def closing_balances(self, ledger: str = None, before=None, accounts=None):
+        """
+        Balance sheet balances at the end of the day before a date, indexed like the balance
+        sheet's rows; the opening balances of statements(ledger, before, ...).
+        Returns:
+            Series, or None without a date or with no entries before it.
+        """
+        if before is None:
+            return None
+        opening = self.opening_balances(ledger, before, accounts)
+        if opening.empty:
+            return None
+        partials = pd.DataFrame({'Account': opening['Account'], 'Type': opening['Type'], 'year_month': 'Opening',
+                                 'gaap_amount': opening['cents'].to_numpy(dtype='int64') / 100})
+        return build_statements(partials)[1].iloc[:, -1]
+
+    def account_history(self, account: str, ledger: str = None, start=None, end=None) -> pd.DataFrame:
+        """
+        Entries of one account in date order with a running GAAP balance, read through the
+        (ledger, account, day) index.
+        Returns:
+            DataFrame with Date, Effect, Account, Amount, Type, Transaction ID and Balance columns.
+        """
+        ledger_id = self._ledger_id(ledger)
+        day_range, day_params = _between('e.day', _day(start) if start is not None else None,
+                                         _day(end) if end is not None else None)
+        history = pd.read_sql_query(f"""
+            SELECT e.day, f.name AS Effect, a.name AS Account, e.cents, t.name AS Type,
+                   e.transaction_id AS "Transaction ID", e.gaap_cents
+            FROM entries e JOIN accounts a ON a.id = e.account_id
+            LEFT JOIN types t ON t.id = e.type_id LEFT JOIN effects f ON f.id = e.effect_id
+            WHERE e.ledger_id = ? AND e.account_id = (SELECT id FROM accounts WHERE name = ?){day_range}
+            ORDER BY e.day, e.row""", self.connection, params=[ledger_id, account] + day_params)
+        opening = 0
+        if start is not None:
+            opening = self.connection.execute("""
+                SELECT COALESCE(SUM(gaap_cents), 0) FROM entries
+                WHERE ledger_id = ? AND account_id = (SELECT id FROM accounts WHERE name = ?) AND day < ?""",
+                (ledger_id, account, _day(start))).fetchone()[0]
+        history.insert(0, 'Date', pd.to_datetime(history.pop('day'), unit='D'))
+        history.insert(3, 'Amount', history.pop('cents') / 100)
+        history['Balance'] = (opening + history.pop('gaap_cents').cumsum()) / 100
+        return history
+
+    def transaction(self, transaction_id, ledger: str = None) -> pd.DataFrame:
+        """
+        All entries sharing a Transaction ID, through the (ledger, Transaction ID) index.
+        """
+        ledger_id = self._ledger_id(ledger)
+        rows = pd.read_sql_query("""
+            SELECT e.day, f.name AS Effect, a.name AS Account, e.cents, t.name AS Type, e.transaction_id AS "Transaction ID"
+            FROM entries e LEFT JOIN accounts a ON a.id = e.account_id
+            LEFT JOIN types t ON t.id = e.type_id LEFT JOIN effects f ON f.id = e.effect_id
+            WHERE e.ledger_id = ? AND e.transaction_id = ? ORDER BY e.row""", self.connection, params=[ledger_id, transaction_id])
+        rows.insert(0, 'Date', pd.to_datetime(rows.pop('day'), unit='D'))
+        rows.insert(3, 'Amount', rows.pop('cents') / 100)
+        return rows
+
+def _day_of_month(day: int) -> int:
+    return int((np.datetime64(day, 'D') - np.datetime64(day, 'D').astype('datetime64[M]')).astype('int64')) + 1
+
+def _last_day_of_month(day: int) -> bool:
+    return _month_of_day(day + 1) != _month_of_day(day)
+
+def _between(column: str, first, last) -> tuple[str, list]:
+    """
+    SQL condition (with leading AND) and parameters for first <= column <= last; either bound may be None.
+    """
+    sql, params = '', []
+    if first is not None:
+        sql, params = sql + f' AND {column} >= ?', params + [first]
+    if last is not None:
+        sql, params = sql + f' AND {column} <= ?', params + [last]
+    return sql, params
+
+def _edge_ranges(first_day, last_day) -> list:
+    """
+    Day ranges of the part months at the start and end of [first_day, last_day] that the
+    monthly rollup cannot answer.
+    """
+    if first_day is not None and last_day is not None and _month_of_day(first_day) == _month_of_day(last_day):
+        whole = _day_of_month(first_day) == 1 and _last_day_of_month(last_day)
+        return [] if whole else [(first_day, last_day)]
+    edges = []
+    if first_day is not None and _day_of_month(first_day) > 1:
+        month_end = int((np.datetime64(_month_of_day(first_day) + 1, 'M').astype('datetime64[D]')).astype('int64')) - 1
+        edges.append((first_day, month_end))
+    if last_day is not None and not _last_day_of_month(last_day):
+        month_start = int(np.datetime64(_month_of_day(last_day), 'M').astype('datetime64[D]').astype('int64'))
+        edges.append((month_start, last_day))
+    return edges
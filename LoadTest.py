@@ -0,0 +1,86 @@
+import asyncio
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+# HTTP load test for ReportServer.
+# Opens many concurrent keep-alive connections (asyncio streams, no extra packages), each
+# sending requests back to back over the given URLs in turn, and reports throughput and
+# latency percentiles. The first requests of a cold server show coalescing: every client
+# waits on the same computation instead of starting its own.
+#
+# Usage: python LoadTest.py http://127.0.0.1:8765/ledgers/acme/income-statement.html [more URLs] --clients 100 --requests 10000
+
+async def fetch(reader, writer, host: str, target: str) -> tuple:
+    """
+    One GET on an open keep-alive connection.
+    Returns:
+        tuple: (status code, body length)
+    """
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+    status = int(head.split(' ', 2)[1])
+    length = next(int(line.split(':', 1)[1]) for line in head.split('\r\n') if line.lower().startswith('content-length:'))
+    await reader.readexactly(length)
+    return status, length
+
+async def client(urls: list, count: int, start: int, latencies: list, errors: list):
+    """
+    Sends count requests on one connection, cycling through urls from position start.
+    """
+    url = urlsplit(urls[0])
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    try:
+        for i in range(count):
+            target = urlsplit(urls[(start + i) % len(urls)])
+            path = target.path + (f'?{target.query}' if target.query else '')
+            began = time.perf_counter()
+            try:
+                status, _ = await fetch(reader, writer, target.netloc, path or '/')
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                errors.append(repr(e))
+                return
+            latencies.append(time.perf_counter() - began)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+async def load_test(urls: list, clients: int = 50, requests: int = 5000) -> dict:
+    """
+    Runs the load test.
+    Args:
+        urls: URLs on one server; requests cycle through them.
+        clients: Concurrent connections.
+        requests: Total requests, split evenly between the clients.
+    Returns:
+        dict with 'requests', 'errors', 'seconds', 'rps' and latency percentiles in milliseconds
+        ('p50', 'p90', 'p99', 'max').
+    """
+    latencies, errors = [], []
+    per_client = [requests // clients + (i < requests % clients) for i in range(clients)]
+    began = time.perf_counter()
+    await asyncio.gather(*(client(urls, count, i, latencies, errors) for i, count in enumerate(per_client) if count))
+    seconds = time.perf_counter() - began
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {'requests': len(latencies), 'errors': len(errors), 'seconds': seconds,
+            'rps': len(latencies) / seconds if seconds else 0.0,
+            'p50': cuts[49] * 1000, 'p90': cuts[89] * 1000, 'p99': cuts[98] * 1000, 'max': max(latencies, default=0) * 1000}
+
+def format_result(result: dict) -> str:
+    return (f"{result['requests']:,} requests, {result['errors']} errors in {result['seconds']:.2f}s: "
+            f"{result['rps']:,.0f} req/s, p50 {result['p50']:.1f}ms, p90 {result['p90']:.1f}ms, "
+            f"p99 {result['p99']:.1f}ms, max {result['max']:.1f}ms")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Load test a ReportServer with concurrent keep-alive clients.")
+    parser.add_argument('urls', nargs='+', help="URLs to request, in turn.")
+    parser.add_argument('--clients', type=int, default=50, help="Concurrent connections. Default: 50.")
+    parser.add_argument('--requests', type=int, default=5000, help="Total requests. Default: 5000.")
+    args = parser.parse_args()
+    result = asyncio.run(load_test(args.urls, args.clients, args.requests))
+    print(format_result(result))
+    sys.exit(1 if result['errors'] else 0)
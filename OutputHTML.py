@@ -1,23 +1,46 @@
-import pandas as pd
+import html
+import os
+import sys
 from datetime import datetime
-from csvLoaderGUI import csv_loader
-from DataScrub import clean_df
+import numpy as np
+import pandas as pd
+from Profiling import stage
+
+# Two renderers:
+# - 'stream' (default) writes rows straight to the file. Numbers are formatted once per
+#   distinct value and the look comes from one class-based stylesheet, so output size and
+#   time grow with the number of cells only, not with Styler's per-cell ids and CSS.
+# - 'styler' is the original DataFrame.style path;
+#   may need to pip install Jinja2 if pandas styler import errors
+RENDERERS = ['stream', 'styler']
 
-# may need to pip install Jinja2 if pandas styler import errors
+REPORT_CSS = """table.report { border-collapse: collapse; width: 100%; border: 1px solid #ccc;
+  font-family: Helvetica, Arial, sans-serif; font-size: 14px; }
+table.report caption { font-weight: bold; padding: 10px; }
+table.report th, table.report td { padding: 10px; text-align: right; }
+table.report thead th { background-color: #f0f0f0; color: #333; font-weight: bold; border-bottom: 2px solid #999; }
+table.report tbody th { text-align: left; font-weight: normal; }
+table.report td { border: 1px dotted #ccc; }
+table.report tr.section th { font-weight: bold; background-color: #fafafa; }
+table.report tr.total th, table.report tr.total td { font-weight: bold; border-top: 1px solid #999; }"""
 
 # Set day for file naming
 today = datetime.today().strftime('%Y%m%d_%H%M%S')
 
 # Function to export DataFrame to HTML with boring style and easy exporting
-def style_tables(dfs, titles):
+def style_tables(dfs, titles, out_dir='.', renderer: str = 'stream'):
     """
     Styles and exports DataFrames to HTML files with custom formatting.
     Args:
         dfs (list of pd.DataFrame): List of DataFrames to style and export.
         titles (list of str): List of titles for each DataFrame.
+        out_dir (str): Directory for the HTML files.
+        renderer (str): 'stream' for write_html, or 'styler' for DataFrame.style.
     Returns:
-        None. Files are exported to HTML with the specified titles.
+        list of str: Paths of the exported HTML files, named after the titles.
     """
+    if renderer not in RENDERERS:
+        raise ValueError(f"Unknown HTML renderer '{renderer}', expected one of {RENDERERS}")
 
     def zero_to_empty(val):
         if isinstance(val, (int, float)) and val == 0:
@@ -25,41 +48,124 @@ def style_tables(dfs, titles):
         return f'{val:,.2f}'  # Format with commas and 2 decimal places
 
     # Apply styling to the DataFrame
-
+    paths = []
     for df, title in zip(dfs, titles):
-        (df.style
-            .set_properties(**{
-                'text-align': 'right',
-                'font-family': 'Helvetica, Arial, sans-serif',
-                'font-size': '14px',
-                'padding': '10px'
-            })
-            .format(zero_to_empty, na_rep='')
-            .set_table_styles([
-                # General table styles
-                {'selector': '', 'props': [
-                    ('border-collapse', 'collapse'), 
-                    ('width', '100%'),
-                    ('border', '1px solid #ccc')
-                ]},
-                # Header styles
-                {'selector': 'th', 'props': [
-                    ('background-color', '#f0f0f0'),  # Light grey background for headers
-                    ('color', '#333'),  # Dark grey text for headers
-                    ('font-weight', 'bold'),
-                    ('border-bottom', '2px solid #999'),  # Darker line under headers
-                    ('text-align', 'right')
-                ]},
-                # Data cell styles
-                {'selector': 'td', 'props': [
-                    ('border', '1px dotted #ccc') # Subtle dotted borders around cells
-                ]},
-            ])
-            .set_caption(title)
-            .to_html(f'{title} {today}.html')
-        )
+        path = os.path.join(out_dir, f'{title} {today}.html')
+        with stage('style_tables', rows=len(df)):
+            if renderer == 'stream':
+                write_html(df, title, path)
+            else:
+                _styled_html(df, title, zero_to_empty, path)
+        paths.append(path)
+    return paths
+
+def _styled_html(df, title, zero_to_empty, path):
+    """
+    Writes one styled DataFrame to path.
+    """
+    (df.style
+        .set_properties(**{
+            'text-align': 'right',
+            'font-family': 'Helvetica, Arial, sans-serif',
+            'font-size': '14px',
+            'padding': '10px'
+        })
+        .format(zero_to_empty, na_rep='')
+        .set_table_styles([
+            # General table styles
+            {'selector': '', 'props': [
+                ('border-collapse', 'collapse'), 
+                ('width', '100%'),
+                ('border', '1px solid #ccc')
+            ]},
+            # Header styles
+            {'selector': 'th', 'props': [
+                ('background-color', '#f0f0f0'),  # Light grey background for headers
+                ('color', '#333'),  # Dark grey text for headers
+                ('font-weight', 'bold'),
+                ('border-bottom', '2px solid #999'),  # Darker line under headers
+                ('text-align', 'right')
+            ]},
+            # Data cell styles
+            {'selector': 'td', 'props': [
+                ('border', '1px dotted #ccc') # Subtle dotted borders around cells
+            ]},
+        ])
+        .set_caption(title)
+        .to_html(path)
+    )
+
+def format_cells(values) -> np.ndarray:
+    """
+    Formats a numeric array as '1,234.56' strings, blanking zeros and NaN.
+    Each distinct value is formatted once and the strings are gathered by code.
+    """
+    values = np.asarray(values, dtype='float64')
+    codes, uniques = pd.factorize(values.ravel())  # NaN gets code -1
+    strings = np.array([f'{val:,.2f}' if val != 0 else '' for val in uniques] + [''], dtype=object)
+    return strings[codes].reshape(values.shape)
+
+def _row_labels(index) -> tuple[list, list]:
+    """
+    Section (first level) and row (last level) labels of an index; sections are '' for a flat index.
+    """
+    if isinstance(index, pd.MultiIndex):
+        return [str(val) for val in index.get_level_values(0)], [str(val) for val in index.get_level_values(-1)]
+    return [''] * len(index), [str(val) for val in index]
+
+def write_html(df, title, path, chunk_rows: int = 256):
+    """
+    Streams a statement to an HTML file.
+    A MultiIndex is shown as section header rows: a new first-level label (e.g. 'Assets')
+    opens a section, and rows with an empty first level ('Total Assets') are totals.
+    A section holding one row with its own name ('Net Income') is shown as a total.
+    Args:
+        df: Statement DataFrame with numeric columns.
+        title: Table caption and page title.
+        path: Output file, or an open text stream (e.g. io.StringIO) to write to.
+        chunk_rows: Rows formatted and written per batch.
+    """
+    if hasattr(path, 'write'):
+        _write_html(df, title, path, chunk_rows)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            _write_html(df, title, f, chunk_rows)
+
+def _write_html(df, title, f, chunk_rows):
+    sections, labels = _row_labels(df.index)
+    multi = isinstance(df.index, pd.MultiIndex)
+    width = len(df.columns) + 1
+    row_header = df.index.names[-1] or ''
+    f.write(f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>{html.escape(title)}</title>\n'
+            f'<style>\n{REPORT_CSS}\n</style>\n</head>\n<body>\n<table class="report">\n'
+            f'<caption>{html.escape(title)}</caption>\n<thead>\n<tr><th>{html.escape(str(row_header))}</th>')
+    f.write(''.join(f'<th>{html.escape(str(col))}</th>' for col in df.columns))
+    f.write('</tr>\n</thead>\n<tbody>\n')
+    current = None
+    for start in range(0, len(df), chunk_rows):
+        cells = format_cells(df.iloc[start:start + chunk_rows].to_numpy(dtype='float64', na_value=np.nan))
+        lines = []
+        for offset, row in enumerate(cells):
+            i = start + offset
+            section, label = sections[i], labels[i]
+            single = section == label and (i + 1 == len(df) or sections[i + 1] != section)
+            if section and section != current and not single:
+                lines.append(f'<tr class="section"><th colspan="{width}">{html.escape(section)}</th></tr>\n')
+            current = section or current
+            css = ' class="total"' if multi and (not section or single) else ''
+            lines.append(f'<tr{css}><th>{html.escape(label)}</th><td>' + '</td><td>'.join(row) + '</td></tr>\n')
+        f.writelines(lines)
+    f.write('</tbody>\n</table>\n</body>\n</html>\n')
 
 if __name__ == "__main__":
-    ic, bs = clean_df(csv_loader())
-    table_names = ["Income Statement", "Balance Sheet"]
-    style_tables([ic, bs], table_names)
\ No newline at end of file
+    from csvLoaderGUI import csv_loader
+    from accountpy import STATEMENT_TITLES, load_statements, with_cash_flow
+    if '--stream' in sys.argv:
+        mode = 'stream'  # Large ledgers: read in chunks
+    elif '--incremental' in sys.argv:
+        mode = 'incremental'  # Only read rows appended since the last run
+    else:
+        mode = 'cached'
+    # Statements already computed for this ledger (e.g. by the Tk viewer) come from ReportCache
+    statements = with_cash_flow(csv_loader(reader=lambda file_path: load_statements(file_path, mode)))
+    style_tables(statements, STATEMENT_TITLES, renderer='styler' if '--styler' in sys.argv else 'stream')
\ No newline at end of file
@@ -0,0 +1,159 @@
+import os
+from datetime import datetime
+from functools import lru_cache
+from Profiling import profiled
+
+# reportlab is imported inside write_pdf so importing this module stays cheap
+# and headless runs that only need HTML never load it.
+
+# Set day for file naming
+today = datetime.today().strftime('%Y%m%d_%H%M%S')
+
+HEADER_FONT = 'Helvetica-Bold'
+CELL_FONT = 'Helvetica'
+HEADER_FONT_SIZE = 12
+CELL_FONT_SIZE = 10
+HEADER_ROW_HEIGHT = HEADER_FONT_SIZE * 1.2 + 3 + 12  # leading + top padding + bottom padding
+CELL_ROW_HEIGHT = CELL_FONT_SIZE * 1.2 + 3 + 3
+TITLE_HEIGHT = 80  # title paragraph plus the spacing after it
+
+def display_column(values):
+    """
+    Formats one DataFrame column (or a slice of it) for display, blanking zeros.
+    Numeric columns are handled with whole-array operations.
+    """
+    import numpy as np
+    if values.dtype.kind in 'iuf':
+        return np.where(values == 0, '', values.astype(str)).tolist()
+    return ['' if isinstance(val, (int, float)) and val == 0 else val for val in values.tolist()]
+
+@lru_cache(maxsize=65536)
+def text_width(text, font_name, font_size):
+    """
+    Width of a string in points, cached per distinct (string, font, size).
+    """
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return stringWidth(text, font_name, font_size)
+
+def column_width(header, cells):
+    """
+    Widest of the header (bold) and the distinct cell strings, plus 10 points of padding.
+    """
+    widths = [text_width(str(header), HEADER_FONT, HEADER_FONT_SIZE)]
+    widths += [text_width(str(val), CELL_FONT, CELL_FONT_SIZE) for val in set(cells)]
+    return max(widths) + 10
+
+def page_chunks(rows, first_page_rows, page_rows):
+    """
+    Splits rows into page-sized lists; the first page has room for fewer rows because of the title.
+    """
+    yield rows[:first_page_rows]
+    for start in range(first_page_rows, len(rows), page_rows):
+        yield rows[start:start + page_rows]
+
+# todo:
+# write_pdf function has left and right margins running off the page, need to adjust
+@profiled('write_pdf')
+def write_pdf(df, title, file_path):
+    """
+    Write a DataFrame to a PDF file with a table.
+    Long tables are split into one Table per page, each with the header row repeated,
+    so reportlab's layout cost stays linear in the number of rows.
+
+    Args:
+        df (pandas.DataFrame): DataFrame to export.
+        title (str): Title shown as the PDF header.
+        file_path (str): Path of the PDF file to write.
+    """
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, PageBreak
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+
+    # Use landscape orientation
+    page_size = landscape(letter)  # 792 x 612 points
+    doc = SimpleDocTemplate(
+        file_path,
+        pagesize=page_size,
+        leftMargin=0.25 * inch,
+        rightMargin=0.25 * inch,
+        topMargin=0.25 * inch,
+        bottomMargin=0.25 * inch
+    )
+    elements = []
+
+    # Add title as a header
+    styles = getSampleStyleSheet()
+    title_style = styles['Heading1']
+    title_style.alignment = 1  # Center alignment
+    title_paragraph = Paragraph(title, title_style)
+    elements.append(title_paragraph)
+    elements.append(Paragraph("<br/>", styles['Normal']))  # Add spacing after title
+
+    # Handle empty DataFrame
+    if df.empty:
+        elements.append(Paragraph("No data available.", styles['Normal']))
+    else:
+        # Prepare data for table column by column, replacing zeros with empty strings
+        headers = df.columns.tolist()
+        columns = [display_column(df[col].to_numpy()) for col in df.columns]
+
+        # Calculate dynamic column widths based on content, measuring each distinct string once
+        page_width = page_size[0] - (doc.leftMargin + doc.rightMargin)  # Available width
+        col_widths = [column_width(header, cells) for header, cells in zip(headers, columns)]
+
+        # Scale widths to fit page if total exceeds page width
+        total_width = sum(col_widths)
+        if total_width > page_width:
+            scale_factor = page_width / total_width
+            col_widths = [w * scale_factor for w in col_widths]
+
+        # Table style shared by every page
+        table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), HEADER_FONT),
+            ('FONTSIZE', (0, 0), (-1, 0), HEADER_FONT_SIZE),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+            ('FONTNAME', (0, 1), (-1, -1), CELL_FONT),
+            ('FONTSIZE', (0, 1), (-1, -1), CELL_FONT_SIZE),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BOX', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ])
+
+        # One table per page, each starting with the header row
+        table_height = page_size[1] - (doc.topMargin + doc.bottomMargin) - HEADER_ROW_HEIGHT
+        page_rows = max(1, int(table_height // CELL_ROW_HEIGHT) - 1)
+        first_page_rows = max(1, int((table_height - TITLE_HEIGHT) // CELL_ROW_HEIGHT) - 1)
+        rows = list(zip(*columns))
+        for page_num, chunk in enumerate(page_chunks(rows, first_page_rows, page_rows)):
+            if page_num:
+                elements.append(PageBreak())
+            table = Table([headers] + chunk, colWidths=col_widths, repeatRows=1)
+            table.setStyle(table_style)
+            elements.append(table)
+
+    # Build PDF
+    doc.build(elements)
+
+def export_pdfs(dfs, titles, out_dir='.'):
+    """
+    Writes each DataFrame to '<title> <timestamp>.pdf' in out_dir.
+    Args:
+        dfs (list of pd.DataFrame): DataFrames to export.
+        titles (list of str): Title for each DataFrame.
+        out_dir (str): Directory for the PDF files.
+    Returns:
+        list of str: Paths of the written files.
+    """
+    paths = []
+    for df, title in zip(dfs, titles):
+        path = os.path.join(out_dir, f'{title} {today}.pdf')
+        write_pdf(df, title, path)
+        paths.append(path)
+    return paths
@@ -0,0 +1,192 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+# Per-stage timing and memory instrumentation.
+# Pipeline stages are wrapped in `with stage('name', rows=...)`. When profiling is off,
+# stage() returns a shared no-op context, so the hooks cost one function call each.
+# When it is on, every stage records wall time, CPU time, peak traced memory and row
+# count, and the run is appended as one JSON line to the trace file at exit, so traces
+# from many runs can be aggregated with summarize_trace.
+# tracemalloc's peak is process-wide, so a stage's peak is only recorded while no other
+# thread has a stage open; stages that overlap another thread's get peak_bytes None.
+#
+# Enable with ACCOUNTPY_PROFILE=trace.jsonl, `accountpy --profile trace.jsonl ...`, or enable().
+# Usage: python Profiling.py trace.jsonl   (per-stage summary across runs)
+
+_trace_path = None
+_records = []
+_local = threading.local()  # stack of open stages per thread (the Tk viewer computes on a worker)
+_started = None
+_lock = threading.Lock()
+_open = {}      # thread id -> number of open stages, for every thread with one
+_overlaps = 0   # bumped whenever a thread opens a stage while another thread has one open
+
+class _NullStage:
+    """
+    Returned by stage() when profiling is off; accepts and ignores everything.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    __slots__ = ('name', 'rows', 'parent', 'wall', 'cpu', 'start_memory', 'peak', 'shared', 'overlaps')
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        global _overlaps
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        me = threading.get_ident()
+        with _lock:
+            self.shared = any(count for thread, count in _open.items() if thread != me)
+            if self.shared and not stack:
+                _overlaps += 1
+            _open[me] = len(stack) + 1
+            self.overlaps = _overlaps
+            self.start_memory = self.peak = 0
+            if not self.shared:
+                current, peak = tracemalloc.get_traced_memory()
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, peak)  # the enclosing stage keeps its peak so far
+                tracemalloc.reset_peak()
+                self.start_memory, self.peak = current, current
+        stack.append(self)
+        self.cpu = time.thread_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        stack = _stack()
+        stack.pop()
+        me = threading.get_ident()
+        with _lock:
+            self.shared = self.shared or self.overlaps != _overlaps
+            if not self.shared:
+                self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            if stack:
+                _open[me] = len(stack)
+            else:
+                del _open[me]
+        if stack:
+            stack[-1].peak = max(stack[-1].peak, self.peak)
+            stack[-1].shared = stack[-1].shared or self.shared
+        _records.append({
+            'stage': self.name,
+            'parent': self.parent,
+            'thread': threading.current_thread().name,
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_bytes': None if self.shared else self.peak - self.start_memory,
+            'rows': self.rows,
+            'error': exc_type.__name__ if exc_type else None,
+        })
+        return False
+
+def _stack() -> list:
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def enabled() -> bool:
+    return _trace_path is not None
+
+def enable(trace_path: str):
+    """
+    Turns profiling on for the rest of the process; the trace is written at exit.
+    Args:
+        trace_path: JSON Lines file the run is appended to.
+    """
+    global _trace_path, _started
+    if _trace_path is None:
+        atexit.register(write_trace)
+    _trace_path, _started = trace_path, datetime.now().isoformat(timespec='seconds')
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def stage(name: str, rows: int = None):
+    """
+    Context manager timing one pipeline stage. The row count can also be set
+    inside the block with `as s: ... s.rows = n`.
+    """
+    if _trace_path is None:
+        return _NULL_STAGE
+    return _Stage(name, rows)
+
+def profiled(name: str):
+    """
+    Decorator form of stage(), for exporters and other whole functions.
+    """
+    def wrap(func):
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        wrapper.__name__, wrapper.__doc__, wrapper.__wrapped__ = func.__name__, func.__doc__, func
+        return wrapper
+    return wrap
+
+def write_trace():
+    """
+    Appends this run's stage records to the trace file as one JSON object and clears them.
+    """
+    if _trace_path is None or not _records:
+        return
+    run = {
+        'started': _started,
+        'pid': os.getpid(),
+        'argv': sys.argv,
+        'stages': list(_records),
+    }
+    with open(_trace_path, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+    _records.clear()
+
+def summarize_trace(trace_path):
+    """
+    Aggregates a trace file across runs.
+    Returns:
+        pandas DataFrame with one row per stage: runs, calls, total/median wall and CPU seconds,
+        max peak bytes (over calls that ran alone) and total rows, sorted by total wall time.
+    """
+    import pandas as pd
+    with open(trace_path) as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    records = pd.DataFrame([dict(record, run=i) for i, run in enumerate(runs) for record in run['stages']])
+    if records.empty:
+        return records
+    summary = records.groupby('stage').agg(
+        runs=('run', 'nunique'), calls=('wall_s', 'size'),
+        wall_s=('wall_s', 'sum'), median_wall_s=('wall_s', 'median'),
+        cpu_s=('cpu_s', 'sum'), median_cpu_s=('cpu_s', 'median'),
+        max_peak_mb=('peak_bytes', lambda b: b.max() / 2**20), rows=('rows', lambda r: r.sum(min_count=1)))
+    return summary.sort_values('wall_s', ascending=False).round(4)
+
+if os.environ.get('ACCOUNTPY_PROFILE'):
+    enable(os.environ['ACCOUNTPY_PROFILE'])
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python Profiling.py trace.jsonl", file=sys.stderr)
+        sys.exit(2)
+    print(summarize_trace(sys.argv[1]).to_string())
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from LedgerCache import CACHE_DIR, file_fingerprint, known_fingerprint
+
+# Memoized statements keyed by ledger content and report options.
+# Statements are looked up in an in-process LRU first, then in an optional directory of
+# pickles shared between runs (so the Tk viewer, HTML export and PDF export of the same
+# ledger compute clean_df once). Both levels are bounded in bytes and evict the least
+# recently used entries. A changed ledger gets a new content hash, so stale entries are
+# never returned; they simply age out.
+#
+# ACCOUNTPY_REPORT_CACHE_MB sets the on-disk limit (default 256, 0 disables the disk cache).
+
+CACHE_VERSION = 2  # bump when the statement layout changes so old pickles are ignored
+MEMORY_LIMIT = 128 * 2**20
+DISK_LIMIT = int(float(os.environ.get('ACCOUNTPY_REPORT_CACHE_MB', 256)) * 2**20)
+REPORT_DIR = os.path.join(CACHE_DIR, 'reports')
+
+def statements_nbytes(statements) -> int:
+    """
+    Approximate in-memory size of a tuple of statement DataFrames.
+    """
+    return sum(int(df.memory_usage(deep=True).sum()) + int(df.index.memory_usage(deep=True)) for df in statements)
+
+class ReportCache:
+    """
+    Two-level, size-bounded cache of computed statements.
+
+    Args:
+        memory_limit: Bytes of statements kept in process.
+        disk_dir: Directory for pickled statements, or None for memory only.
+        disk_limit: Bytes of pickles kept in disk_dir.
+    """
+
+    def __init__(self, memory_limit: int = MEMORY_LIMIT, disk_dir: str = REPORT_DIR, disk_limit: int = DISK_LIMIT):
+        self.memory_limit = memory_limit
+        self.disk_dir = disk_dir if disk_limit > 0 else None
+        self.disk_limit = disk_limit
+        self.entries = OrderedDict()  # key -> (statements, nbytes), least recently used first
+        self.nbytes = 0
+        self.fingerprints = {}  # absolute path -> file_fingerprint, so unchanged files are not rehashed
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()  # the Tk viewer computes on a worker thread
+
+    def key(self, file_path, options: dict = None) -> str:
+        """
+        Cache key for a ledger file and report options: the file's content hash plus the options.
+        """
+        path = os.path.abspath(file_path)
+        fingerprint = file_fingerprint(path, self.fingerprints.get(path) or known_fingerprint(path))
+        self.fingerprints[path] = fingerprint
+        options = sorted((options or {}).items())
+        return hashlib.blake2b(repr((CACHE_VERSION, fingerprint['hash'], options)).encode(), digest_size=20).hexdigest()
+
+    def get(self, key: str):
+        """
+        Statements stored under key, or None. Disk hits are promoted to memory.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+        statements = self._read_disk(key)
+        if statements is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._remember(key, statements)
+        return statements
+
+    def put(self, key: str, statements):
+        """
+        Stores statements in memory and, if enabled, on disk.
+        """
+        statements = tuple(statements)
+        self._remember(key, statements)
+        self._write_disk(key, statements)
+
+    def statements(self, file_path, compute, options: dict = None):
+        """
+        Cached statements for a ledger, calling compute() on a miss.
+        Returned DataFrames are copies, so callers may modify them freely.
+        Args:
+            file_path: Path to the ledger file; its content is part of the key.
+            compute: Callable returning the statements tuple.
+            options: Report options that change the result (part of the key).
+        Returns:
+            tuple of DataFrames.
+        """
+        key = self.key(file_path, options)
+        statements = self.get(key)
+        if statements is None:
+            statements = tuple(compute())
+            self.put(key, statements)
+        return tuple(df.copy() for df in statements)
+
+    def clear(self):
+        """
+        Empties the in-process cache. Pickles on disk are left in place.
+        """
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def _remember(self, key, statements):
+        size = statements_nbytes(statements)
+        if size > self.memory_limit:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key)[1]
+            self.entries[key] = (statements, size)
+            self.nbytes += size
+            while self.nbytes > self.memory_limit:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                statements = pickle.load(f)
+            os.utime(path)  # mtime doubles as the last-used time for eviction
+            return statements
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def _write_disk(self, key, statements):
+        if self.disk_dir is None:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            tmp_path = f"{self._disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(statements, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+            self._evict_disk()
+        except OSError:
+            pass  # the disk cache is best effort
+
+    def _evict_disk(self):
+        """
+        Removes the least recently used pickles until the directory fits in disk_limit.
+        """
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.pkl'):
+                stat = entry.stat()
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_limit:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+default_cache = ReportCache()
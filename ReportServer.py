@@ -0,0 +1,361 @@
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, unquote, urlsplit
+import pandas as pd
+from BalanceIndex import PERIODS
+from ReportCache import statements_nbytes
+from accountpy import STATEMENT_TITLES
+
+# Local report service: one process loads each ledger once and serves its statements to
+# everyone on the network, instead of every accountant running clean_df on their own copy.
+# Built on asyncio streams only (no web framework), speaking plain HTTP/1.1 with keep-alive.
+#
+# - Scrubbing and rendering are CPU-bound and run on a process pool, so the event loop only
+#   parses requests and writes cached bytes.
+# - Concurrent requests for the same result share one computation: the first starts it and
+#   the rest await the same future.
+# - Results are kept in memory until the ledger file's size or mtime changes, in an LRU bounded
+#   in bytes like ReportCache's. Workers go through ReportCache, so statements also survive a
+#   server restart.
+# - A worker that dies (out of memory, segfault) breaks the pool; it is replaced and the
+#   calls it was running are retried once on the new one, so one bad request costs one 500.
+#   Workers are not forked from the server (forkserver, or spawn where that is missing), so they
+#   do not inherit its sockets and a closed connection really closes.
+#
+# Routes (GET):
+#   /                                        index of ledgers and routes (JSON)
+#   /stats                                   cache and coalescing counters (JSON)
+#   /ledgers/<name>/<statement>.<html|json>  statement is income-statement, balance-sheet or cash-flow;
+#                                            optional ?period=Q&start=2024-01-01&end=2024-12-31&fiscal_year_start=4
+#   /ledgers/<name>/forecast.html            cash forecast calendar, ?years=1; needs --schedules
+#
+# Usage: python ReportServer.py ledgers/ --port 8765 [--schedules acme=schedules.csv] [--workers 4]
+#        python LoadTest.py http://127.0.0.1:8765/ledgers/acme/income-statement.html --clients 100
+
+STATEMENTS = {'income-statement': 0, 'balance-sheet': 1, 'cash-flow': 2}
+FORMATS = {'html': 'text/html; charset=utf-8', 'json': 'application/json'}
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+          431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+MAX_HEADER_BYTES = 64 * 1024
+RESULT_LIMIT = 256 * 2**20  # bytes of statements and response bodies kept in memory
+
+class HTTPError(Exception):
+    """
+    Raised while handling a request to answer with an error status.
+    """
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+# --- Work done on the process pool ---
+def ledger_statements(file_path, options: dict) -> tuple:
+    """
+    Income statement, balance sheet and statement of cash flows of a ledger; with options,
+    for a date range and period (see accountpy.load_period_statements).
+    """
+    from accountpy import load_period_statements, load_statements, with_cash_flow
+    if options:
+        return load_period_statements(file_path, options.get('start'), options.get('end'), options.get('period', 'M'),
+                                      options.get('fiscal_year_start', 1))
+    return with_cash_flow(load_statements(file_path))
+
+def render_statement(df, title: str, fmt: str) -> bytes:
+    """
+    One statement as an HTML page (OutputHTML.write_html) or as JSON: the title plus
+    pandas' 'split' layout (columns, index as [section, account] pairs, data).
+    """
+    if fmt == 'html':
+        from OutputHTML import write_html
+        page = io.StringIO()
+        write_html(df, title, page)
+        return page.getvalue().encode('utf-8')
+    return ('{"title":' + json.dumps(title) + ',' + df.to_json(orient='split')[1:]).encode('utf-8')
+
+def render_forecast(file_path, schedules_path, years: int) -> bytes:
+    from accountpy import forecast_html
+    return forecast_html(file_path, schedules_path, years).encode('utf-8')
+
+class ReportServer:
+    """
+    Serves statements for a fixed set of ledgers.
+
+    Args:
+        ledgers (dict): Ledger name -> CSV path.
+        schedules (dict): Ledger name -> recurring schedules CSV, for forecasts.
+        workers (int): Process pool size; defaults to the number of CPUs.
+        executor: Executor to use instead of a new process pool.
+        memory_limit (int): Bytes of cached results; least recently used ones are evicted beyond it.
+    """
+
+    def __init__(self, ledgers: dict, schedules: dict = None, workers: int = None, executor=None,
+                 memory_limit: int = RESULT_LIMIT):
+        self.ledgers = dict(ledgers)
+        self.schedules = dict(schedules or {})
+        self.workers = workers
+        self.executor = executor or self.new_pool()
+        self.versions = {}  # ledger name -> (size, mtime_ns) the cached results belong to
+        self.memory_limit = memory_limit
+        self.results = OrderedDict()  # (name, version, ...) -> (statements tuple or response body, nbytes), least recently used first
+        self.nbytes = 0
+        self.pending = {}  # same keys -> future of a computation in progress
+        self.hits = self.misses = self.coalesced = 0
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765):
+        """
+        Starts listening; returns the asyncio.Server.
+        """
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+
+    def new_pool(self) -> ProcessPoolExecutor:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Cache ---
+    def version(self, name: str) -> tuple:
+        """
+        Current version of a ledger file; cached results of older versions are dropped.
+        """
+        if name not in self.ledgers:
+            raise HTTPError(404, f"Unknown ledger '{name}'")
+        try:
+            stat = os.stat(self.ledgers[name])
+        except OSError as e:
+            raise HTTPError(404, f"Ledger '{name}' is not readable: {e.strerror}")
+        version = (stat.st_size, stat.st_mtime_ns)
+        if self.versions.get(name) != version:
+            self.versions[name] = version
+            for key in [key for key in self.results if key[0] == name]:
+                self.nbytes -= self.results.pop(key)[1]
+        return version
+
+    async def cached(self, key: tuple, compute):
+        """
+        Result stored under key, or the result of compute(), a coroutine function. Concurrent
+        callers with the same key share one call; failures are not cached.
+        """
+        entry = self.results.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return entry[0]
+        future = self.pending.get(key)
+        if future is None:
+            self.misses += 1
+            future = self.pending[key] = asyncio.ensure_future(compute())
+            future.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)  # a client hanging up must not cancel the shared computation
+
+    def _finished(self, key, future):
+        self.pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None and key[1] == self.versions.get(key[0]):
+            self._remember(key, future.result())
+
+    def _remember(self, key, result):
+        size = len(result) if isinstance(result, bytes) else statements_nbytes(result)
+        if size > self.memory_limit:
+            return
+        self.results[key] = (result, size)
+        self.nbytes += size
+        while self.nbytes > self.memory_limit:
+            _, (_, evicted) = self.results.popitem(last=False)
+            self.nbytes -= evicted
+
+    async def run(self, func, *args):
+        """
+        func(*args) on the worker pool, replacing the pool and retrying once if a worker died.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            if self.executor is executor:  # the first caller to notice replaces it
+                print("Worker pool broke; starting a new one", file=sys.stderr)
+                self.executor = self.new_pool()
+                executor.shutdown(wait=False, cancel_futures=True)
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    # --- Routes ---
+    async def statement(self, name: str, statement: str, fmt: str, options: dict) -> bytes:
+        version = self.version(name)
+        option_key = tuple(sorted(options.items()))
+
+        async def render():
+            statements = await self.cached((name, version, 'statements', option_key),
+                                           lambda: self.run(ledger_statements, self.ledgers[name], options))
+            df = statements[STATEMENTS[statement]]
+            title = f"{name} {STATEMENT_TITLES[STATEMENTS[statement]]}"
+            return await self.run(render_statement, df, title, fmt)
+        return await self.cached((name, version, statement, fmt, option_key), render)
+
+    async def forecast(self, name: str, years: int) -> bytes:
+        version = self.version(name)
+        if name not in self.schedules:
+            raise HTTPError(404, f"No schedules configured for ledger '{name}'")
+        return await self.cached((name, version, 'forecast', years),
+                                 lambda: self.run(render_forecast, self.ledgers[name], self.schedules[name], years))
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced,
+                'pending': len(self.pending), 'cached': len(self.results), 'cached_bytes': self.nbytes}
+
+    async def respond(self, method: str, target: str) -> tuple:
+        """
+        Routes one request.
+        Returns:
+            tuple: (status, content type, body bytes)
+        """
+        if method != 'GET':
+            raise HTTPError(405, f"{method} is not supported")
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if not parts:
+            index = {'ledgers': sorted(self.ledgers), 'forecasts': sorted(self.schedules),
+                     'routes': [f'/ledgers/<name>/{statement}.<{"|".join(FORMATS)}>' for statement in STATEMENTS]
+                     + ['/ledgers/<name>/forecast.html', '/stats']}
+            return 200, FORMATS['json'], json.dumps(index).encode()
+        if parts == ['stats']:
+            return 200, FORMATS['json'], json.dumps(self.stats()).encode()
+        if len(parts) == 3 and parts[0] == 'ledgers':
+            document, _, fmt = parts[2].rpartition('.')
+            if document in STATEMENTS and fmt in FORMATS:
+                return 200, FORMATS[fmt], await self.statement(parts[1], document, fmt, statement_options(query))
+            if document == 'forecast' and fmt == 'html':
+                return 200, FORMATS[fmt], await self.forecast(parts[1], int_option(query, 'years', 1))
+        raise HTTPError(404, f"No route for {url.path}")
+
+    async def handle(self, reader, writer):
+        """
+        Serves requests on one connection until the client closes it or asks to.
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.LimitOverrunError:
+                    await reply(writer, 431, FORMATS['json'],
+                                error_body(f"Request headers exceed {MAX_HEADER_BYTES:,} bytes"), False)
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+                request = request_line.split(' ')
+                if len(request) != 3:
+                    await reply(writer, 400, FORMATS['json'], error_body("Malformed request line"), False)
+                    break
+                method, target, protocol = request
+                headers = {key.strip().lower(): value.strip().lower()
+                           for key, _, value in (line.partition(':') for line in header_lines)}
+                connection = headers.get('connection', '')
+                keep_alive = connection == 'keep-alive' if protocol == 'HTTP/1.0' else connection != 'close'
+                try:
+                    status, content_type, body = await self.respond(method, target)
+                except HTTPError as e:
+                    status, content_type, body = e.status, FORMATS['json'], error_body(e)
+                except ValueError as e:  # bad report options, e.g. an empty date range
+                    status, content_type, body = 400, FORMATS['json'], error_body(e)
+                except Exception as e:
+                    print(f"{request_line}: {e!r}", file=sys.stderr)
+                    status, content_type, body = 500, FORMATS['json'], error_body(e)
+                await reply(writer, status, content_type, body, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+def error_body(error) -> bytes:
+    return json.dumps({'error': str(error)}).encode()
+
+async def reply(writer, status: int, content_type: str, body: bytes, keep_alive: bool):
+    writer.write(f"HTTP/1.1 {status} {STATUS[status]}\r\nContent-Type: {content_type}\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                 .encode('latin-1') + body)
+    await writer.drain()
+
+def int_option(query: dict, key: str, default: int) -> int:
+    try:
+        return int(query.get(key, default))
+    except ValueError:
+        raise HTTPError(400, f"'{key}' must be a whole number, not '{query[key]}'")
+
+def statement_options(query: dict) -> dict:
+    """
+    Period report options from a query string, validated; empty for whole-ledger monthly statements.
+    """
+    options = {}
+    if 'period' in query:
+        if query['period'] not in PERIODS:
+            raise HTTPError(400, f"Unknown period '{query['period']}', expected one of {PERIODS}")
+        options['period'] = query['period']
+    for key in ('start', 'end'):
+        if key in query:
+            try:
+                options[key] = str(pd.Timestamp(query[key]).date())
+            except ValueError:
+                raise HTTPError(400, f"'{key}' must be a date, not '{query[key]}'")
+    if 'fiscal_year_start' in query:
+        options['fiscal_year_start'] = int_option(query, 'fiscal_year_start', 1)
+        if not 1 <= options['fiscal_year_start'] <= 12:
+            raise HTTPError(400, "'fiscal_year_start' must be a month number 1-12")
+    return options
+
+def parse_names(values) -> dict:
+    """
+    NAME=PATH arguments to a dict; bare PATHs are named as BatchReport.entity_names names them.
+    """
+    from BatchReport import entity_name, entity_names
+    named = {name: path for path, name in entity_names([value for value in values if '=' not in value]).items()}
+    for value in values:
+        if '=' in value:
+            name, _, path = value.rpartition('=')
+            named[name or entity_name(path)] = path
+    return named
+
+async def serve(server: ReportServer, host: str, port: int):
+    listener = await server.start(host, port)
+    bound = listener.sockets[0].getsockname()
+    print(f"Serving {len(server.ledgers)} ledger(s) on http://{bound[0]}:{bound[1]}/", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+if __name__ == "__main__":
+    import argparse
+    from BatchReport import expand_ledgers
+    parser = argparse.ArgumentParser(description="Serve ledger statements and forecasts over HTTP.")
+    parser.add_argument('ledgers', nargs='+', help="Ledger CSV files, directories or glob patterns, or NAME=PATH.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on. Default: 127.0.0.1.")
+    parser.add_argument('--port', type=int, default=8765, help="Port to listen on. Default: 8765.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes. Default: one per CPU.")
+    parser.add_argument('--cache-mb', type=float, default=RESULT_LIMIT / 2**20,
+                        help=f"Memory for cached results, in MB. Default: {RESULT_LIMIT // 2**20}.")
+    parser.add_argument('--schedules', action='append', default=[],
+                        help="Recurring schedules CSV for forecasts, as NAME=PATH (repeatable).")
+    args = parser.parse_args()
+    ledgers = parse_names(expand_ledgers([value for value in args.ledgers if '=' not in value]))
+    ledgers.update(parse_names([value for value in args.ledgers if '=' in value]))
+    if not ledgers:
+        parser.error(f"No ledgers found in {args.ledgers}")
+    server = ReportServer(ledgers, parse_names(args.schedules), args.workers, memory_limit=int(args.cache_mb * 2**20))
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    sys.exit(0)
@@ -0,0 +1,110 @@
+import sys
+import numpy as np
+import pandas as pd
+
+# Deterministic synthetic ledgers for benchmarks.
+# Every transaction is a balanced pair of rows (one DEBIT, one CREDIT of the same amount on
+# the same date, sharing a Transaction ID) in the README's column format, so the output
+# passes Validate.validate_ledger and reads like a real export. The same arguments and seed
+# always give the same ledger, byte for byte.
+#
+# Usage: python SyntheticLedger.py rows out.csv [--accounts 50] [--months 24] [--entities 4] [--seed 0]
+
+# Base chart of accounts as (Type, names). Types are the README's Asset, Liability and Equity;
+# income statement accounts are booked as Asset, as in the sample ledger, and carry 'Revenue'
+# or 'Expense' in the name, which is how DataScrub.split_df tells them apart. CashFlow relies on
+# that typing to reconcile; Benchmark's suite builds the cash flow of every ledger it generates.
+CHART = [
+    ('Asset', ['Cash', 'Accounts Receivable', 'Inventory', 'Equipment']),
+    ('Liability', ['Accounts Payable', 'Salaries Payable', 'Notes Payable']),
+    ('Equity', ['Common Stock', 'Retained Earnings']),
+    ('Asset', ['Sales Revenue', 'Service Revenue']),
+    ('Asset', ['Cost of Goods Sold Expense', 'Salaries Expense', 'Utilities Expense', 'Rent Expense']),
+]
+MAX_AMOUNT_CENTS = 1_000_000  # amounts are drawn uniformly from $0.01 to $10,000.00
+
+def chart_of_accounts(accounts: int) -> pd.DataFrame:
+    """
+    A chart with the requested number of accounts, cycling through the base chart and
+    numbering repeats ('Cash 2', 'Sales Revenue 2', ...).
+    Returns:
+        DataFrame with 'Account' and 'Type' columns.
+    """
+    if accounts < 2:
+        raise ValueError("A double-entry ledger needs at least 2 accounts")
+    base = [(name, type_name) for type_name, names in CHART for name in names]
+    rows = []
+    for i in range(accounts):
+        name, type_name = base[i % len(base)]
+        round_ = i // len(base)
+        rows.append((f"{name} {round_ + 1}" if round_ else name, type_name))
+    return pd.DataFrame(rows, columns=['Account', 'Type'])
+
+def synthetic_ledger(rows: int, accounts: int = 19, start: str = '2024-01-01', months: int = 12,
+                     entities: int = 1, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates a balanced double-entry ledger.
+    Args:
+        rows: Number of ledger rows, rounded up to an even number so every transaction has both legs.
+        accounts: Size of the chart of accounts (see chart_of_accounts).
+        start: First possible transaction date.
+        months: Length of the date span in months.
+        entities: Number of entities; above 1 an 'Entity' column is added and each
+            transaction is booked by one entity.
+        seed: Seed for the random generator.
+    Returns:
+        DataFrame with Date (M/D/YY strings), Effect, Account, Amount, Type, Transaction ID
+        and, for several entities, Entity.
+    """
+    rng = np.random.default_rng(seed)
+    chart = chart_of_accounts(accounts)
+    pairs = -(-rows // 2)
+
+    # Debit and credit accounts per transaction; the credit side is shifted so they never match
+    debit = rng.integers(0, accounts, pairs)
+    credit = (debit + rng.integers(1, accounts, pairs)) % accounts
+    cents = rng.integers(1, MAX_AMOUNT_CENTS + 1, pairs)
+
+    first = pd.Timestamp(start)
+    days = pd.date_range(first, first + pd.DateOffset(months=months), inclusive='left', freq='D')
+    labels = np.array([f"{day.month}/{day.day}/{day.year % 100:02d}" for day in days], dtype=object)
+    day = rng.integers(0, len(days), pairs)
+
+    # Interleave the two legs: row 2i is the debit and row 2i + 1 the credit of transaction i
+    account = np.column_stack([debit, credit]).ravel()
+    ledger = pd.DataFrame({
+        'Date': np.repeat(labels[day], 2),
+        'Effect': np.tile(np.array(['DEBIT', 'CREDIT'], dtype=object), pairs),
+        'Account': chart['Account'].to_numpy()[account],
+        'Amount': np.repeat(cents / 100, 2),
+        'Type': chart['Type'].to_numpy()[account],
+        'Transaction ID': np.repeat(np.arange(1000, 1000 + pairs), 2),
+    })
+    if entities > 1:
+        names = np.array([f"Entity {i + 1}" for i in range(entities)], dtype=object)
+        ledger['Entity'] = np.repeat(names[rng.integers(0, entities, pairs)], 2)
+    return ledger
+
+def write_synthetic_ledger(file_path, rows: int, **kwargs) -> str:
+    """
+    Writes synthetic_ledger(rows, **kwargs) to a CSV file.
+    Returns:
+        str: file_path.
+    """
+    synthetic_ledger(rows, **kwargs).to_csv(file_path, index=False)
+    return file_path
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Write a deterministic, balanced synthetic ledger CSV.")
+    parser.add_argument('rows', type=int, help="Number of ledger rows.")
+    parser.add_argument('out', help="Output CSV path.")
+    parser.add_argument('--accounts', type=int, default=19, help="Accounts in the chart. Default: 19.")
+    parser.add_argument('--start', default='2024-01-01', help="First possible date. Default: 2024-01-01.")
+    parser.add_argument('--months', type=int, default=12, help="Date span in months. Default: 12.")
+    parser.add_argument('--entities', type=int, default=1, help="Entities; above 1 adds an Entity column. Default: 1.")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed. Default: 0.")
+    args = parser.parse_args()
+    print(write_synthetic_ledger(args.out, args.rows, accounts=args.accounts, start=args.start,
+                                 months=args.months, entities=args.entities, seed=args.seed))
+    sys.exit(0)
@@ -0,0 +1,170 @@
+import sys
+import numpy as np
+import pandas as pd
+from DataScrub import parse_ledger
+
+# Double-entry validation of a ledger.
+# Every check is a whole-column operation (masks over the parsed columns, bincount over
+# dates and transaction IDs), so the pass can stay on for every report run.
+# Usage: python Validate.py ledger.csv [exceptions.csv]
+
+KNOWN_TYPES = ['Asset', 'Liability', 'Equity']  # the README's Types; income accounts are told apart by name
+KNOWN_EFFECTS = ['DEBIT', 'CREDIT']
+EXCEPTION_COLUMNS = ['Check', 'Row', 'Transaction ID', 'Date', 'Account', 'Amount', 'Detail']
+TOLERANCE = 0.005  # half a cent
+
+def _label_codes(labels: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Codes and distinct values of a label column; free for the categoricals parse_ledger produces.
+    """
+    if isinstance(labels.dtype, pd.CategoricalDtype):
+        return labels.cat.codes.to_numpy(), np.asarray(labels.cat.categories, dtype=object)
+    codes, uniques = pd.factorize(labels)
+    return codes, np.asarray(uniques, dtype=object)
+
+def _known_mask(labels: pd.Series, known: list) -> np.ndarray:
+    """
+    True where the label is one of known, comparing once per distinct label.
+    """
+    codes, uniques = _label_codes(labels)
+    return np.append(np.isin(uniques, known), False)[codes]
+
+def _id_codes(ids: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Group codes for transaction IDs. Dense integer IDs (the usual running number) are
+    used as offsets directly instead of being hashed.
+    """
+    values = ids.to_numpy()
+    if values.dtype.kind in 'iu' and len(values):
+        low, high = values.min(), values.max()
+        if high - low < 4 * len(values):
+            return (values - low).astype('int64'), np.arange(low, high + 1)
+    codes, uniques = pd.factorize(ids)
+    return codes, np.asarray(uniques)
+
+def _row_exceptions(df: pd.DataFrame, check: str, mask: np.ndarray, detail) -> pd.DataFrame | None:
+    """
+    One exceptions row per flagged ledger row.
+    detail is a string, or a callable that receives the flagged rows and returns a Series of strings.
+    """
+    rows = np.flatnonzero(mask)
+    if len(rows) == 0:
+        return None
+    flagged = df.iloc[rows]
+    return pd.DataFrame({
+        'Check': check,
+        'Row': flagged.index,
+        'Transaction ID': flagged['Transaction ID'].to_numpy() if 'Transaction ID' in df.columns else None,
+        'Date': flagged['Date'].to_numpy(),
+        'Account': flagged['Account'].to_numpy(),
+        'Amount': flagged['Amount'].to_numpy(),
+        'Detail': detail(flagged) if callable(detail) else detail,
+    })
+
+def _balance_exceptions(check: str, keys, codes: np.ndarray, signed: np.ndarray, tolerance: float,
+                       key_column: str) -> pd.DataFrame | None:
+    """
+    One exceptions row per group whose debits and credits differ by more than tolerance.
+    Args:
+        keys: Group labels, indexed by code.
+        codes: Group code of each row.
+        signed: Row amounts, positive for debits and negative for credits.
+    """
+    imbalance = np.bincount(codes, weights=signed, minlength=len(keys))
+    unbalanced = np.flatnonzero(np.abs(imbalance) > tolerance)
+    if len(unbalanced) == 0:
+        return None
+    debits = np.bincount(codes, weights=np.fmax(signed, 0.0), minlength=len(keys))[unbalanced]
+    report = pd.DataFrame({'Check': check, 'Row': None, 'Transaction ID': None, 'Date': None, 'Account': None,
+                           'Amount': imbalance[unbalanced].round(2)})
+    report[key_column] = np.asarray(keys)[unbalanced]
+    report['Detail'] = [f"debits {d:,.2f} != credits {d - i:,.2f}" for d, i in zip(debits, imbalance[unbalanced])]
+    return report
+
+def validate_ledger(df: pd.DataFrame, tolerance: float = TOLERANCE) -> pd.DataFrame:
+    """
+    Checks a ledger for rows that would silently distort the reports, and that
+    debits equal credits per date and per 'Transaction ID'.
+    Row checks:
+        - 'unparseable date': Date could not be parsed (NaT).
+        - 'missing account': Account is empty.
+        - 'unknown type': Type is not one of KNOWN_TYPES.
+        - 'unknown effect': Effect is not one of KNOWN_EFFECTS.
+        - 'missing amount': Amount is empty.
+        - 'negative amount': Amount is negative; the Effect already carries the sign.
+    Balance checks ('Amount' is debits minus credits):
+        - 'unbalanced date': debits != credits for the rows dated that day.
+        - 'unbalanced transaction': debits != credits for the rows sharing a Transaction ID.
+          IDs used by a single row are not checked (ledgers that give each leg its own ID);
+          those rows are still covered by the per-date check.
+    Args:
+        df: Ledger DataFrame, raw or as returned by DataScrub.parse_ledger. A raw ledger is parsed on a copy.
+        tolerance: Largest imbalance ignored, in currency units.
+    Returns:
+        DataFrame with EXCEPTION_COLUMNS, one row per exception; empty if the ledger is clean.
+    """
+    if 'gaap_amount' not in df.columns:
+        df = parse_ledger(df.copy())
+    dates = df['Date'].to_numpy(dtype='datetime64[D]')
+    amounts = df['Amount'].to_numpy(dtype='float64')
+    no_date = np.isnat(dates)
+    account_codes, _ = _label_codes(df['Account'])
+    is_type = _known_mask(df['Type'], KNOWN_TYPES)
+    effect_codes, effects = _label_codes(df['Effect'])
+    # +1 for debits, -1 for credits, 0 for unknown effects
+    direction = np.append((effects == 'DEBIT').astype('float64') - (effects == 'CREDIT'), 0.0)[effect_codes]
+
+    pieces = [
+        _row_exceptions(df, 'unparseable date', no_date, 'date could not be parsed'),
+        _row_exceptions(df, 'missing account', account_codes < 0, 'account is empty'),
+        _row_exceptions(df, 'unknown type', ~is_type, lambda rows: "type " + rows['Type'].astype(str) + " is not one of " + ", ".join(KNOWN_TYPES)),
+        _row_exceptions(df, 'unknown effect', direction == 0, lambda rows: "effect " + rows['Effect'].astype(str) + " is not DEBIT or CREDIT"),
+        _row_exceptions(df, 'missing amount', np.isnan(amounts), 'amount is empty'),
+        _row_exceptions(df, 'negative amount', amounts < 0, 'amount is negative; Effect already gives the direction'),
+    ]
+
+    # Balance checks use the absolute amount signed by the effect; missing amounts count as 0
+    signed = direction * np.fmax(np.abs(amounts), 0.0)
+    if not no_date.all():
+        days = dates.astype('int64')
+        first_day = days[~no_date].min()
+        day_keys = np.arange(first_day, days[~no_date].max() + 1).astype('datetime64[D]').astype('datetime64[ns]')
+        day_codes = days - first_day
+        if no_date.any():
+            day_codes, signed_dated = day_codes[~no_date], signed[~no_date]
+        else:
+            signed_dated = signed
+        pieces.append(_balance_exceptions('unbalanced date', day_keys, day_codes, signed_dated, tolerance, 'Date'))
+    if 'Transaction ID' in df.columns:
+        id_codes, ids = _id_codes(df['Transaction ID'])
+        has_id = id_codes >= 0
+        id_codes, id_signed = (id_codes, signed) if has_id.all() else (id_codes[has_id], signed[has_id])
+        shared = np.bincount(id_codes, minlength=len(ids)) > 1
+        if shared.any():
+            # IDs used by one row only are left out by zeroing their amounts
+            id_signed = np.where(shared[id_codes], id_signed, 0.0)
+            pieces.append(_balance_exceptions('unbalanced transaction', ids, id_codes, id_signed, tolerance, 'Transaction ID'))
+
+    pieces = [piece for piece in pieces if piece is not None]
+    if not pieces:
+        return pd.DataFrame(columns=EXCEPTION_COLUMNS)
+    return pd.concat(pieces, ignore_index=True)[EXCEPTION_COLUMNS]
+
+def summarize_exceptions(exceptions: pd.DataFrame) -> str:
+    """
+    One line per check with its exception count, or 'No exceptions.'.
+    """
+    if exceptions.empty:
+        return "No exceptions."
+    counts = exceptions['Check'].value_counts(sort=False)
+    return "\n".join(f"{count:>8,}  {check}" for check, count in counts.items())
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python Validate.py ledger.csv [exceptions.csv]", file=sys.stderr)
+        sys.exit(2)
+    exceptions = validate_ledger(pd.read_csv(sys.argv[1]))
+    print(summarize_exceptions(exceptions))
+    if len(sys.argv) > 2:
+        exceptions.to_csv(sys.argv[2], index=False)
+    sys.exit(1 if len(exceptions) else 0)
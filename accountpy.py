@@ -0,0 +1,372 @@
+import argparse
+import os
+import sys
+from DataScrub import clean_df, clean_df_chunked
+from Profiling import stage
+
+# Headless command-line and library entry point.
+# Nothing here imports tkinter; reportlab and Jinja2 are only imported when PDF or HTML
+# output is actually written.
+#
+# Usage: python accountpy.py report ledger.csv --format html,pdf --out reports/ [--validate]
+#        python accountpy.py report ledger.csv --period Q --fiscal-year-start 4 --start 2024-04-01 --end 2025-03-31
+#        python accountpy.py batch ledgers/ --format html,pdf --out reports/ --workers 8
+#        python accountpy.py consolidate ledgers/ --format html --out reports/
+#        python accountpy.py forecast ledger.csv schedules.csv --years 5 --out reports/
+#        python accountpy.py import ledgers.sqlite ledger.csv --name acme
+#        python accountpy.py report acme --store ledgers.sqlite --start 2024-07-01 --end 2024-09-30
+#        python accountpy.py history ledgers.sqlite "Accounts Payable" --ledger acme --start 2024-07-01
+#        python accountpy.py --profile trace.jsonl report ledger.csv   (then: python Profiling.py trace.jsonl)
+
+STATEMENT_TITLES = ["Income Statement", "Balance Sheet", "Statement of Cash Flows"]
+LOAD_MODES = ['cached', 'plain', 'stream', 'incremental']
+FORMATS = ['html', 'pdf']
+
+def load_statements(file_path, mode: str = 'cached', chunksize: int = 250_000, progress=None, on_exceptions=None,
+                    cache=True, on_drilldown=None):
+    """
+    Reads a ledger CSV and returns its statements.
+    Args:
+        file_path: Path to the ledger CSV file.
+        mode: How the ledger is read:
+            - 'cached': through the columnar cache (LedgerCache.load_ledger).
+            - 'plain': pd.read_csv every time.
+            - 'stream': in chunks, for ledgers larger than memory (clean_df_chunked).
+            - 'incremental': only rows appended since the last run (LedgerState).
+        chunksize: Rows per chunk for the 'stream' and 'incremental' modes.
+        progress: Optional callback passed to clean_df (see DataScrub.report_progress);
+            only the 'cached' and 'plain' modes report per-stage progress, and only when
+            the statements are actually computed.
+        on_exceptions: Optional callback passed to clean_df, receiving the validation
+            exceptions report (see Validate.validate_ledger); 'cached' and 'plain' modes only.
+        cache: True to reuse statements memoized by ReportCache.default_cache, a ReportCache
+            to use instead, or False to always recompute. Every mode gives the same statements,
+            so the key is the ledger's content only. Validation and drill-down runs always recompute.
+        on_drilldown: Optional callback passed to clean_df, receiving a DrillDown.DrillDownIndex
+            over the ledger rows; 'cached' and 'plain' modes only.
+    Returns:
+        tuple: (DataFrame for income statement, DataFrame for balance sheet)
+    """
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode '{mode}', expected one of {LOAD_MODES}")
+    if on_exceptions is not None and mode not in ('cached', 'plain'):
+        raise ValueError(f"Validation needs the whole ledger in memory; use the 'cached' or 'plain' mode, not '{mode}'")
+    if on_drilldown is not None and mode not in ('cached', 'plain'):
+        raise ValueError(f"Drill-down needs the whole ledger in memory; use the 'cached' or 'plain' mode, not '{mode}'")
+    if cache and on_exceptions is None and on_drilldown is None:
+        from ReportCache import default_cache
+        cache = default_cache if cache is True else cache
+        return cache.statements(file_path, lambda: compute_statements(file_path, mode, chunksize, progress))
+    return compute_statements(file_path, mode, chunksize, progress, on_exceptions, on_drilldown)
+
+def compute_statements(file_path, mode: str = 'cached', chunksize: int = 250_000, progress=None, on_exceptions=None,
+                       on_drilldown=None):
+    """
+    Uncached load_statements.
+    """
+    if mode == 'cached':
+        from LedgerCache import load_ledger
+        with stage('load_ledger') as timing:
+            df = load_ledger(file_path)
+            timing.rows = len(df)
+        return clean_df(df, progress, on_exceptions, on_drilldown)
+    if mode == 'plain':
+        import pandas as pd
+        with stage('read_csv') as timing:
+            df = pd.read_csv(file_path)
+            timing.rows = len(df)
+        return clean_df(df, progress, on_exceptions, on_drilldown)
+    if mode == 'stream':
+        with stage('clean_df_chunked'):
+            return clean_df_chunked(file_path, chunksize)
+    if mode == 'incremental':
+        from LedgerState import incremental_statements
+        with stage('incremental_statements'):
+            return incremental_statements(file_path)
+    raise ValueError(f"Unknown load mode '{mode}', expected one of {LOAD_MODES}")
+
+def load_period_statements(file_path, start=None, end=None, period: str = 'M', fiscal_year_start: int = 1, cache=True):
+    """
+    Statements for a date range with one column per period, from a BalanceIndex over the ledger.
+    Args:
+        file_path: Path to the ledger CSV file.
+        start, end: Date range (inclusive); default to the ledger's first and last date.
+        period: 'D', 'W', 'M', 'Q' or 'FY' (see BalanceIndex.PERIODS).
+        fiscal_year_start: Month the fiscal year starts in, for 'Q' and 'FY'.
+        cache: As for load_statements; the range and period are part of the key.
+    Returns:
+        tuple: (DataFrame for income statement, DataFrame for balance sheet, DataFrame for
+        statement of cash flows)
+    """
+    import pandas as pd
+    from BalanceIndex import BalanceIndex
+    from LedgerCache import load_ledger
+
+    def compute():
+        with stage('balance_index') as timing:
+            index = BalanceIndex.from_frame(load_ledger(file_path))
+            timing.rows = len(index)
+        with stage('period_statements'):
+            statements = index.statements(start, end, period, fiscal_year_start)
+            opening = None
+            if start is not None and pd.Timestamp(start) > index.start:
+                # Closing balances of the day before the range
+                opening = index.statements(None, pd.Timestamp(start) - pd.Timedelta(days=1), 'FY')[1].iloc[:, -1]
+        return with_cash_flow(statements, opening)
+
+    if not cache:
+        return compute()
+    from ReportCache import default_cache
+    cache = default_cache if cache is True else cache
+    options = {'start': str(start), 'end': str(end), 'period': period, 'fiscal_year_start': fiscal_year_start}
+    return cache.statements(file_path, compute, options)
+
+def with_cash_flow(statements, opening=None) -> tuple:
+    """
+    Adds the statement of cash flows (CashFlow.cash_flow_statement) to an income statement
+    and balance sheet.
+    Args:
+        statements: (income statement, balance sheet), e.g. from load_statements.
+        opening: Balance sheet balances before the first column, for statements that do not
+            start with the ledger.
+    Returns:
+        tuple: (income statement, balance sheet, statement of cash flows)
+    """
+    from CashFlow import cash_flow_statement
+    ic, bs = statements[:2]
+    with stage('cash_flow'):
+        return ic, bs, cash_flow_statement(ic, bs, opening)
+
+def write_reports(statements, formats=('html',), out_dir='.', titles=STATEMENT_TITLES) -> list:
+    """
+    Exports statements to files.
+    Args:
+        statements: DataFrames to export, e.g. the tuple returned by load_statements.
+        formats: Any of 'html' and 'pdf'.
+        out_dir: Directory for the report files, created if missing.
+        titles: Title for each statement, also used in the file names.
+    Returns:
+        list of str: Paths of the written files.
+    """
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown report format(s) {unknown}, expected any of {FORMATS}")
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    if 'html' in formats:
+        from OutputHTML import style_tables
+        with stage('write_html'):
+            paths += style_tables(statements, titles, out_dir)
+    if 'pdf' in formats:
+        from OutputPDF import export_pdfs
+        with stage('write_pdfs'):
+            paths += export_pdfs(statements, titles, out_dir)
+    return paths
+
+def report(file_path, formats=('html',), out_dir='.', mode: str = 'cached', on_exceptions=None) -> list:
+    """
+    Reads a ledger and writes its income statement, balance sheet and statement of cash flows.
+    Returns:
+        list of str: Paths of the written files.
+    """
+    return write_reports(with_cash_flow(load_statements(file_path, mode, on_exceptions=on_exceptions)), formats, out_dir)
+
+def write_exceptions(exceptions, out_dir='.') -> str:
+    """
+    Writes a validation exceptions report to 'Exceptions <timestamp>.csv' in out_dir.
+    Returns:
+        str: Path of the written file.
+    """
+    from datetime import datetime
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"Exceptions {datetime.today().strftime('%Y%m%d_%H%M%S')}.csv")
+    exceptions.to_csv(path, index=False)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='accountpy', description="Generate accounting reports from CSV ledgers.")
+    parser.add_argument('--profile', metavar='TRACE', default=None,
+                        help="Append per-stage timing and memory to this JSON Lines file (see Profiling.py).")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    report_parser = commands.add_parser('report', help="Write the income statement and balance sheet for a ledger.")
+    report_parser.add_argument('ledger', help="Path to the ledger CSV file, or the ledger's name with --store.")
+    report_parser.add_argument('--format', default='html', help="Comma separated output formats: html, pdf. Default: html.")
+    report_parser.add_argument('--out', default='.', help="Output directory. Default: current directory.")
+    report_parser.add_argument('--mode', choices=LOAD_MODES, default='cached', help="How the ledger is read. Default: cached.")
+    report_parser.add_argument('--validate', action='store_true',
+                               help="Check double entries and write an exceptions CSV; exit status 1 if any are found.")
+    report_parser.add_argument('--period', choices=['D', 'W', 'M', 'Q', 'FY'], default=None,
+                               help="Column period: day, week, month, quarter or fiscal year. Default: M.")
+    report_parser.add_argument('--start', default=None, help="First date of the report. Default: first ledger date.")
+    report_parser.add_argument('--end', default=None, help="Last date of the report. Default: last ledger date.")
+    report_parser.add_argument('--fiscal-year-start', type=int, default=1, help="Month the fiscal year starts in. Default: 1.")
+    report_parser.add_argument('--store', default=None, help="Read the ledger from this SQLite store (see the import command).")
+
+    import_parser = commands.add_parser('import', help="Bulk-import ledger CSVs into a SQLite store.")
+    import_parser.add_argument('store', help="SQLite store file, created if missing.")
+    import_parser.add_argument('ledgers', nargs='+', help="Ledger CSV files.")
+    import_parser.add_argument('--name', default=None, help="Ledger name (one file only). Default: the file name.")
+
+    history_parser = commands.add_parser('history', help="Print one account's entries and running balance from a SQLite store.")
+    history_parser.add_argument('store', help="SQLite store file.")
+    history_parser.add_argument('account', help="Account name.")
+    history_parser.add_argument('--ledger', default=None, help="Ledger name; needed when the store holds several.")
+    history_parser.add_argument('--start', default=None, help="First date. Default: first entry.")
+    history_parser.add_argument('--end', default=None, help="Last date. Default: last entry.")
+
+    batch_parser = commands.add_parser('batch', help="Write reports for many ledgers in parallel, one folder per ledger.")
+    batch_parser.add_argument('ledgers', nargs='+', help="Ledger CSV files, directories or glob patterns.")
+    batch_parser.add_argument('--format', default='html', help="Comma separated output formats: html, pdf. Default: html.")
+    batch_parser.add_argument('--out', default='.', help="Output directory. Default: current directory.")
+    batch_parser.add_argument('--mode', choices=LOAD_MODES, default='cached', help="How each ledger is read. Default: cached.")
+    batch_parser.add_argument('--workers', type=int, default=None, help="Worker processes. Default: number of CPUs.")
+
+    consolidate_parser = commands.add_parser('consolidate', help="Write consolidated statements across many ledgers.")
+    consolidate_parser.add_argument('ledgers', nargs='+', help="Ledger CSV files, directories or glob patterns.")
+    consolidate_parser.add_argument('--format', default='html', help="Comma separated output formats: html, pdf. Default: html.")
+    consolidate_parser.add_argument('--out', default='.', help="Output directory. Default: current directory.")
+    consolidate_parser.add_argument('--entity-column', default=None, help="Column naming the entity in a combined ledger.")
+    consolidate_parser.add_argument('--per-entity', action='store_true', help="Also write each entity's statements (needs --entity-column).")
+    consolidate_parser.add_argument('--workers', type=int, default=None, help="Worker processes. Default: number of CPUs.")
+
+    forecast_parser = commands.add_parser('forecast', help="Write a cash forecast calendar from a ledger and recurring schedules.")
+    forecast_parser.add_argument('ledger', help="Path to the ledger CSV file; its closing cash is the opening balance.")
+    forecast_parser.add_argument('schedules', help="CSV of recurring schedules: Name, Amount, Frequency, Start, End.")
+    forecast_parser.add_argument('--years', type=int, default=1, help="Forecast length in years. Default: 1.")
+    forecast_parser.add_argument('--out', default='.', help="Output directory. Default: current directory.")
+
+    args = parser.parse_args(argv)
+    if args.profile:
+        import Profiling
+        Profiling.enable(args.profile)
+    formats = [fmt.strip().lower() for fmt in getattr(args, 'format', '').split(',') if fmt.strip()]
+    if args.command == 'report' and args.store:
+        if args.validate or args.period or args.fiscal_year_start != 1:
+            parser.error("--store supports --start and --end only")
+        from LedgerStore import LedgerStore
+        with LedgerStore(args.store) as store:
+            statements = with_cash_flow(store.statements(args.ledger, args.start, args.end),
+                                        store.closing_balances(args.ledger, args.start))
+        for path in write_reports(statements, formats, args.out):
+            print(path)
+    elif args.command == 'report' and (args.period or args.start or args.end or args.fiscal_year_start != 1):
+        if args.validate:
+            parser.error("--validate cannot be combined with --period, --start, --end or --fiscal-year-start")
+        statements = load_period_statements(args.ledger, args.start, args.end, args.period or 'M', args.fiscal_year_start)
+        for path in write_reports(statements, formats, args.out):
+            print(path)
+    elif args.command == 'report':
+        if args.validate and args.mode not in ('cached', 'plain'):
+            parser.error(f"--validate needs the whole ledger in memory; use --mode cached or plain, not {args.mode}")
+        found = []
+        for path in report(args.ledger, formats, args.out, args.mode, found.append if args.validate else None):
+            print(path)
+        if found:
+            from Validate import summarize_exceptions
+            print(summarize_exceptions(found[0]), file=sys.stderr)
+            if len(found[0]):
+                print(write_exceptions(found[0], args.out))
+                return 1
+    elif args.command == 'import':
+        if args.name and len(args.ledgers) > 1:
+            parser.error("--name needs a single ledger file")
+        from LedgerStore import LedgerStore
+        with LedgerStore(args.store) as store:
+            for path in args.ledgers:
+                print(f"{store.import_csv(path, args.name):>12,} rows  {path}")
+    elif args.command == 'history':
+        from LedgerStore import LedgerStore
+        with LedgerStore(args.store) as store:
+            store.account_history(args.account, args.ledger, args.start, args.end).to_csv(sys.stdout, index=False)
+    elif args.command == 'batch':
+        return run_batch_command(args.ledgers, formats, args.out, args.workers, args.mode)
+    elif args.command == 'consolidate':
+        if args.per_entity and not args.entity_column:
+            parser.error("--per-entity needs --entity-column")
+        for path in consolidate_reports(args.ledgers, formats, args.out, args.entity_column, args.per_entity, args.workers):
+            print(path)
+    elif args.command == 'forecast':
+        print(forecast_report(args.ledger, args.schedules, args.years, args.out))
+    return 0
+
+def forecast_html(ledger_path, schedules_path, years=1, mode: str = 'cached') -> str:
+    """
+    Cash forecast calendar page starting from the ledger's closing cash balance.
+    Returns:
+        str: The HTML page.
+    """
+    from CashForecast import cash_forecast, load_schedules
+    from ForecastCalendar import forecast_calendar
+
+    _, bs = load_statements(ledger_path, mode)
+    daily, opening, start, _ = cash_forecast(bs, load_schedules(schedules_path), years)
+    return forecast_calendar(daily, start, 12 * years, opening, title=f"{years} Year Cash Forecast")
+
+def forecast_report(ledger_path, schedules_path, years=1, out_dir='.', mode: str = 'cached') -> str:
+    """
+    Writes a cash forecast calendar starting from the ledger's closing cash balance.
+    Returns:
+        str: Path of the written HTML file.
+    """
+    from datetime import datetime
+    html = forecast_html(ledger_path, schedules_path, years, mode)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"Cash Forecast {datetime.today().strftime('%Y%m%d_%H%M%S')}.html")
+    with open(path, 'w') as f:
+        f.write(html)
+    return path
+
+def consolidate_reports(sources, formats=('html',), out_dir='.', entity_column=None, per_entity=False, workers=None) -> list:
+    """
+    Writes consolidated statements across ledgers, plus each entity's own statements
+    in out_dir/<entity>/ when per_entity is set.
+    Returns:
+        list of str: Paths of the written files.
+    """
+    from BatchReport import expand_ledgers
+    from Consolidate import consolidated_partials, entity_statements
+    from DataScrub import build_statements, merge_partials
+
+    ledgers = expand_ledgers(sources)
+    if not ledgers:
+        raise ValueError(f"No ledgers found in {sources}")
+    partials = consolidated_partials(ledgers, entity_column, workers)
+    titles = [f"Consolidated {title}" for title in STATEMENT_TITLES]
+    paths = write_reports(with_cash_flow(build_statements(merge_partials(partials))), formats, out_dir, titles)
+    if per_entity:
+        for entity, statements in entity_statements(partials, entity_column).items():
+            paths += write_reports(with_cash_flow(statements), formats, os.path.join(out_dir, str(entity)))
+    return paths
+
+def run_batch_command(sources, formats, out_dir, workers, mode) -> int:
+    """
+    Runs BatchReport.run_batch, printing each ledger's timing or error as it finishes.
+    Returns 1 if any ledger failed, 0 otherwise.
+    """
+    import time
+    from BatchReport import expand_ledgers, run_batch
+
+    ledgers = expand_ledgers(sources)
+    if not ledgers:
+        print("No ledgers found.", file=sys.stderr)
+        return 1
+
+    def print_result(result):
+        if result['ok']:
+            print(f"ok     {result['seconds']:8.2f}s  {result['ledger']}")
+        else:
+            print(f"FAILED {result['seconds'] or 0:8.2f}s  {result['ledger']}: {result['error']}", file=sys.stderr)
+
+    start = time.perf_counter()
+    try:
+        results = run_batch(ledgers, formats, out_dir, workers, mode, on_result=print_result)
+    except ValueError as e:  # ledgers that would share an output folder
+        print(e, file=sys.stderr)
+        return 1
+    failed = [result for result in results if not result['ok']]
+    print(f"{len(results) - len(failed)} of {len(results)} ledgers reported in {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,19 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import pandas as pd
+from LedgerCache import load_ledger
+from Profiling import stage
 
-def csv_loader():
+def csv_loader(reader=load_ledger):
     """
     Creates a GUI for selecting and importing a .csv file.
     Returns the DataFrame if successful, None if cancelled or error occurs.
+
+    Args:
+        reader: Callable that takes the selected file path and returns the result.
+            Defaults to LedgerCache.load_ledger, which reads the CSV once and reuses a
+            typed columnar copy on later loads. Pass DataScrub.clean_df_chunked to stream a large
+            ledger straight to (income statement, balance sheet) without loading it whole.
     """
     def select_file():
         file_path = filedialog.askopenfilename(
@@ -14,8 +22,9 @@ def csv_loader():
         )
         if file_path:
             try:
-                df = pd.read_csv(file_path)
-                root.result = df
+                with stage('csv_loader') as timing:
+                    root.result = reader(file_path)
+                    timing.rows = len(root.result) if hasattr(root.result, 'shape') else None
                 root.quit()
                 root.destroy()
             except Exception as e: